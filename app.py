@@ -62,6 +62,8 @@ Flask-based TTS system with working Coqui XTTS-v2 integration
 from flask import Flask
 import os
 import sys
+import time
+import threading
 
 
 def create_app():
@@ -76,10 +78,43 @@ def create_app():
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'change-this-in-production-' + os.urandom(24).hex())
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
 
+    # Uploads up to this size are extracted from memory; larger ones go via UPLOAD_FOLDER
+    app.config['UPLOAD_MEMORY_LIMIT'] = int(os.getenv('UPLOAD_MEMORY_LIMIT', 2 * 1024 * 1024))
+
     # Folder setup
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
     app.config['OUTPUT_FOLDER'] = os.path.join(app.root_path, 'static', 'outputs')
 
+    # Synthesis: number of pre-loaded Coqui worker processes (0 = in-process model)
+    app.config['COQUI_WORKER_PROCESSES'] = int(os.getenv('COQUI_WORKER_PROCESSES', 0))
+
+    # Cross-request micro-batching window for Coqui (0 = off) and batch size cap
+    app.config['COQUI_BATCH_WINDOW_MS'] = float(os.getenv('COQUI_BATCH_WINDOW_MS', 0))
+    app.config['COQUI_MAX_BATCH_SIZE'] = int(os.getenv('COQUI_MAX_BATCH_SIZE', 8))
+
+    # Admission control: max estimated synthesis backlog (worker-seconds)
+    # before new requests get 429, and how many synthesize at once
+    app.config['SYNTHESIS_BACKLOG_BUDGET'] = float(os.getenv('SYNTHESIS_BACKLOG_BUDGET', 120))
+    app.config['SYNTHESIS_MAX_CONCURRENT'] = int(os.getenv('SYNTHESIS_MAX_CONCURRENT', os.cpu_count() or 1))
+
+    # Background jobs (POST /jobs): worker threads and max queued jobs
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))
+    app.config['JOB_MAX_PENDING'] = int(os.getenv('JOB_MAX_PENDING', 100))
+
+    # Output retention: files unused for OUTPUT_TTL_SECONDS are removed, and the
+    # least recently used go first once the folder exceeds OUTPUT_MAX_BYTES
+    app.config['OUTPUT_TTL_SECONDS'] = float(os.getenv('OUTPUT_TTL_SECONDS', 24 * 3600))
+    app.config['OUTPUT_MAX_BYTES'] = int(os.getenv('OUTPUT_MAX_BYTES', 2 * 1024 ** 3))
+    app.config['JANITOR_INTERVAL_SECONDS'] = float(os.getenv('JANITOR_INTERVAL_SECONDS', 60))
+
+    # Transcoding to Opus / MP3 variants runs on this many encoder threads
+    app.config['ENCODER_WORKERS'] = int(os.getenv('ENCODER_WORKERS', 2))
+
+    # Load + warm up Coqui in the background at startup; /health/ready
+    # reports 503 until this finishes
+    app.config['PRELOAD_MODELS'] = os.getenv('PRELOAD_MODELS', '0').lower() in ('1', 'true', 'yes')
+    app.config['STARTED_AT'] = time.time()
+
     # Create all required directories
     for folder in [
         app.config['UPLOAD_FOLDER'],
@@ -89,6 +124,41 @@ def create_app():
     ]:
         os.makedirs(folder, exist_ok=True)
 
+    # ===== SYNTHESIS BACKEND =====
+    from services.tts_service import TTSService
+    TTSService.configure_worker_pool(app.config['COQUI_WORKER_PROCESSES'])
+    TTSService.configure_batching(app.config['COQUI_BATCH_WINDOW_MS'], app.config['COQUI_MAX_BATCH_SIZE'])
+
+    from services.admission import AdmissionController
+    app.extensions['admission'] = AdmissionController(
+        budget_seconds=app.config['SYNTHESIS_BACKLOG_BUDGET'],
+        max_concurrent=app.config['SYNTHESIS_MAX_CONCURRENT']
+    )
+
+    from services.jobs import JobManager
+    app.extensions['jobs'] = JobManager(
+        output_folder=app.config['OUTPUT_FOLDER'],
+        max_workers=app.config['JOB_WORKERS'],
+        max_pending=app.config['JOB_MAX_PENDING'],
+        admission=app.extensions['admission']
+    )
+
+    from services.audio_formats import AudioEncoder
+    app.extensions['encoder'] = AudioEncoder(max_workers=app.config['ENCODER_WORKERS'])
+
+    from services.janitor import OutputJanitor
+    app.extensions['janitor'] = OutputJanitor(
+        app.config['OUTPUT_FOLDER'],
+        ttl_seconds=app.config['OUTPUT_TTL_SECONDS'],
+        max_bytes=app.config['OUTPUT_MAX_BYTES'],
+        interval_seconds=app.config['JANITOR_INTERVAL_SECONDS']
+    ).start()
+
+    if app.config['PRELOAD_MODELS']:
+        warmup_service = TTSService(output_folder=app.config['OUTPUT_FOLDER'])
+        threading.Thread(target=warmup_service.warm_up, name='model-warmup', daemon=True).start()
+        print("📥 Loading and warming up Coqui model in background...")
+
     # ===== REGISTER BLUEPRINTS =====
     from controllers.routes import bp as routes_bp
     app.register_blueprint(routes_bp)
@@ -181,7 +251,7 @@ def print_startup_banner():
     print("📍 Network:  http://0.0.0.0:5000")
     print("=" * 60)
     print("\n💡 TIPS:")
-    print("   • First request may take time (model loading)")
+    print("   • Set PRELOAD_MODELS=1 to load models at startup")
     print("   • Use Ctrl+C to stop the server")
     print("   • Check /health endpoint for status")
     print("=" * 60 + "\n")
@@ -0,0 +1,253 @@
+"""
+Batch Document-to-Audio Conversion
+Walks a directory and converts every supported document to speech on a
+process pool (one loaded model per worker), skipping files whose audio is
+already newer than the source, and writes a JSON manifest with timings.
+
+Usage:
+    python batch_convert.py documents/ --output-dir audio/ --engine coqui
+    python batch_convert.py documents/ --workers 8 --language en --force
+    python batch_convert.py documents/ --format opus-32
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt', '.png', '.jpg', '.jpeg', '.tiff', '.bmp')
+
+# Per-process service, created once by the pool initializer
+_worker_service = None
+
+
+def find_documents(input_dir, extensions=SUPPORTED_EXTENSIONS):
+    """Relative paths of every supported document under input_dir (sorted)"""
+    documents = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in files:
+            if not name.startswith('.') and name.lower().endswith(extensions):
+                documents.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(documents)
+
+
+def output_stem_for(relative_path, output_dir):
+    """Mirror the source tree under output_dir; the extension depends on the format"""
+    return os.path.join(output_dir, os.path.splitext(relative_path)[0])
+
+
+def existing_output(output_stem, fmt=None):
+    """Path of an already converted file for output_stem, or None"""
+    for ext in ([fmt['ext']] if fmt else ['wav', 'mp3', 'ogg']):
+        if os.path.isfile(f"{output_stem}.{ext}"):
+            return f"{output_stem}.{ext}"
+    return None
+
+
+def is_up_to_date(source_path, output_path):
+    """True if the output exists and is at least as new as its source"""
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(source_path)
+    except (OSError, TypeError):
+        return False
+
+
+def _init_worker(cache_folder, threads):
+    """Pool initializer: one TTSService (and model) per worker process"""
+    global _worker_service
+    import torch
+    from services.tts_service import TTSService
+
+    torch.set_num_threads(threads)
+    # Parallelism comes from the process pool, not from in-process replicas
+    TTSService.MAX_SYNTHESIS_WORKERS = 1
+    TTSService.INTRA_OP_THREADS = threads
+    _worker_service = TTSService(output_folder=cache_folder)
+
+
+def _convert_document(source_path, output_stem, engine, language, quality, output_format):
+    """Extract, clean, detect, preprocess, synthesize (and encode) one document"""
+    from services.extractor import extract_text_from_file, clean_text
+    from services.language_detector import detect_language, preprocess_text
+    from services.audio_formats import resolve_format, rename_to_native, encode_file
+
+    timings = {}
+    result = {'language': language, 'chars': 0, 'timings': timings, 'error': None}
+    start = time.perf_counter()
+
+    def lap(stage, since):
+        now = time.perf_counter()
+        timings[stage] = round(now - since, 3)
+        return now
+
+    try:
+        mark = start
+        text = extract_text_from_file(source_path)
+        mark = lap('extract', mark)
+
+        text = clean_text(text)
+        mark = lap('clean', mark)
+        if not text.strip():
+            raise ValueError("No text extracted")
+
+        if language == 'auto':
+            result['language'] = detect_language(text) or 'en'
+            mark = lap('detect_language', mark)
+
+        text = preprocess_text(text, result['language'])
+        mark = lap('preprocess', mark)
+        result['chars'] = len(text)
+
+        # Write next to the target and rename, so an interrupted run never
+        # leaves a truncated file that looks up to date
+        os.makedirs(os.path.dirname(output_stem) or '.', exist_ok=True)
+        temp_path = output_stem + '.part'
+        try:
+            _worker_service.save_speech(text, temp_path, engine, result['language'], quality)
+            output_path = rename_to_native(temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        mark = lap('synthesize', mark)
+
+        fmt = resolve_format(output_format)
+        if fmt and (fmt['bitrate'] or not output_path.endswith('.' + fmt['ext'])):
+            encoded_path = f"{output_stem}.{fmt['ext']}"
+            encode_file(output_path, encoded_path, fmt)
+            if encoded_path != output_path:
+                os.remove(output_path)
+            output_path = encoded_path
+            lap('encode', mark)
+        result['output_path'] = output_path
+
+        result['status'] = 'converted'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+
+    timings['total'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def write_manifest(path, manifest):
+    """Write the manifest atomically"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a directory of documents to audio")
+    parser.add_argument('input_dir', help="Directory to scan (recursively)")
+    parser.add_argument('--output-dir', default=None, help="Where to write audio (default: <input_dir>_audio)")
+    parser.add_argument('--engine', default='coqui', help="coqui / gtts / elevenlabs / pyttsx3")
+    parser.add_argument('--language', default='auto', help="Language code or 'auto'")
+    parser.add_argument('--quality', default='high', help="Voice quality setting")
+    parser.add_argument('--format', default='auto',
+                        help="Output format: auto (engine native), wav, mp3[-<kbps>], opus[-<kbps>]")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--manifest', default=None, help="Manifest path (default: <output_dir>/manifest.json)")
+    parser.add_argument('--force', action='store_true', help="Reconvert even if outputs are current")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"Not a directory: {args.input_dir}")
+
+    from services.audio_formats import resolve_format
+    try:
+        fmt = resolve_format(args.format)
+    except ValueError as e:
+        parser.error(str(e))
+
+    input_dir = os.path.abspath(args.input_dir)
+    output_dir = os.path.abspath(args.output_dir or input_dir.rstrip(os.sep) + '_audio')
+    manifest_path = args.manifest or os.path.join(output_dir, 'manifest.json')
+    os.makedirs(output_dir, exist_ok=True)
+
+    entries = []
+    todo = []
+    for relative_path in find_documents(input_dir):
+        source_path = os.path.join(input_dir, relative_path)
+        output_stem = output_stem_for(relative_path, output_dir)
+        output_path = existing_output(output_stem, fmt)
+        entry = {'source': relative_path, 'output': None, 'bytes': os.path.getsize(source_path)}
+        entries.append(entry)
+        if not args.force and is_up_to_date(source_path, output_path):
+            entry.update(status='skipped', output=os.path.relpath(output_path, output_dir))
+        else:
+            todo.append((entry, source_path, output_stem))
+
+    print("=" * 60)
+    print(f"📂 {len(entries)} documents, {len(entries) - len(todo)} up to date, {len(todo)} to convert")
+    print("=" * 60)
+
+    workers = max(1, min(args.workers, len(todo) or 1))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    start = time.time()
+    converted = failed = 0
+
+    if todo:
+        # Largest documents first, so one long file doesn't finish last on an otherwise idle pool
+        todo.sort(key=lambda item: item[0]['bytes'], reverse=True)
+        cache_folder = os.path.join(output_dir, '.batch')
+        os.makedirs(cache_folder, exist_ok=True)
+
+        # spawn: workers load their own model instead of inheriting torch state via fork
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(cache_folder, threads)) as pool:
+            futures = {pool.submit(_convert_document, source_path, output_stem,
+                                   args.engine, args.language, args.quality, args.format): entry
+                       for entry, source_path, output_stem in todo}
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    result = future.result()
+                    output_path = result.pop('output_path', None)
+                    if output_path:
+                        result['output'] = os.path.relpath(output_path, output_dir)
+                    entry.update(result)
+                except Exception as e:
+                    # Worker process died (e.g. out of memory)
+                    entry.update(status='failed', error=str(e))
+
+                if entry['status'] == 'converted':
+                    converted += 1
+                    print(f"✓ [{converted + failed}/{len(todo)}] {entry['source']} "
+                          f"({entry['chars']} chars, {entry['timings']['total']:.2f}s)")
+                else:
+                    failed += 1
+                    print(f"✗ [{converted + failed}/{len(todo)}] {entry['source']}: {entry['error']}")
+
+    elapsed = time.time() - start
+    busy = sum(entry.get('timings', {}).get('total', 0) for entry in entries)
+    write_manifest(manifest_path, {
+        'input_dir': input_dir,
+        'output_dir': output_dir,
+        'engine': args.engine,
+        'language': args.language,
+        'quality': args.quality,
+        'format': args.format,
+        'workers': workers,
+        'started_at': start,
+        'elapsed_seconds': round(elapsed, 3),
+        # Sum of per-file time over wall time; approaches `workers` when scaling is linear
+        'parallel_speedup': round(busy / elapsed, 2) if todo and elapsed > 0 else None,
+        'counts': {'total': len(entries), 'converted': converted, 'failed': failed,
+                   'skipped': len(entries) - len(todo)},
+        'files': entries,
+    })
+
+    print("=" * 60)
+    print(f"✓ Converted {converted} documents in {elapsed:.1f}s on {workers} workers ({failed} failed)")
+    print(f"📝 Manifest: {manifest_path}")
+    print("=" * 60)
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
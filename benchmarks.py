@@ -0,0 +1,299 @@
+"""
+Extraction Benchmarks
+Compares the streaming extractors, the compiled text cleaner and the
+compiled TTS normalizer with the implementations they replaced, on a given file or on a generated one. Each run happens in a fresh process so
+peak memory (max RSS) is measured per implementation.
+
+Usage:
+    python benchmarks.py docx manual.docx
+    python benchmarks.py docx --generate 200000 --repeat 3
+    python benchmarks.py clean book.txt
+    python benchmarks.py clean --generate 300000
+    python benchmarks.py normalize --generate 100000
+"""
+
+import os
+import re
+import sys
+import random
+import time
+import zipfile
+import argparse
+import tempfile
+import multiprocessing
+
+try:
+    import resource
+except ImportError:                      # Windows: no max RSS, timings only
+    resource = None
+
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# ========================================
+# DOCX
+# ========================================
+
+def docx_python_docx(path):
+    """The previous extractor: full python-docx object model, body paragraphs only"""
+    from docx import Document
+    doc = Document(path)
+    paragraphs = [paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()]
+    return '\n'.join(paragraphs)
+
+
+def docx_streaming(path):
+    from services.extractor import extract_text_from_docx
+    return extract_text_from_docx(path)
+
+
+def generate_docx(path, paragraphs, table_every=50):
+    """Write a minimal DOCX with the given number of paragraphs (and a table every table_every)"""
+    sentence = "The quick brown fox jumps over the lazy dog while the narrator keeps reading. "
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml',
+                         '<?xml version="1.0" encoding="UTF-8"?>'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                         '<Default Extension="xml" ContentType="application/xml"/>'
+                         '<Override PartName="/word/document.xml" ContentType="application/'
+                         'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr('_rels/.rels',
+                         '<?xml version="1.0" encoding="UTF-8"?>'
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+                         '2006/relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+        with archive.open('word/document.xml', 'w') as xml:
+            xml.write(f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{_W_NS}"><w:body>'.encode())
+            for index in range(paragraphs):
+                xml.write(f'<w:p><w:r><w:t>{index}. {sentence * 3}</w:t></w:r></w:p>'.encode())
+                if table_every and index % table_every == table_every - 1:
+                    xml.write(('<w:tbl><w:tr>' +
+                               ''.join(f'<w:tc><w:p><w:r><w:t>Cell {index}-{col}</w:t></w:r></w:p></w:tc>'
+                                       for col in range(3)) +
+                               '</w:tr></w:tbl>').encode())
+            xml.write(b'<w:sectPr/></w:body></w:document>')
+    return path
+
+
+# ========================================
+# TEXT CLEANING
+# ========================================
+
+def clean_text_regex_chain(text):
+    """The previous clean_text(): chained replace / re.sub passes (also the equivalence oracle)"""
+    if not text:
+        return ""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = re.sub(r'\n\s*\n+', '\n\n', text)
+    text = re.sub(r'[\x00-\x08\x0b-\x1f\x7f-\x9f]', '', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    lines = [line.strip() for line in text.split('\n')]
+    text = '\n'.join(lines)
+    text = text.strip()
+    try:
+        text = text.encode('utf-8', errors='replace').decode('utf-8')
+    except:
+        pass
+    return text
+
+
+def clean_compiled(text):
+    from services.extractor import clean_text
+    return clean_text(text)
+
+
+def load_text(path):
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        return f.read()
+
+
+def generate_text(path, lines, seed=0):
+    """Write extracted-looking text: CRLF lines, indentation, tabs, blank runs, some non-ASCII"""
+    rng = random.Random(seed)
+    words = ['speech', 'document', 'naïve', 'café', 'the', 'of', 'chapter', 'voice', 'reading', 'agent']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for index in range(lines):
+            line = ' '.join(rng.choice(words) for _ in range(rng.randint(4, 14)))
+            if index % 7 == 0:
+                line = '    ' + line.replace(' ', '  \t', 1)
+            f.write(line + ('\r\n\r\n  \r\n' if index % 9 == 0 else '\r\n'))
+    return path
+
+
+# ========================================
+# TTS NORMALIZATION
+# ========================================
+
+# Synthetic domain abbreviations, to show how each implementation scales with the table
+DOMAIN_ABBREVIATIONS = 2000
+
+
+def _domain_abbreviations(count=DOMAIN_ABBREVIATIONS):
+    rng = random.Random(7)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return {''.join(rng.choice(letters) for _ in range(rng.randint(3, 7))).capitalize() + '.': 'expansion'
+            for _ in range(count)}
+
+
+def normalize_replace_loop(text, abbreviations=None):
+    """The previous normalize_text_for_tts(): one str.replace per abbreviation, uncompiled regexes"""
+    abbreviations = abbreviations or {
+        'Mr.': 'Mister',
+        'Mrs.': 'Misses',
+        'Dr.': 'Doctor',
+        'etc.': 'etcetera',
+        'e.g.': 'for example',
+        'i.e.': 'that is',
+    }
+    for abbr, full in abbreviations.items():
+        text = text.replace(abbr, full)
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    return text.strip()
+
+
+def normalize_replace_loop_domain(text):
+    return normalize_replace_loop(text, _domain_abbreviations())
+
+
+def normalize_compiled(text):
+    from services.text_normalizer import get_normalizer
+    return get_normalizer('en').normalize(text)
+
+
+def normalize_compiled_domain(text):
+    from services.text_normalizer import add_abbreviations, get_normalizer
+    add_abbreviations('en', _domain_abbreviations())
+    return get_normalizer('en').normalize(text)
+
+
+def generate_prose(path, sentences, seed=0):
+    """Write prose with abbreviations, URLs, emails, amounts, dates and numbers"""
+    rng = random.Random(seed)
+    templates = [
+        "Mr. Smith read {n} pages of the report, e.g. the summary and appendix.",
+        "Dr. Jones paid ${n}.{c:02d} on 2024-0{m}-1{d} for {p}% of the order.",
+        "See https://example.com/docs/{n} or write to support{n}@example.com for details.",
+        "The {o}th chapter covers speech synthesis, text cleaning, etc. in depth.",
+        "Reading aloud takes practice; i.e. patience, a clear voice and a quiet room.",
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(sentences):
+            f.write(rng.choice(templates).format(n=rng.randint(1, 99999), c=rng.randint(0, 99),
+                                                 m=rng.randint(1, 9), d=rng.randint(0, 9),
+                                                 p=rng.randint(1, 100), o=rng.randint(4, 20)) + ' ')
+    return path
+
+
+# ========================================
+# RUNNER
+# ========================================
+
+# suite -> input generator (path, size), optional loader (run before the
+# timer starts) and the implementations to compare
+BENCHMARKS = {
+    'docx': {
+        'generate': generate_docx,
+        'suffix': '.docx',
+        'implementations': {'python-docx': docx_python_docx, 'streaming': docx_streaming},
+    },
+    'clean': {
+        'generate': generate_text,
+        'suffix': '.txt',
+        'load': load_text,
+        'implementations': {'regex-chain': clean_text_regex_chain, 'compiled': clean_compiled},
+    },
+    'normalize': {
+        'generate': generate_prose,
+        'suffix': '.txt',
+        'load': load_text,
+        'implementations': {
+            'replace-loop': normalize_replace_loop,
+            'compiled': normalize_compiled,
+            f'replace-loop+{DOMAIN_ABBREVIATIONS}': normalize_replace_loop_domain,
+            f'compiled+{DOMAIN_ABBREVIATIONS}': normalize_compiled_domain,
+        },
+    },
+}
+
+
+def _run_once(suite, name, path):
+    """Child process: time one implementation and report its peak memory"""
+    spec = BENCHMARKS[suite]
+    func = spec['implementations'][name]
+    data = spec['load'](path) if 'load' in spec else path
+    start = time.perf_counter()
+    text = func(data)
+    return time.perf_counter() - start, len(text), _peak_rss_mb()
+
+
+def run_suite(suite, path, repeat=3):
+    """Best-of-repeat seconds, output size and peak RSS for each implementation"""
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name in BENCHMARKS[suite]['implementations']:
+        runs = []
+        for _ in range(repeat):
+            # Fresh process per run, so peak RSS belongs to this implementation alone
+            with context.Pool(1) as pool:
+                try:
+                    runs.append(pool.apply(_run_once, (suite, name, path)))
+                except Exception as e:
+                    results[name] = {'error': str(e)}
+                    break
+        if runs:
+            results[name] = {
+                'seconds': round(min(run[0] for run in runs), 3),
+                'chars': runs[0][1],
+                'peak_rss_mb': max((run[2] for run in runs if run[2] is not None), default=None),
+            }
+    return results
+
+
+def print_results(suite, path, results):
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print("=" * 60)
+    print(f"{suite}: {os.path.basename(path)} ({size_mb:.1f} MB)")
+    print("=" * 60)
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"  {name:<18} failed: {result['error']}")
+        else:
+            rss = f"{result['peak_rss_mb']} MB" if result['peak_rss_mb'] is not None else 'n/a'
+            print(f"  {name:<18} {result['seconds']:>8.3f}s  peak RSS {rss:>10}  {result['chars']:,} chars")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction, cleaning and normalization implementations")
+    parser.add_argument('suite', choices=sorted(BENCHMARKS), help="What to benchmark")
+    parser.add_argument('path', nargs='?', help="Input file (omit with --generate)")
+    parser.add_argument('--generate', type=int, default=None, metavar='N',
+                        help="Benchmark a generated input of size N (docx: paragraphs, clean: lines, "
+                             "normalize: sentences)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per implementation (best time is reported)")
+    args = parser.parse_args()
+
+    if not args.path and not args.generate:
+        parser.error("give an input path or --generate N")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = args.path
+        if args.generate:
+            suite = BENCHMARKS[args.suite]
+            path = suite['generate'](os.path.join(temp_dir, f"generated_{args.generate}{suite['suffix']}"),
+                                     args.generate)
+        print_results(args.suite, path, run_suite(args.suite, path, max(1, args.repeat)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -508,18 +508,40 @@ Controller: Routes - WITH IMPROVED TTS SUPPORT
 Uses working TTS models from your humanoid voice project
 """
 
-from flask import Blueprint, render_template, request, current_app, send_from_directory, url_for
+from flask import Blueprint, render_template, request, current_app, send_from_directory, url_for, \
+    Response, stream_with_context
 from werkzeug.utils import secure_filename
 import os
+import time
 import uuid
+import threading
+from collections import deque
 from services.extractor import extract_text_from_file, clean_text
 from services.language_detector import detect_language, preprocess_text
 from services.tts_service import TTSService
+from services.admission import AdmissionRejected
+from services.jobs import JobQueueFull
+from services.pipeline import open_incremental_document
+from services.audio_formats import resolve_format, variant_filename, parse_variant, MIME_BY_EXT
+from services.output_store import publish_output, immutable_etag
 
 bp = Blueprint('routes', __name__)
 
 ALLOWED_EXTENSIONS = {'.pdf', '.docx', '.png', '.jpg', '.jpeg', '.txt', '.bmp', '.tiff'}
 
+# Longest a GET /jobs/<id>?wait=N call may block (seconds)
+MAX_JOB_WAIT_SECONDS = 60
+
+# Longest a request for a not-yet-encoded variant waits for the encoder (seconds)
+ENCODE_WAIT_SECONDS = 120
+
+# Content-addressed outputs never change, so clients may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Time-to-first-audio samples for /stream (milliseconds)
+_stream_metrics = {'requests': 0, 'ttfa_ms': deque(maxlen=500)}
+_stream_metrics_lock = threading.Lock()
+
 
 def allowed_file(filename):
     if '.' not in filename:
@@ -528,6 +550,31 @@ def allowed_file(filename):
     return ext in ALLOWED_EXTENSIONS
 
 
+def _upload_size(uploaded_file):
+    """Size of an upload in bytes, or None if its stream can't tell"""
+    stream = uploaded_file.stream
+    try:
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+    except (AttributeError, OSError):
+        return None
+    return size
+
+
+def _fits_in_memory(uploaded_file):
+    """True if the upload is small enough to extract without saving it to UPLOAD_FOLDER"""
+    size = _upload_size(uploaded_file)
+    return size is not None and size <= current_app.config.get('UPLOAD_MEMORY_LIMIT', 0)
+
+
+def _estimate_upload_chars(uploaded_file, filename):
+    """Rough text length of an upload for admission control, before extracting it"""
+    size = _upload_size(uploaded_file) or 0
+    # Plain text is all text; PDF / DOCX / images carry far less than their size
+    return size if filename.lower().endswith('.txt') else size // 10
+
+
 @bp.route('/')
 def index():
     return render_template('index.html')
@@ -542,151 +589,526 @@ def process():
         voice_quality = request.form.get('voice_quality', 'high')
         uploaded_file = request.files.get('file')
 
-        extracted_text = ''
+        try:
+            output_format = resolve_format(request.form.get('output_format', 'auto'))
+        except ValueError as e:
+            return render_template('index.html', error=str(e)), 400
 
-        # Handle file upload
+        filename = None
+        estimated_chars = len(text_input)
         if uploaded_file and uploaded_file.filename:
             filename = secure_filename(uploaded_file.filename)
 
             if not allowed_file(filename):
                 return render_template('index.html',
                                        error="Invalid file type. Supported: PDF, DOCX, TXT, PNG, JPG"), 400
+            estimated_chars += _estimate_upload_chars(uploaded_file, filename)
+        elif not text_input:
+            return render_template('index.html',
+                                   error="No text provided. Please enter text or upload a document."), 400
+
+        # Admission control: turn work away before extracting anything,
+        # costed from the upload size until the real text length is known
+        try:
+            ticket = current_app.extensions['admission'].admit(tts_engine, estimated_chars)
+        except AdmissionRejected as e:
+            print(f"⚠ Rejected ({tts_engine}, ~{estimated_chars} chars): {e}")
+            return render_template('index.html',
+                                   error=f"Server is busy. Please retry in {e.retry_after} seconds."), \
+                429, {'Retry-After': str(e.retry_after)}
+
+        with ticket:
+            response = _process_admitted(ticket, text_input, uploaded_file, filename, language, tts_engine,
+                                         voice_quality, output_format)
+            if isinstance(response, tuple):
+                # Error page: don't learn synthesis cost from it
+                ticket.release(succeeded=False)
+            return response
+
+    except Exception as e:
+        print(f"✗ Unexpected error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return render_template('index.html',
+                               error=f"Unexpected error: {str(e)}"), 500
+
 
+def _process_admitted(ticket, text_input, uploaded_file, filename, language, tts_engine, voice_quality,
+                      output_format):
+    """
+    Extract, preprocess and synthesize an admitted /process request; returns the page.
+    Unlike /stream this needs the whole text first: the output is one file,
+    normalized and cached as a whole (see run_pipeline).
+    """
+    extracted_text = ''
+
+    # Handle file upload
+    if filename:
+        # Small uploads are read straight from the request stream; only
+        # large ones take the save / reopen / delete round trip
+        temp_path = None
+        if not _fits_in_memory(uploaded_file):
             temp_filename = f"{uuid.uuid4().hex}_{filename}"
             temp_path = os.path.join(current_app.config['UPLOAD_FOLDER'], temp_filename)
             uploaded_file.save(temp_path)
 
-            try:
-                extracted_text = extract_text_from_file(temp_path)
-                print(f"✓ Extracted {len(extracted_text)} characters from {filename}")
-            except Exception as e:
-                return render_template('index.html',
-                                       error=f"Failed to extract text: {str(e)}"), 500
-            finally:
+        try:
+            extracted_text = extract_text_from_file(temp_path or uploaded_file.stream, filename)
+            print(f"✓ Extracted {len(extracted_text)} characters from {filename}"
+                  f"{'' if temp_path else ' (in memory)'}")
+        except Exception as e:
+            return render_template('index.html',
+                                   error=f"Failed to extract text: {str(e)}"), 500
+        finally:
+            if temp_path:
                 try:
                     os.remove(temp_path)
                 except:
                     pass
 
-        # Combine text input and extracted text
-        if text_input:
-            final_text = text_input + ('\n\n' + extracted_text if extracted_text else '')
+    # Combine text input and extracted text
+    if text_input:
+        final_text = text_input + ('\n\n' + extracted_text if extracted_text else '')
+    else:
+        final_text = extracted_text
+
+    if not final_text.strip():
+        return render_template('index.html',
+                               error="No text provided. Please enter text or upload a document."), 400
+
+    # Clean and preprocess
+    cleaned_text = clean_text(final_text)
+
+    # Auto-detect language if needed
+    if language == 'auto':
+        detected_lang = detect_language(cleaned_text)
+        language = detected_lang if detected_lang else 'en'
+        print(f"✓ Auto-detected language: {language}")
+
+    preprocessed_text = preprocess_text(cleaned_text, language)
+    ticket.refine(len(preprocessed_text))
+
+    print(f"✓ Processing {len(preprocessed_text)} characters")
+    print(f"✓ Using TTS engine: {tts_engine}")
+    print(f"✓ Target language: {language}")
+
+    # Initialize TTS service
+    tts_service = TTSService(output_folder=current_app.config['OUTPUT_FOLDER'])
+
+    # Engines write different containers; the file is renamed to
+    # audio_<content hash>.<real extension> after synthesis
+    output_path = os.path.join(current_app.config['OUTPUT_FOLDER'], f"speech_{uuid.uuid4().hex}.tmp")
+
+    # Generate speech based on selected engine
+    try:
+        if tts_engine == 'coqui':
+            # Coqui XTTS-v2 with speaker reference
+            tts_service.save_with_coqui_xtts(preprocessed_text, output_path, lang=language, quality=voice_quality)
+        elif tts_engine == 'gtts':
+            # Google TTS (most reliable)
+            tts_service.save_with_gtts(preprocessed_text, output_path, lang=language)
+        elif tts_engine == 'elevenlabs':
+            # ElevenLabs (premium)
+            tts_service.save_with_elevenlabs(preprocessed_text, output_path, lang=language, quality=voice_quality)
+        elif tts_engine == 'pyttsx3':
+            # pyttsx3 (offline)
+            tts_service.save_with_pyttsx3_unlimited(preprocessed_text, output_path, lang=language,
+                                                    quality=voice_quality)
         else:
-            final_text = extracted_text
+            # Fallback to gTTS
+            tts_service.save_with_gtts(preprocessed_text, output_path, lang=language)
+
+        output_filename = publish_output(output_path, digest=tts_service.output_digest(output_path))
+        output_path = os.path.join(current_app.config['OUTPUT_FOLDER'], output_filename)
+        print(f"✓ Audio generated successfully: {output_filename}")
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"✗ TTS generation failed: {error_msg}")
 
-        if not final_text.strip():
+        # Provide helpful error messages and fallback suggestions
+        if tts_engine == 'coqui':
             return render_template('index.html',
-                                   error="No text provided. Please enter text or upload a document."), 400
+                                   error=f"Coqui XTTS-v2 failed: {error_msg}. Try using gTTS or pyttsx3 instead."), 500
+        elif tts_engine == 'elevenlabs':
+            return render_template('index.html',
+                                   error=f"ElevenLabs failed: {error_msg}. Check your API key or try another engine."), 500
+        else:
+            return render_template('index.html',
+                                   error=f"TTS generation failed: {error_msg}"), 500
 
-        # Clean and preprocess
-        cleaned_text = clean_text(final_text)
+    # Requested a different format: start encoding now, so it is
+    # usually ready by the time the browser asks for it
+    audio_filename = output_filename
+    if output_format:
+        audio_filename = variant_filename(output_filename, output_format)
+        if audio_filename != output_filename:
+            current_app.extensions['encoder'].submit(
+                output_path, os.path.join(current_app.config['OUTPUT_FOLDER'], audio_filename), output_format)
 
-        # Auto-detect language if needed
-        if language == 'auto':
-            detected_lang = detect_language(cleaned_text)
-            language = detected_lang if detected_lang else 'en'
-            print(f"✓ Auto-detected language: {language}")
+    # Generate URL for the audio file
+    audio_url = url_for('routes.serve_audio', filename=audio_filename)
+    audio_mime = MIME_BY_EXT[audio_filename.rsplit('.', 1)[1]]
 
-        preprocessed_text = preprocess_text(cleaned_text, language)
+    # Calculate statistics
+    word_count = len(preprocessed_text.split())
+    char_count = len(preprocessed_text)
 
-        print(f"✓ Processing {len(preprocessed_text)} characters")
-        print(f"✓ Using TTS engine: {tts_engine}")
-        print(f"✓ Target language: {language}")
+    # Return success page with audio
+    return render_template('index.html',
+                           audio_url=audio_url,
+                           audio_mime=audio_mime,
+                           text=cleaned_text[:1000] + ("..." if len(cleaned_text) > 1000 else ""),
+                           full_text_length=char_count,
+                           word_count=word_count,
+                           language=language,
+                           tts_engine=tts_engine,
+                           voice_quality=voice_quality,
+                           success=True)
 
-        # Initialize TTS service
-        tts_service = TTSService(output_folder=current_app.config['OUTPUT_FOLDER'])
 
-        output_filename = f"speech_{uuid.uuid4().hex}.mp3"
-        output_path = os.path.join(current_app.config['OUTPUT_FOLDER'], output_filename)
+@bp.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Queue a document-to-speech job and return immediately (202).
+    Accepts the same form fields as /process; poll the returned status_url.
+    """
+    text_input = request.form.get('text_input', '').strip()
+    language = request.form.get('language', 'auto')
+    tts_engine = request.form.get('tts_engine', 'gtts')
+    voice_quality = request.form.get('voice_quality', 'high')
+    uploaded_file = request.files.get('file')
+
+    output_format = request.form.get('output_format', 'auto')
+    try:
+        resolve_format(output_format)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+
+    temp_path = None
+    file_data = None
+    filename = None
+    estimated_chars = len(text_input)
+    if uploaded_file and uploaded_file.filename:
+        filename = secure_filename(uploaded_file.filename)
+        if not allowed_file(filename):
+            return {'success': False, 'error': 'Invalid file type. Supported: PDF, DOCX, TXT, PNG, JPG'}, 400
+        estimated_chars += _estimate_upload_chars(uploaded_file, filename)
+
+        # The upload stream closes with the request: small files are handed
+        # to the job as bytes, large ones as a file on disk
+        if _fits_in_memory(uploaded_file):
+            file_data = uploaded_file.stream.read()
+        else:
+            temp_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
+            uploaded_file.save(temp_path)
+    elif not text_input:
+        return {'success': False, 'error': 'No text provided. Please enter text or upload a document.'}, 400
+
+    try:
+        job_id = current_app.extensions['jobs'].submit(text_input, temp_path, language, tts_engine, voice_quality,
+                                                       output_format, file_data=file_data, filename=filename,
+                                                       estimated_chars=estimated_chars)
+    except JobQueueFull as e:
+        _discard(temp_path)
+        return {'success': False, 'error': f'Too many pending jobs: {e}'}, 429, {'Retry-After': '30'}
+    except AdmissionRejected as e:
+        _discard(temp_path)
+        return {'success': False, 'error': str(e), 'retry_after': e.retry_after}, \
+            429, {'Retry-After': str(e.retry_after)}
+
+    status_url = url_for('routes.job_status', job_id=job_id)
+    return {'success': True, 'job_id': job_id, 'status_url': status_url}, 202, {'Location': status_url}
 
-        # Generate speech based on selected engine
+
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    """
+    Job progress: stage, percent, chunk counts and, once done, the audio URL.
+    ?wait=N blocks up to N seconds (max 60) for the job to finish.
+    """
+    jobs = current_app.extensions['jobs']
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_JOB_WAIT_SECONDS)
+    except ValueError:
+        wait = 0
+
+    job = jobs.wait(job_id, wait) if wait > 0 else jobs.get(job_id)
+    if job is None:
+        return {'success': False, 'error': 'Job not found'}, 404
+
+    if job['output_filename']:
+        output_format = resolve_format(job['output_format'])
+        audio_filename = variant_filename(job['output_filename'], output_format) if output_format \
+            else job['output_filename']
+        job['audio_url'] = url_for('routes.serve_audio', filename=audio_filename)
+    job['success'] = job['status'] != 'failed'
+    return job, 200
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index], 1)
+
+
+def _discard(path):
+    if path:
         try:
-            if tts_engine == 'coqui':
-                # Coqui XTTS-v2 with speaker reference
-                tts_service.save_with_coqui_xtts(preprocessed_text, output_path, lang=language, quality=voice_quality)
-            elif tts_engine == 'gtts':
-                # Google TTS (most reliable)
-                tts_service.save_with_gtts(preprocessed_text, output_path, lang=language)
-            elif tts_engine == 'elevenlabs':
-                # ElevenLabs (premium)
-                tts_service.save_with_elevenlabs(preprocessed_text, output_path, lang=language, quality=voice_quality)
-            elif tts_engine == 'pyttsx3':
-                # pyttsx3 (offline)
-                tts_service.save_with_pyttsx3_unlimited(preprocessed_text, output_path, lang=language,
-                                                        quality=voice_quality)
-            else:
-                # Fallback to gTTS
-                tts_service.save_with_gtts(preprocessed_text, output_path, lang=language)
-
-            print(f"✓ Audio generated successfully: {output_filename}")
+            os.remove(path)
+        except OSError:
+            pass
 
+
+@bp.route('/stream', methods=['GET', 'POST'])
+def stream():
+    """
+    Stream synthesized audio while later sentences are still generating.
+    Responds with chunked WAV (coqui) or MP3 (gtts); the time to the first
+    audio byte is returned in X-Time-To-First-Audio / Server-Timing headers.
+    An uploaded document (POST file=...) is streamed incrementally: PDF
+    pages are extracted, cleaned and synthesized as they arrive, so audio
+    starts after the first page.
+    """
+    request_start = time.perf_counter()
+    values = request.values
+    text_input = values.get('text_input', values.get('text', '')).strip()
+    language = values.get('language', 'auto')
+    tts_engine = values.get('tts_engine', 'coqui')
+    voice_quality = values.get('voice_quality', 'high')
+    uploaded_file = request.files.get('file')
+
+    if tts_engine not in TTSService.STREAMABLE_ENGINES:
+        return {'success': False,
+                'error': f"Streaming supports: {', '.join(TTSService.STREAMABLE_ENGINES)}"}, 400
+
+    temp_path = None
+    pieces = None
+    if uploaded_file and uploaded_file.filename:
+        filename = secure_filename(uploaded_file.filename)
+        if not allowed_file(filename):
+            return {'success': False, 'error': 'Invalid file type. Supported: PDF, DOCX, TXT, PNG, JPG'}, 400
+        estimated_chars = len(text_input) + _estimate_upload_chars(uploaded_file, filename)
+
+        # The body is produced after this view returns, so keep the upload
+        # as bytes or as a file we delete once streaming ends
+        file_data = None
+        if _fits_in_memory(uploaded_file):
+            file_data = uploaded_file.stream.read()
+        else:
+            temp_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
+            uploaded_file.save(temp_path)
+
+        try:
+            language, pieces = open_incremental_document(text_input, temp_path, language, file_data, filename)
+        except ValueError as e:
+            _discard(temp_path)
+            return {'success': False, 'error': str(e)}, 400
         except Exception as e:
-            error_msg = str(e)
-            print(f"✗ TTS generation failed: {error_msg}")
+            _discard(temp_path)
+            return {'success': False, 'error': f'Failed to extract text: {str(e)}'}, 500
+    else:
+        if not text_input:
+            return {'success': False, 'error': 'No text provided'}, 400
 
-            # Provide helpful error messages and fallback suggestions
-            if tts_engine == 'coqui':
-                return render_template('index.html',
-                                       error=f"Coqui XTTS-v2 failed: {error_msg}. Try using gTTS or pyttsx3 instead."), 500
-            elif tts_engine == 'elevenlabs':
-                return render_template('index.html',
-                                       error=f"ElevenLabs failed: {error_msg}. Check your API key or try another engine."), 500
-            else:
-                return render_template('index.html',
-                                       error=f"TTS generation failed: {error_msg}"), 500
+        cleaned_text = clean_text(text_input)
+        if language == 'auto':
+            language = detect_language(cleaned_text) or 'en'
+        preprocessed_text = preprocess_text(cleaned_text, language)
+        if not preprocessed_text:
+            return {'success': False, 'error': 'No speakable text after preprocessing'}, 400
+        estimated_chars = len(preprocessed_text)
 
-        # Generate URL for the audio file
-        audio_url = url_for('routes.serve_audio', filename=output_filename)
+    audio_iter = None
 
-        # Calculate statistics
-        word_count = len(preprocessed_text.split())
-        char_count = len(preprocessed_text)
+    def discard_input():
+        """
+        Tear down in order: wake the sentence prefetcher if it waits for a
+        page, stop and join it (closing audio_iter), then close the page
+        pipeline it was iterating, and always drop the upload
+        """
+        try:
+            if pieces is not None:
+                pieces.stop()
+            if audio_iter is not None:
+                audio_iter.close()
+            if pieces is not None:
+                pieces.close()
+        finally:
+            _discard(temp_path)
 
-        # Return success page with audio
-        return render_template('index.html',
-                               audio_url=audio_url,
-                               text=cleaned_text[:1000] + ("..." if len(cleaned_text) > 1000 else ""),
-                               full_text_length=char_count,
-                               word_count=word_count,
-                               language=language,
-                               tts_engine=tts_engine,
-                               voice_quality=voice_quality,
-                               success=True)
+    try:
+        ticket = current_app.extensions['admission'].admit(tts_engine, estimated_chars)
+    except AdmissionRejected as e:
+        discard_input()
+        return {'success': False, 'error': str(e), 'retry_after': e.retry_after}, \
+            429, {'Retry-After': str(e.retry_after)}
 
+    tts_service = TTSService(output_folder=current_app.config['OUTPUT_FOLDER'])
+
+    try:
+        ticket.start()
+        if pieces is not None:
+            mimetype, audio_iter = tts_service.stream_speech_pieces(pieces, tts_engine, language, voice_quality)
+        else:
+            mimetype, audio_iter = tts_service.stream_speech(preprocessed_text, tts_engine, language, voice_quality)
+        # Produce the first chunk before answering so the metric is real
+        # and synthesis errors still surface as a proper error status
+        first_chunk = next(audio_iter, b'')
     except Exception as e:
-        print(f"✗ Unexpected error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return render_template('index.html',
-                               error=f"Unexpected error: {str(e)}"), 500
+        ticket.release(succeeded=False)
+        discard_input()
+        print(f"✗ Streaming failed: {str(e)}")
+        return {'success': False, 'error': f'Streaming failed: {str(e)}'}, 500
+
+    ttfa_ms = (time.perf_counter() - request_start) * 1000
+    with _stream_metrics_lock:
+        _stream_metrics['requests'] += 1
+        _stream_metrics['ttfa_ms'].append(ttfa_ms)
+    print(f"✓ Stream started ({tts_engine}): first audio after {ttfa_ms:.0f}ms")
+
+    def generate():
+        completed = False
+        try:
+            yield first_chunk
+            for chunk in audio_iter:
+                yield chunk
+            completed = True
+        finally:
+            try:
+                discard_input()
+            finally:
+                ticket.release(succeeded=completed)
+
+    response = Response(stream_with_context(generate()), mimetype=mimetype, direct_passthrough=True)
+    response.headers['X-Time-To-First-Audio'] = f"{ttfa_ms:.0f}ms"
+    response.headers['Server-Timing'] = f"ttfa;dur={ttfa_ms:.1f}"
+    response.headers['Cache-Control'] = 'no-store'
+    # If the client disconnects before the body is iterated, still free the ticket
+    response.call_on_close(lambda: ticket.release(succeeded=False))
+    response.call_on_close(discard_input)
+    return response
+
+
+@bp.route('/stream/metrics')
+def stream_metrics():
+    """Time-to-first-audio statistics for the streaming endpoint"""
+    with _stream_metrics_lock:
+        samples = list(_stream_metrics['ttfa_ms'])
+        requests_served = _stream_metrics['requests']
+    return {
+        'requests': requests_served,
+        'ttfa_ms': {
+            'last': round(samples[-1], 1) if samples else None,
+            'p50': _percentile(samples, 50),
+            'p95': _percentile(samples, 95),
+            'max': round(max(samples), 1) if samples else None,
+        }
+    }, 200
+
+
+def _health_report():
+    """Shared body for the liveness and readiness endpoints"""
+    model_state = TTSService.model_state()
+    preload = current_app.config.get('PRELOAD_MODELS', False)
+    engines = TTSService.engine_status()
+
+    if model_state['status'] == 'ready' or not preload:
+        ready = True
+    elif model_state['status'] == 'failed':
+        # Coqui is down, but requests still succeed through the gTTS fallback
+        ready = engines['gtts']['installed']
+    else:
+        ready = False
+
+    return {
+        'ready': ready,
+        'degraded': model_state['status'] == 'failed',
+        'uptime_seconds': round(time.time() - current_app.config.get('STARTED_AT', time.time()), 1),
+        'preload_models': preload,
+        'model': model_state,
+        'engines': engines,
+        'admission': current_app.extensions['admission'].stats(),
+        'cache': TTSService.cache_stats(),
+        'encoder': current_app.extensions['encoder'].stats(),
+        'janitor': current_app.extensions['janitor'].stats(),
+    }
+
+
+@bp.route('/health')
+@bp.route('/health/live')
+def health():
+    """Liveness: the process is up and serving requests"""
+    report = _health_report()
+    report['status'] = 'alive'
+    return report, 200
+
+
+@bp.route('/health/ready')
+def health_ready():
+    """Readiness: models are loaded and warm (503 until then)"""
+    report = _health_report()
+    report['status'] = 'ready' if report['ready'] else 'warming_up'
+    return report, 200 if report['ready'] else 503
+
+
+def _variant_source(output_folder, stem):
+    """The originally synthesized file for stem (WAV preferred: lossless)"""
+    for ext in ('wav', 'mp3', 'ogg'):
+        path = os.path.join(output_folder, f"{stem}.{ext}")
+        if os.path.isfile(path):
+            return path
+    return None
 
 
 @bp.route('/outputs/<filename>')
 def serve_audio(filename):
-    """Serve generated audio files"""
+    """
+    Serve generated audio files.
+    A missing <stem>.<bitrate>k.<ext> variant (e.g. audio_ab12.32k.ogg) is
+    transcoded from the original on first request and kept for later ones.
+    Content-addressed audio_<hash> files get a strong ETag and are
+    cacheable forever (Cache-Control: immutable).
+    """
+    output_folder = current_app.config['OUTPUT_FOLDER']
+    filename = secure_filename(filename)
+    mimetype = MIME_BY_EXT.get(filename.rsplit('.', 1)[-1].lower())
+
+    if not os.path.isfile(os.path.join(output_folder, filename)):
+        variant = parse_variant(filename)
+        source_path = _variant_source(output_folder, variant[0]) if variant else None
+        if source_path is None:
+            return "Audio file not found", 404
+        try:
+            current_app.extensions['encoder'].submit(
+                source_path, os.path.join(output_folder, filename), variant[1]).result(timeout=ENCODE_WAIT_SECONDS)
+        except Exception as e:
+            print(f"✗ Encoding {filename} failed: {str(e)}")
+            return f"Audio encoding failed: {str(e)}", 500
+
+    current_app.extensions['janitor'].touch(filename)
+    etag = immutable_etag(filename)
     try:
-        return send_from_directory(current_app.config['OUTPUT_FOLDER'],
-                                   filename, as_attachment=False)
+        if etag is None:
+            return send_from_directory(output_folder, filename, as_attachment=False, mimetype=mimetype)
+
+        # Conditional requests with a matching If-None-Match get 304
+        response = send_from_directory(output_folder, filename, as_attachment=False, mimetype=mimetype,
+                                       etag=etag, max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Cache-Control'] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        return response
     except FileNotFoundError:
         return "Audio file not found", 404
 
 
 @bp.route('/cleanup', methods=['POST'])
 def cleanup():
-    """Clean up old audio files"""
-    try:
-        output_folder = current_app.config['OUTPUT_FOLDER']
-        deleted_count = 0
-
-        for filename in os.listdir(output_folder):
-            file_path = os.path.join(output_folder, filename)
-            if os.path.isfile(file_path) and filename != 'speaker_reference.wav':
-                try:
-                    os.remove(file_path)
-                    deleted_count += 1
-                except:
-                    pass
-
-        return {"success": True, "deleted": deleted_count}, 200
-    except Exception as e:
-        return {"error": str(e)}, 500
\ No newline at end of file
+    """
+    Ask the background janitor to sweep now (TTL + quota) and return at once.
+    Files still in use are kept; see /health for the janitor's stats.
+    """
+    janitor = current_app.extensions['janitor']
+    janitor.trigger()
+    return {"success": True, "status": "sweep_scheduled", "janitor": janitor.stats()}, 202
\ No newline at end of file
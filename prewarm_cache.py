@@ -0,0 +1,209 @@
+"""
+Offline Cache Pre-warming
+Synthesizes a known phrase list into the TTS cache before traffic arrives,
+for every engine / language / quality combination, using all cores.
+
+Usage:
+    python prewarm_cache.py phrases.txt --engines coqui,gtts --languages en,ur
+    python prewarm_cache.py prompts.csv --workers 8
+    python prewarm_cache.py prompts.jsonl --qualities high,standard
+
+Phrase files:
+    .txt    one phrase per line (blank lines and '#' comments skipped)
+    .csv    a 'text' column (or the first column); optional 'language' column
+    .jsonl  objects with a 'text' field (optional 'language'), or plain strings
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import tempfile
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+CACHEABLE_ENGINES = ('coqui', 'gtts')
+
+# Per-process service, created once by the pool initializer
+_worker_service = None
+
+
+def load_phrases(path):
+    """Read (text, language or None) pairs from a txt / csv / jsonl file"""
+    ext = os.path.splitext(path)[1].lower()
+    phrases = []
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if ext == '.csv':
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return phrases
+            lowered = [h.strip().lower() for h in header]
+            if 'text' in lowered:
+                text_col = lowered.index('text')
+                lang_col = lowered.index('language') if 'language' in lowered else None
+            else:
+                # No header row: the first row is data
+                text_col, lang_col = 0, None
+                reader = itertools.chain([header], reader)
+            for row in reader:
+                if len(row) > text_col and row[text_col].strip():
+                    lang = row[lang_col].strip() if lang_col is not None and len(row) > lang_col else None
+                    phrases.append((row[text_col], lang or None))
+
+        elif ext == '.jsonl':
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"⚠ Skipping line {line_no}: {e}")
+                    continue
+                if isinstance(item, str):
+                    phrases.append((item, None))
+                elif isinstance(item, dict) and item.get('text'):
+                    phrases.append((item['text'], item.get('language')))
+
+        else:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    phrases.append((line, None))
+
+    return phrases
+
+
+def _init_worker(output_folder, threads):
+    """Pool initializer: one TTSService (and model) per worker process"""
+    global _worker_service
+    import torch
+    from services.tts_service import TTSService
+
+    torch.set_num_threads(threads)
+    # Parallelism comes from the process pool, not from in-process replicas
+    TTSService.MAX_SYNTHESIS_WORKERS = 1
+    TTSService.INTRA_OP_THREADS = threads
+    _worker_service = TTSService(output_folder=output_folder)
+
+
+def _synthesize_entry(text, engine, language, quality):
+    """
+    Run one entry through TTSService so it lands in the cache exactly as
+    /process reads it. Returns (status, seconds, error) with status
+    'cached', 'skipped' (already cached) or 'failed'.
+    """
+    start = time.time()
+    if _worker_service.is_cached(text, engine, language, quality):
+        return 'skipped', 0.0, None
+
+    fd, temp_path = tempfile.mkstemp(suffix='.audio')
+    os.close(fd)
+    try:
+        _worker_service.save_speech(text, temp_path, engine, language, quality)
+        # Coqui falls back to gTTS on failure; only count real hits for this engine
+        cached = _worker_service.is_cached(text, engine, language, quality)
+        return 'cached' if cached else 'failed', time.time() - start, None
+    except Exception as e:
+        return 'failed', time.time() - start, str(e)
+    finally:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def build_entries(phrases, engines, languages, qualities):
+    """Expand phrases into preprocessed (text, engine, language, quality) entries"""
+    from services.extractor import clean_text
+    from services.language_detector import detect_language, preprocess_text
+
+    entries = set()
+    for raw_text, phrase_lang in phrases:
+        cleaned = clean_text(raw_text)
+        if not cleaned:
+            continue
+        for language in ([phrase_lang] if phrase_lang else languages):
+            if language == 'auto':
+                language = detect_language(cleaned) or 'en'
+            # Same preprocessing as /process, so the cache keys match
+            text = preprocess_text(cleaned, language)
+            if not text:
+                continue
+            for engine in engines:
+                # gTTS ignores quality; don't synthesize duplicates for it
+                for quality in (qualities if engine == 'coqui' else qualities[:1]):
+                    entries.add((text, engine, language, quality))
+    return sorted(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warm the TTS audio cache from a phrase list")
+    parser.add_argument('phrases', help="Phrase file (.txt, .csv or .jsonl)")
+    parser.add_argument('--engines', default='coqui', help="Comma-separated: coqui,gtts")
+    parser.add_argument('--languages', default='en', help="Comma-separated language codes, or 'auto'")
+    parser.add_argument('--qualities', default='high', help="Comma-separated voice qualities")
+    parser.add_argument('--output-folder', default=os.path.join('static', 'outputs'),
+                        help="App OUTPUT_FOLDER (the cache lives in its .tts_cache)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+    unsupported = [e for e in engines if e not in CACHEABLE_ENGINES]
+    if unsupported:
+        parser.error(f"Only {', '.join(CACHEABLE_ENGINES)} output is cached (got {', '.join(unsupported)})")
+
+    languages = [l.strip() for l in args.languages.split(',') if l.strip()]
+    qualities = [q.strip() for q in args.qualities.split(',') if q.strip()]
+
+    phrases = load_phrases(args.phrases)
+    entries = build_entries(phrases, engines, languages, qualities)
+
+    print("=" * 60)
+    print(f"📋 {len(phrases)} phrases → {len(entries)} cache entries")
+    print("=" * 60)
+    if not entries:
+        return 0
+
+    # The parent never builds a TTSService (no torch, no cache index open):
+    # workers skip entries that are already cached
+    os.makedirs(args.output_folder, exist_ok=True)
+    workers = max(1, min(args.workers, len(entries)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    start = time.time()
+    done = skipped = failed = 0
+
+    # spawn: workers load their own model instead of inheriting parent state
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(args.output_folder, threads)) as pool:
+        futures = {pool.submit(_synthesize_entry, *entry): entry for entry in entries}
+        for future in as_completed(futures):
+            text, engine, language, quality = futures[future]
+            status, elapsed, error = future.result()
+            if status == 'skipped':
+                skipped += 1
+                continue
+            if status == 'cached':
+                done += 1
+                print(f"✓ [{done + skipped + failed}/{len(entries)}] {engine}/{language}/{quality} "
+                      f"{elapsed:.2f}s: {text[:50]}")
+            else:
+                failed += 1
+                print(f"✗ [{done + skipped + failed}/{len(entries)}] {engine}/{language}/{quality}: "
+                      f"{error or 'engine fell back, not cached'}: {text[:50]}")
+
+    elapsed = time.time() - start
+    print("=" * 60)
+    print(f"✓ Cached {done} entries in {elapsed:.1f}s on {workers} workers "
+          f"({skipped} already cached, {failed} failed)")
+    print("=" * 60)
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Admission Control for speech synthesis
+Estimates the cost of each request from its character count and engine,
+keeps the admitted backlog under a budget and rejects the rest with a
+computed Retry-After, so admitted requests keep a bounded wait.
+"""
+
+import math
+import time
+import threading
+
+
+class AdmissionRejected(Exception):
+    """Raised when the synthesis backlog is over budget"""
+
+    def __init__(self, retry_after, backlog_seconds, cost_seconds):
+        self.retry_after = retry_after
+        self.backlog_seconds = backlog_seconds
+        self.cost_seconds = cost_seconds
+        super().__init__(f"Synthesis backlog is full ({backlog_seconds:.0f}s queued), "
+                         f"retry after {retry_after}s")
+
+
+class AdmissionTicket:
+    """An admitted request; use as a context manager around the synthesis"""
+
+    def __init__(self, controller, engine, chars, cost):
+        self.controller = controller
+        self.engine = engine
+        self.chars = chars
+        self.cost = cost
+        self._started = None
+        self._released = False
+
+    def __enter__(self):
+        return self.start()
+
+    def start(self):
+        """Wait for a synthesis slot; returns the ticket"""
+        self.controller._acquire_slot()
+        self._started = time.monotonic()
+        return self
+
+    def refine(self, chars):
+        """
+        Replace the admission-time estimate (e.g. from the upload size)
+        once the real text length is known
+        """
+        self.controller._refine(self, chars)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release(succeeded=exc_type is None)
+        return False
+
+    def release(self, succeeded=True):
+        """Return the ticket's cost to the budget (idempotent)"""
+        if self._released:
+            return
+        self._released = True
+        elapsed = time.monotonic() - self._started if self._started is not None else None
+        self.controller._release(self, elapsed if succeeded else None)
+
+
+class AdmissionController:
+    """
+    Bounded synthesis queue with per-engine cost estimates.
+
+    Costs are in worker-seconds per character and are refined from observed
+    run times (EWMA). At most max_concurrent requests synthesize at once;
+    the rest wait for a slot, and the total estimated backlog never exceeds
+    budget_seconds, which bounds the wait of every admitted request.
+    """
+
+    # Initial seconds-per-character guesses, refined as requests complete
+    DEFAULT_COST_PER_CHAR = {
+        'coqui': 0.004,
+        'gtts': 0.0015,
+        'elevenlabs': 0.002,
+        'pyttsx3': 0.0005,
+    }
+    MIN_COST_SECONDS = 0.2
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, budget_seconds=120, max_concurrent=4, cost_per_char=None):
+        self.budget_seconds = float(budget_seconds)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.cost_per_char = dict(self.DEFAULT_COST_PER_CHAR)
+        if cost_per_char:
+            self.cost_per_char.update(cost_per_char)
+
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(self.max_concurrent)
+        self._backlog = 0.0
+        self._in_flight = 0
+        self._stats = {'admitted': 0, 'rejected': 0, 'completed': 0}
+
+    def estimate(self, engine, chars):
+        """Estimated worker-seconds to synthesize chars characters"""
+        rate = self.cost_per_char.get(engine, self.cost_per_char['gtts'])
+        return max(self.MIN_COST_SECONDS, rate * chars)
+
+    def admit(self, engine, chars):
+        """
+        Admit a request or raise AdmissionRejected.
+        An idle system always admits, so one oversized request can still run.
+        """
+        cost = self.estimate(engine, chars)
+        with self._lock:
+            if self._in_flight and self._backlog + cost > self.budget_seconds:
+                self._stats['rejected'] += 1
+                # The backlog drains at max_concurrent worker-seconds per second
+                excess = self._backlog + cost - self.budget_seconds
+                retry_after = max(1, math.ceil(excess / self.max_concurrent))
+                raise AdmissionRejected(retry_after, self._backlog, cost)
+
+            self._backlog += cost
+            self._in_flight += 1
+            self._stats['admitted'] += 1
+        return AdmissionTicket(self, engine, chars, cost)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'in_flight': self._in_flight,
+                'backlog_seconds': round(self._backlog, 2),
+                'budget_seconds': self.budget_seconds,
+                'max_concurrent': self.max_concurrent,
+                'cost_per_char': {k: round(v, 6) for k, v in self.cost_per_char.items()},
+            }
+
+    def _acquire_slot(self):
+        self._slots.acquire()
+
+    def _refine(self, ticket, chars):
+        cost = self.estimate(ticket.engine, chars)
+        with self._lock:
+            if not ticket._released:
+                self._backlog = max(0.0, self._backlog + cost - ticket.cost)
+            ticket.cost = cost
+            ticket.chars = chars
+
+    def _release(self, ticket, elapsed):
+        with self._lock:
+            self._backlog = max(0.0, self._backlog - ticket.cost)
+            self._in_flight -= 1
+            self._stats['completed'] += 1
+
+            # Learn the real per-character cost from successful runs; very
+            # fast runs are mostly cache hits and would skew the estimate
+            if (elapsed is not None and elapsed >= self.MIN_COST_SECONDS and ticket.chars > 0
+                    and ticket.engine in self.cost_per_char):
+                observed = elapsed / ticket.chars
+                old = self.cost_per_char[ticket.engine]
+                self.cost_per_char[ticket.engine] = old + self.EWMA_ALPHA * (observed - old)
+
+        if ticket._started is not None:
+            self._slots.release()
@@ -0,0 +1,439 @@
+"""
+Audio Cache Store - byte-budgeted LRU cache on disk
+Entries are audio files named <key>.<ext>; the index lives in SQLite, which
+is the only record of sizes and access order, so every process using the
+directory (web app, worker pools, CLIs) shares one budget.
+TieredAudioCache adds an in-process hot tier of audio bytes in front of it.
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict
+
+
+class AudioCacheStore:
+    """
+    Disk cache with a byte budget and least-recently-used eviction, shared
+    by every process that opens the same directory.
+
+    - the SQLite index is the source of truth: lookups, sizes and the LRU
+      order are read from it, never from a per-process copy
+    - put() writes atomically (temp file + os.replace), then indexes the
+      entry and evicts in one BEGIN IMMEDIATE transaction, so processes
+      never evict concurrently and the budget holds for all of them
+    - access times reach SQLite in batches (and before each eviction), so
+      hits do not each cost a disk write
+    - a file another process evicted after our lookup reads as a miss
+    """
+
+    INDEX_NAME = 'cache_index.db'
+    ACCESS_FLUSH_EVERY = 100
+    # Temp files older than this are leftovers of a crashed write (younger
+    # ones may belong to another process that is writing right now)
+    STALE_TEMP_SECONDS = 3600
+
+    def __init__(self, directory, max_bytes=1024 ** 3):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+
+        self._lock = threading.Lock()
+        self._dirty_access = {}         # key -> last access time not yet in SQLite
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0,
+                       'evicted_bytes': 0, 'eviction_seconds': 0.0}
+
+        # Autocommit: transactions are explicit (see _write); other processes
+        # holding the write lock are waited for up to the timeout
+        self._db = sqlite3.connect(str(self.directory / self.INDEX_NAME), timeout=30,
+                                   isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._lock, self._write():
+            self._db.execute('CREATE TABLE IF NOT EXISTS entries ('
+                             'key TEXT PRIMARY KEY, ext TEXT NOT NULL, size INTEGER NOT NULL, '
+                             'last_access REAL NOT NULL, digest TEXT)')
+            # Indexes written before digests were stored
+            if 'digest' not in {row[1] for row in self._db.execute('PRAGMA table_info(entries)')}:
+                self._db.execute('ALTER TABLE entries ADD COLUMN digest TEXT')
+            self._db.execute('CREATE INDEX IF NOT EXISTS entries_by_access ON entries (last_access)')
+
+        self._load_index()
+
+    # ========================================
+    # PUBLIC API
+    # ========================================
+
+    def get(self, key):
+        """Return the cached bytes for key, or None"""
+        path = self.path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            self._forget(key)
+            return None
+
+    def path(self, key):
+        """Return the on-disk Path of a cached entry (marking it used), or None"""
+        with self._lock:
+            row = self._db.execute('SELECT ext FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            self._dirty_access[key] = time.time()
+            if len(self._dirty_access) >= self.ACCESS_FLUSH_EVERY:
+                with self._write():
+                    self._flush_access()
+        return self.directory / f"{key}.{row[0]}"
+
+    def digest(self, key):
+        """Content digest recorded with key's entry, or None"""
+        with self._lock:
+            row = self._db.execute('SELECT digest FROM entries WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone() is not None
+
+    def put(self, key, data, ext='wav', digest=None):
+        """
+        Store data under key, evicting LRU entries to stay within budget.
+        digest (optional) is kept with the entry, see digest().
+        """
+        final_path = self.directory / f"{key}.{ext}"
+        fd, temp_path = tempfile.mkstemp(dir=str(self.directory), prefix='.tmp-', suffix=f'.{ext}')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, final_path)
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        now = time.time()
+        with self._lock, self._write():
+            old = self._db.execute('SELECT ext FROM entries WHERE key = ?', (key,)).fetchone()
+            if old is not None and old[0] != ext:
+                self._unlink(key, old[0])
+            self._dirty_access.pop(key, None)
+            self._db.execute('INSERT OR REPLACE INTO entries (key, ext, size, last_access, digest) '
+                             'VALUES (?, ?, ?, ?, ?)', (key, ext, len(data), now, digest))
+            self._stats['writes'] += 1
+            # Our recent hits count in the LRU order before anything is evicted
+            self._flush_access()
+            self._evict_over_budget()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            entries, total_bytes = self._totals()
+        stats.update(entries=entries, bytes=total_bytes, max_bytes=self.max_bytes)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+        stats['eviction_seconds'] = round(stats['eviction_seconds'], 4)
+        return stats
+
+    def flush(self):
+        """Persist pending access times (call on shutdown if convenient)"""
+        with self._lock, self._write():
+            self._flush_access()
+
+    # ========================================
+    # INTERNALS (callers hold self._lock)
+    # ========================================
+
+    @contextmanager
+    def _write(self):
+        """Write transaction holding the database write lock across processes"""
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        self._db.execute('COMMIT')
+
+    def _totals(self):
+        """(entries, bytes) over every process's entries"""
+        return self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+
+    def _evict_over_budget(self):
+        entries, total_bytes = self._totals()
+        if total_bytes <= self.max_bytes:
+            return
+        start = time.perf_counter()
+        evicted = []
+        for key, ext, size in self._db.execute('SELECT key, ext, size FROM entries ORDER BY last_access, rowid'):
+            if total_bytes <= self.max_bytes or entries - len(evicted) <= 1:
+                break
+            evicted.append((key, ext, size))
+            total_bytes -= size
+        self._db.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key, _, _ in evicted])
+        for key, ext, size in evicted:
+            self._dirty_access.pop(key, None)
+            self._unlink(key, ext)
+            self._stats['evictions'] += 1
+            self._stats['evicted_bytes'] += size
+        self._stats['eviction_seconds'] += time.perf_counter() - start
+
+    def _flush_access(self):
+        if not self._dirty_access:
+            return
+        self._db.executemany('UPDATE entries SET last_access = ? WHERE key = ?',
+                             [(ts, key) for key, ts in self._dirty_access.items()])
+        self._dirty_access.clear()
+
+    def _forget(self, key):
+        """Drop key's index row if its file is gone (evicted by another process, or deleted)"""
+        with self._lock, self._write():
+            row = self._db.execute('SELECT ext FROM entries WHERE key = ?', (key,)).fetchone()
+            # Another process may have written the entry again since our lookup
+            if row is not None and not (self.directory / f"{key}.{row[0]}").exists():
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._dirty_access.pop(key, None)
+
+    def _unlink(self, key, ext):
+        try:
+            (self.directory / f"{key}.{ext}").unlink()
+        except OSError:
+            pass
+
+    def _load_index(self):
+        """Adopt files of an older layout, drop crashed writes and trim to this budget"""
+        # Leftovers from writes interrupted by a crash
+        cutoff = time.time() - self.STALE_TEMP_SECONDS
+        for temp_file in self.directory.glob('.tmp-*'):
+            try:
+                if temp_file.stat().st_mtime < cutoff:
+                    temp_file.unlink()
+            except OSError:
+                pass
+
+        with self._lock, self._write():
+            if self._db.execute('SELECT 1 FROM entries LIMIT 1').fetchone() is None:
+                self._adopt_orphan_files()
+            self._evict_over_budget()
+
+        stats = self.stats()
+        if stats['entries']:
+            print(f"✓ Loaded {stats['entries']} cached items "
+                  f"({stats['bytes'] / 1024 / 1024:.1f} MB of {self.max_bytes / 1024 / 1024:.0f} MB)")
+
+    def _adopt_orphan_files(self):
+        """Index audio files left by an older cache layout (one-time)"""
+        rows = []
+        for path in self.directory.iterdir():
+            if not path.is_file() or path.name.startswith('.') or path.suffix not in ('.wav', '.mp3', '.ogg'):
+                continue
+            stat = path.stat()
+            rows.append((path.stem, path.suffix[1:], stat.st_size, stat.st_mtime))
+        self._db.executemany('INSERT OR REPLACE INTO entries (key, ext, size, last_access) VALUES (?, ?, ?, ?)',
+                             rows)
+
+        legacy_index = self.directory / 'cache_index.pkl'
+        if legacy_index.exists():
+            legacy_index.unlink()
+
+
+class MemoryLRU:
+    """Byte-bounded in-process LRU of audio bytes (each tagged with its file extension)"""
+
+    def __init__(self, max_bytes=64 * 1024 ** 2, max_item_bytes=2 * 1024 ** 2):
+        self.max_bytes = int(max_bytes)
+        self.max_item_bytes = int(max_item_bytes)
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._total_bytes = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (data, ext) for key, or None"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, data, ext='wav'):
+        """Insert data; returns False if it is too large to hold"""
+        if len(data) > self.max_item_bytes or len(data) > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old[0])
+            self._items[key] = (data, ext)
+            self._total_bytes += len(data)
+            while self._total_bytes > self.max_bytes:
+                _, (evicted, _) = self._items.popitem(last=False)
+                self._total_bytes -= len(evicted)
+                self.evictions += 1
+        return True
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._items), 'bytes': self._total_bytes,
+                    'max_bytes': self.max_bytes, 'max_item_bytes': self.max_item_bytes}
+
+
+class TieredAudioCache:
+    """
+    Two-tier audio cache: a MemoryLRU hot tier in front of AudioCacheStore.
+    The memory tier and its budget belong to this process; the disk tier
+    is shared with every other process on the same directory.
+
+    - memory hits are served without touching the filesystem (export()
+      writes the hot bytes out instead of linking the disk file)
+    - disk hits are promoted to memory once a key has been read
+      promote_after times from disk (1 = promote on first read)
+    - new entries are written through to disk and kept in memory
+    - memory evictions are demotions: the entry stays on disk only
+    - an entry the disk tier evicted but memory still holds is written
+      back to disk when its file is needed
+    """
+
+    def __init__(self, disk_store, memory_bytes=64 * 1024 ** 2, max_item_bytes=2 * 1024 ** 2, promote_after=2):
+        self.disk = disk_store
+        self.memory = MemoryLRU(memory_bytes, max_item_bytes)
+        self.promote_after = max(1, int(promote_after))
+        self._lock = threading.Lock()
+        self._disk_reads = OrderedDict()   # key -> disk reads since last promotion (bounded)
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'promotions': 0, 'writebacks': 0}
+
+    def get(self, key):
+        """Return cached bytes from the fastest tier holding key, or None"""
+        item = self.memory.get(key)
+        if item is not None:
+            self._count('memory_hits')
+            return item[0]
+
+        path = self.disk.path(key)
+        data = None
+        if path is not None:
+            try:
+                data = path.read_bytes()
+            except OSError:
+                self.disk._forget(key)
+        if data is None:
+            self._count('misses')
+            return None
+
+        self._count('disk_hits')
+        if self._should_promote(key) and self.memory.put(key, data, path.suffix[1:]):
+            self._count('promotions')
+        return data
+
+    def export(self, key, output_path):
+        """
+        Materialize key at output_path from the fastest tier holding it.
+        A memory hit writes the hot bytes; a disk hit is a hard link (O(1),
+        no extra disk) or, across filesystems, a kernel-side copy.
+        Returns False on a miss.
+        """
+        if os.path.lexists(output_path):
+            os.remove(output_path)
+
+        item = self.memory.get(key)
+        if item is not None:
+            with open(output_path, 'wb') as f:
+                f.write(item[0])
+            self._count('memory_hits')
+            return True
+
+        path = self.disk.path(key)
+        try:
+            if path is None:
+                raise FileNotFoundError(key)
+            try:
+                os.link(path, output_path)
+            except FileNotFoundError:
+                raise
+            except OSError:
+                # Different device or no hard links: copyfile uses sendfile/copy_file_range
+                shutil.copyfile(path, output_path)
+        except FileNotFoundError:
+            # Missing, or evicted between lookup and link
+            if path is not None:
+                self.disk._forget(key)
+            self._count('misses')
+            return False
+
+        self._count('disk_hits')
+        if self._should_promote(key):
+            try:
+                if self.memory.put(key, path.read_bytes(), path.suffix[1:]):
+                    self._count('promotions')
+            except OSError:
+                pass
+        return True
+
+    def path(self, key):
+        """On-disk Path for key (writing a memory-only entry back), or None"""
+        path = self.disk.path(key)
+        if path is not None:
+            return path
+
+        item = self.memory.get(key)
+        if item is None:
+            return None
+        self.disk.put(key, *item)
+        self._count('writebacks')
+        return self.disk.path(key)
+
+    def put(self, key, data, ext='wav', digest=None):
+        """Write through to disk and keep a hot copy in memory"""
+        self.disk.put(key, data, ext, digest)
+        self.memory.put(key, data, ext)
+
+    def digest(self, key):
+        """Content digest stored with key, or None"""
+        return self.disk.digest(key)
+
+    def __contains__(self, key):
+        return key in self.memory or key in self.disk
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['memory_hit_ratio'] = round(stats['memory_hits'] / lookups, 4) if lookups else None
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else None
+        stats['demotions'] = self.memory.evictions
+        stats['memory'] = self.memory.stats()
+        stats['disk'] = self.disk.stats()
+        return stats
+
+    def flush(self):
+        self.disk.flush()
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _should_promote(self, key):
+        with self._lock:
+            reads = self._disk_reads.pop(key, 0) + 1
+            if reads >= self.promote_after:
+                return True
+            self._disk_reads[key] = reads
+            # Bound the read counters the same way as an LRU
+            if len(self._disk_reads) > 100000:
+                self._disk_reads.popitem(last=False)
+            return False
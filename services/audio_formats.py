@@ -0,0 +1,183 @@
+"""
+Audio Output Formats
+Format selection (WAV, MP3, Opus/Ogg at chosen bitrates), content sniffing
+so files get the extension and MIME type that match their bytes, and a
+bounded encoder pool that creates transcoded variants once, on demand.
+"""
+
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# name -> container extension, MIME type, default / allowed bitrates (kbps)
+OUTPUT_FORMATS = {
+    'wav': {'ext': 'wav', 'mime': 'audio/wav', 'bitrate': None, 'bitrates': ()},
+    'mp3': {'ext': 'mp3', 'mime': 'audio/mpeg', 'bitrate': 128, 'bitrates': (64, 96, 128, 192, 256)},
+    'opus': {'ext': 'ogg', 'mime': 'audio/ogg', 'bitrate': 32, 'bitrates': (16, 24, 32, 48, 64, 96)},
+}
+
+MIME_BY_EXT = {spec['ext']: spec['mime'] for spec in OUTPUT_FORMATS.values()}
+
+# Variant file names: <stem>.<bitrate>k.<ext>, e.g. speech_ab12.32k.ogg
+_VARIANT_RE = re.compile(r'^(?P<stem>[\w-]+)(?:\.(?P<bitrate>\d+)k)?\.(?P<ext>wav|mp3|ogg)$')
+
+
+def resolve_format(spec):
+    """
+    Parse a format request such as 'opus', 'mp3-192' or 'wav'.
+    'auto' / empty returns None (keep the engine's native output).
+    Raises ValueError for unknown formats or bitrates.
+    """
+    spec = (spec or '').strip().lower()
+    if spec in ('', 'auto', 'native'):
+        return None
+
+    name, _, bitrate = spec.partition('-')
+    if name == 'ogg':
+        name = 'opus'
+    fmt = OUTPUT_FORMATS.get(name)
+    if fmt is None:
+        raise ValueError(f"Unknown output format '{spec}'. Supported: {', '.join(OUTPUT_FORMATS)}")
+
+    if bitrate:
+        bitrate = int(bitrate.rstrip('k')) if bitrate.rstrip('k').isdigit() else None
+        if bitrate not in fmt['bitrates']:
+            allowed = ', '.join(f"{b}k" for b in fmt['bitrates']) or 'none'
+            raise ValueError(f"Unsupported {name} bitrate. Allowed: {allowed}")
+    else:
+        bitrate = fmt['bitrate']
+
+    return {'name': name, 'ext': fmt['ext'], 'mime': fmt['mime'], 'bitrate': bitrate}
+
+
+def sniff_extension(path):
+    """Extension matching the file's actual container ('wav', 'mp3', 'ogg'), or None"""
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'wav'
+    if head[:4] == b'OggS':
+        return 'ogg'
+    if head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return None
+
+
+def rename_to_native(path, default_ext='mp3'):
+    """
+    Give a freshly synthesized file the extension its bytes call for
+    (Coqui writes WAV, gTTS MP3, ...). Returns the new path.
+    """
+    ext = sniff_extension(path) or default_ext
+    final_path = os.path.splitext(path)[0] + '.' + ext
+    os.replace(path, final_path)
+    return final_path
+
+
+def variant_filename(filename, fmt):
+    """Output file name for filename encoded as fmt (a resolve_format() result)"""
+    stem = os.path.splitext(filename)[0]
+    if fmt['bitrate']:
+        return f"{stem}.{fmt['bitrate']}k.{fmt['ext']}"
+    return f"{stem}.{fmt['ext']}"
+
+
+def parse_variant(filename):
+    """(stem, fmt) for a variant file name, or None if it isn't one"""
+    match = _VARIANT_RE.match(filename)
+    if not match:
+        return None
+    ext, bitrate = match.group('ext'), match.group('bitrate')
+    name = {'wav': 'wav', 'mp3': 'mp3', 'ogg': 'opus'}[ext]
+    try:
+        fmt = resolve_format(f"{name}-{bitrate}" if bitrate else name)
+    except ValueError:
+        return None
+    return match.group('stem'), fmt
+
+
+def encode_file(source_path, dest_path, fmt):
+    """Transcode source_path into dest_path (requires pydub and ffmpeg)"""
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        raise Exception("pydub not installed. Run: pip install pydub (and install ffmpeg)")
+
+    audio = AudioSegment.from_file(source_path)
+    if fmt['name'] == 'opus':
+        export_args = {'format': 'ogg', 'codec': 'libopus'}
+    elif fmt['name'] == 'mp3':
+        export_args = {'format': 'mp3'}
+    else:
+        export_args = {'format': 'wav'}
+    if fmt['bitrate']:
+        export_args['bitrate'] = f"{fmt['bitrate']}k"
+
+    # Encode next to the target and rename, so readers never see a partial file
+    directory = os.path.dirname(dest_path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.enc-', suffix='.' + fmt['ext'])
+    os.close(fd)
+    try:
+        audio.export(temp_path, **export_args)
+        os.replace(temp_path, dest_path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return dest_path
+
+
+class AudioEncoder:
+    """
+    Bounded pool that produces transcoded variants off the request threads.
+    Concurrent requests for the same variant share one encode; finished
+    variants stay on disk and are served directly from then on.
+    """
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max(1, int(max_workers))
+        # ffmpeg runs as a subprocess, so threads are enough to use the cores
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='encoder')
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._stats = {'encoded': 0, 'failed': 0, 'deduplicated': 0}
+
+    def submit(self, source_path, dest_path, fmt):
+        """Future resolving to dest_path once the variant exists"""
+        with self._lock:
+            future = self._in_flight.get(dest_path)
+            if future is not None:
+                self._stats['deduplicated'] += 1
+                return future
+            future = self._executor.submit(self._encode, source_path, dest_path, fmt)
+            self._in_flight[dest_path] = future
+        future.add_done_callback(lambda _: self._forget(dest_path))
+        return future
+
+    def _encode(self, source_path, dest_path, fmt):
+        if os.path.exists(dest_path):
+            return dest_path
+        try:
+            encode_file(source_path, dest_path, fmt)
+        except Exception:
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+        with self._lock:
+            self._stats['encoded'] += 1
+        return dest_path
+
+    def _forget(self, dest_path):
+        with self._lock:
+            self._in_flight.pop(dest_path, None)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._in_flight), 'max_workers': self.max_workers}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,202 @@
+"""
+Audio Post-processing - vectorized NumPy, no temp files, no pydub
+Trims leading/trailing silence, stitches sentence chunks with pauses and
+short crossfades, and normalizes loudness, working in place on a single
+output buffer wherever possible.
+"""
+
+import os
+import numpy as np
+
+
+def peak(wav):
+    """Absolute peak without allocating an abs() copy"""
+    if not wav.size:
+        return 0.0
+    return float(max(wav.max(), -wav.min()))
+
+
+def frame_energy(wav, frame_len):
+    """
+    Mean square per frame of frame_len samples (the tail shorter than a
+    frame is ignored). Computed on a reshaped view, so no squared copy of
+    the signal is made.
+    """
+    usable = (wav.size // frame_len) * frame_len
+    if not usable:
+        return np.zeros(0, dtype=np.float32)
+    frames = wav[:usable].reshape(-1, frame_len)
+    return np.einsum('ij,ij->i', frames, frames) / frame_len
+
+
+def trim_silence(wav, sample_rate=22050, threshold_db=-40.0, frame_ms=10, keep_ms=30):
+    """
+    Drop leading/trailing frames quieter than threshold_db below the peak.
+    keep_ms of audio is left on each side so word onsets aren't clipped.
+    Returns a view of wav (no copy).
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    top = peak(wav)
+    if top <= 0:
+        return wav[:0]
+
+    energy = frame_energy(wav, frame_len)
+    threshold = (top * 10 ** (threshold_db / 20)) ** 2
+    loud = np.flatnonzero(energy > threshold)
+    if not loud.size:
+        return wav[:0]
+
+    keep = int(sample_rate * keep_ms / 1000)
+    start = max(0, loud[0] * frame_len - keep)
+    # The last partial frame is never measured; keep it if the last full frame is loud
+    end = wav.size if loud[-1] == energy.size - 1 else (loud[-1] + 1) * frame_len + keep
+    return wav[start:min(wav.size, end)]
+
+
+def loudness_gain(wav, sample_rate=22050, target_db=-20.0, gate_db=-70.0, frame_ms=400, peak_ceiling=0.98):
+    """
+    Gain that brings the gated RMS loudness of wav to target_db (dBFS).
+
+    LUFS-style: loudness is measured over 400 ms blocks, and blocks below
+    an absolute gate (silence) are ignored so pauses don't drag the level
+    down. No K-weighting filter is applied. The gain is capped so the
+    peak stays under peak_ceiling.
+    """
+    top = peak(wav)
+    if top <= 0:
+        return 1.0
+
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    energy = frame_energy(wav, frame_len)
+    if not energy.size:
+        # Shorter than one block: measure the whole clip
+        energy = np.array([np.dot(wav, wav) / wav.size])
+    gated = energy[energy > 10 ** (gate_db / 10)]
+    if not gated.size:
+        return 1.0
+
+    loudness_db = 10 * np.log10(gated.mean())
+    gain = 10 ** ((target_db - loudness_db) / 20)
+    return float(min(gain, peak_ceiling / top))
+
+
+def fade_edges(wav, fade_in, fade_out):
+    """Linear fade-in/out of the first/last samples, in place"""
+    fade_in = min(fade_in, wav.size)
+    fade_out = min(fade_out, wav.size)
+    if fade_in:
+        wav[:fade_in] *= np.linspace(0.0, 1.0, fade_in, endpoint=False, dtype=wav.dtype)
+    if fade_out:
+        wav[wav.size - fade_out:] *= np.linspace(1.0, 0.0, fade_out, endpoint=False, dtype=wav.dtype)
+    return wav
+
+
+def stitch(chunks, sample_rate=22050, pause_ms=250, crossfade_ms=10):
+    """
+    Join chunks into one newly allocated float32 buffer (the only copy).
+
+    With a pause, each chunk fades in/out over crossfade_ms into the
+    silence between them; with pause_ms=0 neighbouring chunks overlap and
+    crossfade over crossfade_ms, so joins never click either way.
+    """
+    chunks = [chunk for chunk in chunks if chunk.size]
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+
+    pause = int(sample_rate * pause_ms / 1000)
+    fade = int(sample_rate * crossfade_ms / 1000)
+    # Overlap only when chunks butt together, and never more than half a chunk
+    overlaps = [0 if pause else min(fade, prev.size // 2, nxt.size // 2)
+                for prev, nxt in zip(chunks, chunks[1:])]
+
+    total = sum(chunk.size for chunk in chunks) + pause * (len(chunks) - 1) - sum(overlaps)
+    out = np.zeros(total, dtype=np.float32)
+
+    pos = 0
+    for index, chunk in enumerate(chunks):
+        overlap_in = overlaps[index - 1] if index else 0
+        overlap_out = overlaps[index] if index < len(overlaps) else 0
+        start = pos - overlap_in
+        segment = out[start:start + chunk.size]
+        if overlap_in:
+            # Mix into the tail of the previous chunk, which has already faded out
+            head = chunk[:overlap_in] * np.linspace(0.0, 1.0, overlap_in, endpoint=False, dtype=np.float32)
+            segment[:overlap_in] += head
+            segment[overlap_in:] = chunk[overlap_in:]
+        else:
+            segment[:] = chunk
+
+        if pause:
+            fade_edges(segment, fade if index else 0, fade if index < len(chunks) - 1 else 0)
+        elif overlap_out:
+            fade_edges(segment[overlap_in:], 0, overlap_out)
+        pos = start + chunk.size + pause
+    return out
+
+
+def to_pcm16(wav):
+    """
+    Scale a float buffer to 16-bit PCM. The float buffer is scaled and
+    clipped in place, so the int16 array is the only new allocation.
+    """
+    np.multiply(wav, 32767, out=wav)
+    np.clip(wav, -32768, 32767, out=wav)
+    return wav.astype(np.int16)
+
+
+class AudioPostProcessor:
+    """
+    Configured trim -> stitch -> loudness pipeline for synthesized speech.
+    Defaults come from the environment (TTS_* variables).
+    """
+
+    TARGET_LOUDNESS_DB = float(os.getenv('TTS_TARGET_LOUDNESS_DB', -20))
+    SILENCE_THRESHOLD_DB = float(os.getenv('TTS_SILENCE_THRESHOLD_DB', -40))
+    SENTENCE_PAUSE_MS = int(os.getenv('TTS_SENTENCE_PAUSE_MS', 250))
+    CROSSFADE_MS = int(os.getenv('TTS_CROSSFADE_MS', 10))
+    PEAK_CEILING = 0.98
+
+    def __init__(self, sample_rate=22050, target_db=None, silence_threshold_db=None,
+                 pause_ms=None, crossfade_ms=None):
+        self.sample_rate = sample_rate
+        self.target_db = self.TARGET_LOUDNESS_DB if target_db is None else target_db
+        self.silence_threshold_db = self.SILENCE_THRESHOLD_DB if silence_threshold_db is None else silence_threshold_db
+        self.pause_ms = self.SENTENCE_PAUSE_MS if pause_ms is None else pause_ms
+        self.crossfade_ms = self.CROSSFADE_MS if crossfade_ms is None else crossfade_ms
+
+    def signature(self):
+        """Settings string, so cached output is keyed by how it was processed"""
+        return (f"pp:{self.target_db}:{self.silence_threshold_db}:"
+                f"{self.pause_ms}:{self.crossfade_ms}:{self.sample_rate}")
+
+    def _trim(self, wav):
+        wav = np.asarray(wav, dtype=np.float32)
+        return trim_silence(wav, self.sample_rate, self.silence_threshold_db)
+
+    def process(self, chunks):
+        """Trim and stitch chunks, normalize loudness; returns float32 samples"""
+        wav = stitch([self._trim(chunk) for chunk in chunks], self.sample_rate,
+                     self.pause_ms, self.crossfade_ms)
+        wav *= loudness_gain(wav, self.sample_rate, self.target_db, peak_ceiling=self.PEAK_CEILING)
+        return wav
+
+    def process_pcm16(self, chunks):
+        """process() encoded as int16 samples"""
+        return to_pcm16(self.process(chunks))
+
+    def stream_chunk_pcm16(self, wav, first=False):
+        """
+        One streamed sentence as int16 PCM bytes: trimmed, normalized on its
+        own, faded at the edges and preceded by the inter-sentence pause
+        (except the first, so time-to-first-audio is not padded).
+        """
+        wav = self._trim(wav)
+        pause = 0 if first else int(self.sample_rate * self.pause_ms / 1000)
+        fade = int(self.sample_rate * self.crossfade_ms / 1000)
+
+        out = np.zeros(pause + wav.size, dtype=np.float32)
+        body = out[pause:]
+        body[:] = wav
+        fade_edges(body, fade, fade)
+        body *= loudness_gain(body, self.sample_rate, self.target_db, peak_ceiling=self.PEAK_CEILING)
+        return to_pcm16(out).tobytes()
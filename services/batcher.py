@@ -0,0 +1,184 @@
+"""
+Micro-Batching Scheduler for Coqui inference
+Collects sentences from concurrent requests for a short window (or until a
+batch is full), runs them as one batch and hands each caller its own result.
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+
+# Synthesizer.tts() follows every sentence with this many zero samples
+SENTENCE_GAP_SAMPLES = 10000
+
+
+def synthesize_coqui_batch(tts, texts):
+    """
+    Synthesize several sentences with one Coqui model, batching where the
+    model allows it. Returns float32 arrays in the same order as texts.
+
+    Tacotron2's autoregressive decoder stops on a single stop token, so
+    text -> mel runs per sentence; the HiFiGAN vocoder (the larger share of
+    CPU time) runs once over the zero-padded mel batch. The result goes
+    through the same sentence split, silence trim and gaps as tts.tts(),
+    so a sentence's cached audio does not depend on whether it shared a
+    batch. Falls back to one tts.tts() call per sentence if the model does
+    not expose that layout.
+    """
+    if len(texts) == 1:
+        return [np.asarray(tts.tts(texts[0]), dtype=np.float32)]
+
+    try:
+        return _vocode_batched(tts.synthesizer, texts)
+    except Exception as e:
+        print(f"⚠ Batched vocoding failed, synthesizing {len(texts)} sentences one by one: {e!r}")
+        return [np.asarray(tts.tts(text), dtype=np.float32) for text in texts]
+
+
+def _vocode_batched(synthesizer, texts):
+    import torch
+    from TTS.tts.utils.synthesis import trim_silence
+
+    model = synthesizer.tts_model
+    vocoder = synthesizer.vocoder_model
+    if vocoder is None or synthesizer.vocoder_config.audio['sample_rate'] != model.ap.sample_rate:
+        raise ValueError("Batched vocoding needs a vocoder at the model sample rate")
+
+    # Split like Synthesizer.tts() does, then vocode every piece in one batch
+    groups = [synthesizer.split_into_sentences(text) for text in texts]
+    sentences = [sentence for group in groups for sentence in group]
+    if not sentences:
+        return [np.zeros(0, dtype=np.float32) for _ in texts]
+
+    device = next(model.parameters()).device
+    mels = []
+    with torch.no_grad():
+        for text in sentences:
+            ids = torch.as_tensor(model.tokenizer.text_to_ids(text), dtype=torch.long, device=device)
+            outputs = model.inference(ids.unsqueeze(0))
+            mel = outputs['model_outputs'][0].detach().cpu().numpy()
+            mel = model.ap.denormalize(mel.T)
+            mels.append(synthesizer.vocoder_ap.normalize(mel).astype(np.float32))
+
+        lengths = [mel.shape[1] for mel in mels]
+        # Pad with the quietest value seen so padding vocodes to silence
+        batch = np.full((len(mels), mels[0].shape[0], max(lengths)),
+                        min(float(mel.min()) for mel in mels), dtype=np.float32)
+        for i, mel in enumerate(mels):
+            batch[i, :, :lengths[i]] = mel
+
+        wavs = vocoder.inference(torch.from_numpy(batch).to(device)).cpu().numpy()
+
+    hop_length = synthesizer.vocoder_config.audio['hop_length']
+    audio = synthesizer.tts_config.audio
+    trim = 'do_trim_silence' in audio and audio['do_trim_silence']
+    gap = np.zeros(SENTENCE_GAP_SAMPLES, dtype=np.float32)
+
+    results = []
+    index = 0
+    for group in groups:
+        parts = []
+        for _ in group:
+            wav = wavs[index].reshape(-1)[:lengths[index] * hop_length]
+            if trim:
+                wav = trim_silence(wav, model.ap)
+            parts += [wav, gap]
+            index += 1
+        results.append(np.concatenate(parts).astype(np.float32) if parts else np.zeros(0, dtype=np.float32))
+    return results
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching front end.
+    submit(item) returns a Future; run_batch(list_of_items) must return a
+    list of results in the same order. Up to max_concurrency batches run at
+    once; while all slots are busy new items keep accumulating, so batches
+    grow with load.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=15, max_concurrency=1, name='batcher'):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self.max_concurrency = max(1, int(max_concurrency))
+
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=name)
+        self._stats_lock = threading.Lock()
+        self._stats = {'batches': 0, 'items': 0, 'max_batch': 0, 'errors': 0}
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._collect, name=f"{name}-collector", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """Queue one item for the next batch"""
+        if self._closed:
+            raise RuntimeError("Batcher is shut down")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_batch'] = round(stats['items'] / stats['batches'], 2) if stats['batches'] else 0
+        stats['queued'] = self._queue.qsize()
+        stats['window_ms'] = self.max_wait * 1000
+        stats['max_batch_size'] = self.max_batch_size
+        return stats
+
+    def shutdown(self):
+        self._closed = True
+        self._queue.put(None)
+        self._executor.shutdown(wait=False)
+
+    def _collect(self):
+        while not self._closed:
+            # Wait for a free slot first: items queue up meanwhile
+            self._slots.acquire()
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._closed = True
+                    break
+                batch.append(entry)
+
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.run_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(items)} items")
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats['errors'] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            with self._stats_lock:
+                self._stats['batches'] += 1
+                self._stats['items'] += len(items)
+                self._stats['max_batch'] = max(self._stats['max_batch'], len(items))
+            self._slots.release()
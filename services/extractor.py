@@ -4,90 +4,462 @@ Extracts text from PDF, DOCX, Images, and TXT files
 """
 
 import pdfplumber
-from docx import Document
 from PIL import Image
 import pytesseract
+import io
 import os
 import re
+import time
+import codecs
+import zipfile
+import tempfile
+import threading
+import posixpath
+import multiprocessing
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
+# PDFs with at least this many pages are extracted on a process pool
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 16))
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', os.cpu_count() or 1))
 
-def extract_text_from_pdf(file_path):
+# Pages without a text layer (scans) are rasterized at PDF_OCR_DPI and OCR'd
+PDF_OCR = os.getenv('PDF_OCR', '1').lower() in ('1', 'true', 'yes')
+PDF_OCR_DPI = int(os.getenv('PDF_OCR_DPI', 300))
+
+# Streamed DOCX paragraphs are grouped into pieces of about this many characters
+DOCX_PIECE_CHARS = int(os.getenv('DOCX_PIECE_CHARS', 4000))
+
+# Plain text is read and decoded TXT_CHUNK_BYTES at a time and streamed on
+# as cleaned pieces of about TXT_PIECE_CHARS
+TXT_CHUNK_BYTES = int(os.getenv('TXT_CHUNK_BYTES', 1024 * 1024))
+TXT_PIECE_CHARS = int(os.getenv('TXT_PIECE_CHARS', 16000))
+
+# Shared page-extraction / OCR pool, created on first use (see _get_pdf_pool)
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+_DOCX_BLOCKS = {_W + 'p', _W + 'tc', _W + 'tr', _W + 'tbl'}
+# Markup-compatibility fallback: Word writes text boxes (and other drawings)
+# twice, once in mc:Choice and again in mc:Fallback for older readers
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+
+def _open_source(source):
+    """
+    Extractors take a path, raw bytes or a binary file-like object.
+    Bytes are wrapped in a BytesIO; file-likes are rewound.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, 'read') and hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def _extract_pdf_page_range(source, start, end):
+    """Worker task: open the PDF independently and extract pages [start, end) as (text, seconds)"""
+    results = []
+    with pdfplumber.open(_open_source(source)) as pdf:
+        for page in pdf.pages[start:end]:
+            page_start = time.perf_counter()
+            page_text = page.extract_text() or ''
+            results.append((page_text, time.perf_counter() - page_start))
+    return results
+
+
+def _ocr_pdf_pages(source, page_numbers, dpi):
+    """Worker task: rasterize the given pages at dpi and OCR them as (page_number, text, seconds)"""
+    results = []
+    with pdfplumber.open(_open_source(source)) as pdf:
+        for number in page_numbers:
+            page_start = time.perf_counter()
+            image = pdf.pages[number].to_image(resolution=dpi).original
+            results.append((number, ocr_image(image), time.perf_counter() - page_start))
+    return results
+
+
+@contextmanager
+def _pdf_worker_path(file_path):
+    """
+    Workers open the document themselves, so they get a path rather than
+    the bytes pickled into every task: in-memory input is spilled to a
+    temporary file for the duration of the block
+    """
+    if isinstance(file_path, (str, os.PathLike)):
+        yield file_path
+        return
+
+    source = _open_source(file_path)
+    fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                f.write(block)
+        yield temp_path
+    finally:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def _in_worker_process():
+    """True inside a multiprocessing child (e.g. a batch_convert worker), where nesting a pool would oversubscribe"""
+    return multiprocessing.parent_process() is not None
+
+
+def _get_pdf_pool():
+    """The shared PDF process pool, started on first use (spawn: never fork the threaded web process)"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=max(1, PDF_WORKERS),
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _pdf_pool
+
+
+def _run_on_pdf_pool(func, tasks):
+    """Run func(*args) for each task on the shared pool; results in task order"""
+    global _pdf_pool
+    pool = _get_pdf_pool()
+    try:
+        futures = [pool.submit(func, *args) for args in tasks]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory): start a fresh pool next time
+        with _pdf_pool_lock:
+            if _pdf_pool is pool:
+                _pdf_pool = None
+        raise
+
+
+def _ranges(count, workers):
+    """Split range(count) into contiguous spans, a few per worker for load balance"""
+    span = max(1, -(-count // (workers * 4)))
+    return [(start, min(start + span, count)) for start in range(0, count, span)]
+
+
+def extract_text_from_pdf_parallel(file_path, page_count, max_workers=None):
     """
-    Extract text from PDF using pdfplumber
+    Split the page range across the shared worker pool (each task opens
+    the document itself) and reassemble the text in page order. Inside a
+    worker process (e.g. batch_convert) the pages are extracted serially.
     Args:
-        file_path: Path to PDF file
+        file_path: Path to PDF file (or bytes / binary file-like)
+        page_count: Number of pages in the document
+        max_workers: Workers to split the pages for (default: PDF_WORKERS)
+    Returns:
+        List of (page text, seconds) in page order
+    """
+    if _in_worker_process():
+        return _extract_pdf_page_range(file_path, 0, page_count)
+
+    workers = max(1, min(max_workers or PDF_WORKERS, page_count))
+    with _pdf_worker_path(file_path) as path:
+        results = _run_on_pdf_pool(_extract_pdf_page_range,
+                                   [(path, start, end) for start, end in _ranges(page_count, workers)])
+    return [page for pages in results for page in pages]
+
+
+def ocr_pdf_pages(file_path, page_numbers, dpi=None, max_workers=None):
+    """
+    OCR image-only PDF pages in parallel worker processes
+    Args:
+        file_path: Path to PDF file (or bytes / binary file-like)
+        page_numbers: 0-based pages to rasterize and OCR
+        dpi: Rasterization resolution (default: PDF_OCR_DPI)
+        max_workers: Worker processes (default: PDF_WORKERS)
+    Returns:
+        Dict page_number -> (text, seconds)
+    """
+    dpi = dpi or PDF_OCR_DPI
+    if not page_numbers:
+        return {}
+
+    workers = max(1, min(max_workers or PDF_WORKERS, len(page_numbers)))
+    if workers == 1 or _in_worker_process():
+        results = _ocr_pdf_pages(file_path, page_numbers, dpi)
+    else:
+        with _pdf_worker_path(file_path) as path:
+            chunks = _run_on_pdf_pool(_ocr_pdf_pages, [(path, page_numbers[start:end], dpi)
+                                                       for start, end in _ranges(len(page_numbers), workers)])
+        results = [item for chunk in chunks for item in chunk]
+    return {number: (text, seconds) for number, text, seconds in results}
+
+
+def extract_pdf_report(file_path, parallel=None, ocr=None):
+    """
+    Extract a PDF page by page, OCRing pages that have no text layer
+    Args:
+        file_path: Path to PDF file (or bytes / binary file-like)
+        parallel: True/False forces page-parallel extraction on/off;
+                  None uses it for PDFs with PDF_PARALLEL_MIN_PAGES+ pages
+        ocr: True/False forces OCR of image-only pages on/off;
+             None follows PDF_OCR
+    Returns:
+        Dict with text, pages (per-page method / chars / seconds),
+        ocr_pages and total_seconds
+    """
+    start = time.perf_counter()
+    if ocr is None:
+        ocr = PDF_OCR
+
+    with pdfplumber.open(_open_source(file_path)) as pdf:
+        page_count = len(pdf.pages)
+        if parallel is None:
+            parallel = page_count >= PDF_PARALLEL_MIN_PAGES and PDF_WORKERS > 1 and not _in_worker_process()
+        if not parallel:
+            page_results = []
+            for page in pdf.pages:
+                page_start = time.perf_counter()
+                page_text = page.extract_text() or ''
+                page_results.append((page_text, time.perf_counter() - page_start))
+
+    # In-memory input is spilled to disk once for both parallel passes
+    with _pdf_worker_path(file_path) if parallel else nullcontext(file_path) as source:
+        if parallel:
+            page_results = extract_text_from_pdf_parallel(source, page_count)
+
+        pages = [{'page': number + 1, 'method': 'text', 'chars': len(page_text), 'seconds': round(seconds, 3),
+                  'text': page_text}
+                 for number, (page_text, seconds) in enumerate(page_results)]
+
+        # Pages without a text layer are usually scans: rasterize and OCR only those
+        image_only = [number for number, page in enumerate(pages) if not page['text'].strip()]
+        if ocr and image_only:
+            for number, (page_text, seconds) in ocr_pdf_pages(source, image_only).items():
+                pages[number].update(method='ocr', text=page_text, chars=len(page_text),
+                                     seconds=round(pages[number]['seconds'] + seconds, 3))
+
+    text = '\n'.join(page['text'] for page in pages if page['text'])
+    for page in pages:
+        del page['text']
+        if page['method'] == 'text' and not page['chars']:
+            page['method'] = 'empty'
+
+    ocr_pages = [page for page in pages if page['method'] == 'ocr']
+    if ocr_pages:
+        slowest = max(ocr_pages, key=lambda page: page['seconds'])
+        print(f"✓ OCR'd {len(ocr_pages)} image-only PDF pages at {PDF_OCR_DPI} DPI "
+              f"(slowest: page {slowest['page']}, {slowest['seconds']:.2f}s)")
+
+    return {
+        'text': text,
+        'pages': pages,
+        'ocr_pages': len(ocr_pages),
+        'total_seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def extract_text_from_pdf(file_path, parallel=None, ocr=None):
+    """
+    Extract text from PDF using pdfplumber (OCR for image-only pages)
+    Args:
+        file_path: Path to PDF file (or bytes / binary file-like)
+        parallel: True/False forces page-parallel extraction on/off;
+                  None uses it for PDFs with PDF_PARALLEL_MIN_PAGES+ pages
+        ocr: True/False forces OCR of image-only pages on/off;
+             None follows PDF_OCR
     Returns:
         Extracted text as string
     """
-    text_parts = []
     try:
-        with pdfplumber.open(file_path) as pdf:
+        return extract_pdf_report(file_path, parallel, ocr)['text']
+    except Exception as e:
+        raise Exception(f"PDF extraction error: {str(e)}")
+
+
+def iter_text_from_pdf(file_path):
+    """
+    Yield the text of each page in order, as soon as it is extracted
+    (image-only pages are OCR'd inline when PDF_OCR is on; pages without
+    text are skipped). Each page's parsed objects are released after use,
+    so memory does not grow with the document.
+    Args:
+        file_path: Path to PDF file (or bytes / binary file-like)
+    """
+    try:
+        with pdfplumber.open(_open_source(file_path)) as pdf:
             for page in pdf.pages:
                 page_text = page.extract_text()
+                if PDF_OCR and not (page_text or '').strip():
+                    page_text = ocr_image(page.to_image(resolution=PDF_OCR_DPI).original)
+                if hasattr(page, 'close'):
+                    page.close()
                 if page_text:
-                    text_parts.append(page_text)
-        return '\n'.join(text_parts)
+                    yield page_text
     except Exception as e:
         raise Exception(f"PDF extraction error: {str(e)}")
 
 
-def extract_text_from_docx(file_path):
+def _docx_main_part(archive):
+    """Name of the main document part (word/document.xml unless _rels/.rels says otherwise)"""
+    try:
+        rels = ET.fromstring(archive.read('_rels/.rels'))
+    except (KeyError, ET.ParseError):
+        return 'word/document.xml'
+    for rel in rels:
+        if rel.get('Type') == _OFFICE_DOCUMENT_REL and rel.get('Target'):
+            return posixpath.normpath(rel.get('Target').lstrip('/'))
+    return 'word/document.xml'
+
+
+def _docx_paragraph_text(paragraph):
+    """Text of a w:p element, matching python-docx (tabs and breaks kept)"""
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == _W + 't':
+            parts.append(node.text or '')
+        elif node.tag == _W + 'tab':
+            parts.append('\t')
+        elif node.tag in (_W + 'br', _W + 'cr'):
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def iter_text_from_docx(file_path):
     """
-    Extract text from Word document using python-docx
+    Stream the text of a Word document: paragraphs, table cells and text
+    boxes (read once, skipping their mc:Fallback copy) are yielded in
+    document order while word/document.xml is parsed incrementally from
+    the zip, and each finished element is discarded, so memory stays
+    bounded whatever the document size.
     Args:
-        file_path: Path to DOCX file
-    Returns:
-        Extracted text as string
+        file_path: Path to DOCX file (or bytes / binary file-like)
     """
     try:
-        doc = Document(file_path)
-        paragraphs = [paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()]
-        return '\n'.join(paragraphs)
+        with zipfile.ZipFile(_open_source(file_path)) as archive:
+            with archive.open(_docx_main_part(archive)) as xml:
+                open_elements = []
+                cells = []                   # text collected per open table cell (tables nest)
+                fallbacks = 0                # open mc:Fallback elements; their text is a duplicate
+                for event, elem in ET.iterparse(xml, events=('start', 'end')):
+                    if event == 'start':
+                        open_elements.append(elem)
+                        if elem.tag == _MC_FALLBACK:
+                            fallbacks += 1
+                        elif elem.tag == _W + 'tc' and not fallbacks:
+                            cells.append([])
+                        continue
+
+                    open_elements.pop()
+                    if elem.tag == _MC_FALLBACK:
+                        fallbacks -= 1
+                        # Drop the duplicate so the enclosing paragraph does not read it either
+                        elem.clear()
+                    elif fallbacks:
+                        pass                 # inside a fallback: only detach (below)
+                    elif elem.tag == _W + 'p':
+                        paragraph_text = _docx_paragraph_text(elem)
+                        if paragraph_text.strip():
+                            if cells:
+                                cells[-1].append(paragraph_text)
+                            else:
+                                yield paragraph_text
+                    elif elem.tag == _W + 'tc':
+                        cell_text = '\n'.join(cells.pop())
+                        if cell_text:
+                            if cells:
+                                cells[-1].append(cell_text)
+                            else:
+                                yield cell_text
+                    if elem.tag in _DOCX_BLOCKS and open_elements:
+                        # Finished block: detach it so the parsed tree never grows
+                        open_elements[-1].remove(elem)
     except Exception as e:
         raise Exception(f"DOCX extraction error: {str(e)}")
 
 
+def extract_text_from_docx(file_path):
+    """
+    Extract text (paragraphs and table cells) from a Word document
+    Args:
+        file_path: Path to DOCX file (or bytes / binary file-like)
+    Returns:
+        Extracted text as string
+    """
+    return '\n'.join(iter_text_from_docx(file_path))
+
+
+def ocr_image(img):
+    """OCR a PIL image with pytesseract (shared by image uploads and scanned PDF pages)"""
+    return pytesseract.image_to_string(img)
+
+
 def extract_text_from_image(file_path):
     """
     Extract text from image using pytesseract OCR
     Args:
-        file_path: Path to image file
+        file_path: Path to image file (or bytes / binary file-like)
     Returns:
         Extracted text as string
     """
     try:
-        img = Image.open(file_path)
-        # Use pytesseract for OCR
-        text = pytesseract.image_to_string(img)
-        return text
+        img = Image.open(_open_source(file_path))
+        return ocr_image(img)
     except Exception as e:
         raise Exception(f"OCR extraction error: {str(e)}")
 
 
+def iter_text_from_txt(file_path, chunk_bytes=None):
+    """
+    Read a text file TXT_CHUNK_BYTES at a time and yield decoded text.
+    Decoding is incremental, so a multibyte UTF-8 character split across
+    two reads is decoded whole; invalid bytes become U+FFFD.
+    Args:
+        file_path: Path to TXT file (or bytes / binary file-like)
+        chunk_bytes: Read size (default: TXT_CHUNK_BYTES)
+    """
+    chunk_bytes = chunk_bytes or TXT_CHUNK_BYTES
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    try:
+        source = _open_source(file_path)
+        f = source if hasattr(source, 'read') else open(source, 'rb')
+        try:
+            for block in iter(lambda: f.read(chunk_bytes), b''):
+                text = decoder.decode(block)
+                if text:
+                    yield text
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+        finally:
+            if f is not source:
+                f.close()
+    except Exception as e:
+        raise Exception(f"TXT file read error: {str(e)}")
+
+
 def extract_text_from_txt(file_path):
     """
     Extract text from plain text file
     Args:
-        file_path: Path to TXT file
+        file_path: Path to TXT file (or bytes / binary file-like)
     Returns:
         File contents as string
     """
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            return f.read()
-    except Exception as e:
-        raise Exception(f"TXT file read error: {str(e)}")
+    return ''.join(iter_text_from_txt(file_path))
 
 
-def extract_text_from_file(file_path):
+def extract_text_from_file(file_path, filename=None):
     """
     Main extraction function - detects file type and extracts text
     Args:
-        file_path: Path to file
+        file_path: Path to file, or its contents as bytes / binary file-like
+        filename: Name used to detect the type when file_path is not a path
     Returns:
         Extracted text as string
     """
-    filename_lower = file_path.lower()
+    if filename is None:
+        filename = file_path if isinstance(file_path, (str, os.PathLike)) else getattr(file_path, 'name', None)
+    if not isinstance(filename, (str, os.PathLike)):
+        raise Exception("A filename is required to extract from in-memory data")
+    filename_lower = os.fspath(filename).lower()
 
     # PDF files
     if filename_lower.endswith('.pdf'):
@@ -110,7 +482,58 @@ def extract_text_from_file(file_path):
         try:
             return extract_text_from_txt(file_path)
         except:
-            raise Exception(f"Unsupported file type: {os.path.splitext(file_path)[1]}")
+            raise Exception(f"Unsupported file type: {os.path.splitext(filename_lower)[1]}")
+
+
+def iter_text_from_file(file_path, filename=None):
+    """
+    Incremental counterpart of extract_text_from_file: PDFs are yielded
+    page by page, DOCX in groups of paragraphs of about DOCX_PIECE_CHARS,
+    TXT as already-cleaned pieces of about TXT_PIECE_CHARS (read and
+    cleaned chunk by chunk), other formats as a single piece
+    """
+    if filename is None and isinstance(file_path, (str, os.PathLike)):
+        filename = file_path
+    name = os.fspath(filename).lower() if filename is not None else ''
+    if name.endswith('.pdf'):
+        yield from iter_text_from_pdf(file_path)
+    elif name.endswith('.docx'):
+        yield from _group_pieces(iter_text_from_docx(file_path), DOCX_PIECE_CHARS)
+    elif name.endswith('.txt'):
+        yield from iter_clean_text(iter_text_from_txt(file_path))
+    else:
+        yield extract_text_from_file(file_path, filename)
+
+
+def _group_pieces(pieces, max_chars):
+    """Join consecutive small pieces with newlines until about max_chars"""
+    group, size = [], 0
+    for piece in pieces:
+        group.append(piece)
+        size += len(piece) + 1
+        if size >= max_chars:
+            yield '\n'.join(group)
+            group, size = [], 0
+    if group:
+        yield '\n'.join(group)
+
+
+# clean_text() passes, compiled once. Each is a single C-level scan, and
+# returns its input unchanged (no copy) when it finds nothing to do.
+_BLANK_RUN_RE = re.compile(r'\n\s*\n+')
+# C0/C1 controls except tab and newline are deleted; lone surrogates (not
+# encodable as UTF-8) become '?'
+_SCRUB_RE = re.compile('[\x00-\x08\x0b-\x1f\x7f-\x9f\ud800-\udfff]')
+# Runs of spaces/tabs other than a lone space, which would map to itself
+_SPACE_RUN_RE = re.compile(r'\t[ \t]*| [ \t]+')
+
+
+def _scrub_char(match):
+    return '?' if match.group() >= '\ud800' else ''
+
+
+def _scrub(text):
+    return _SCRUB_RE.sub(_scrub_char, text)
 
 
 def clean_text(text):
@@ -128,28 +551,81 @@ def clean_text(text):
         return ""
 
     # Normalize line endings (Windows/Mac/Unix)
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
 
-    # Remove excessive blank lines (more than 2 consecutive newlines)
-    text = re.sub(r'\n\s*\n+', '\n\n', text)
+    # Collapse runs of blank lines into one empty line
+    text = _BLANK_RUN_RE.sub('\n\n', text)
 
-    # Remove control characters except newlines and tabs
-    text = re.sub(r'[\x00-\x08\x0b-\x1f\x7f-\x9f]', '', text)
+    # Remove control characters (except newlines and tabs); make the text encodable as UTF-8
+    text = _scrub(text)
 
-    # Remove excessive whitespace while preserving single spaces
-    text = re.sub(r'[ \t]+', ' ', text)
+    # Collapse spaces/tabs, then strip every line and the text as a whole
+    text = _SPACE_RUN_RE.sub(' ', text)
+    return '\n'.join(map(str.strip, text.split('\n'))).strip()
 
-    # Remove leading/trailing whitespace from each line
-    lines = [line.strip() for line in text.split('\n')]
-    text = '\n'.join(lines)
 
-    # Final strip
-    text = text.strip()
+def _clean_line(line):
+    """clean_text() applied to a single line that is not blank"""
+    return _SPACE_RUN_RE.sub(' ', _scrub(line)).strip()
 
-    # Ensure UTF-8 encoding
-    try:
-        text = text.encode('utf-8', errors='replace').decode('utf-8')
-    except:
-        pass
 
-    return text
\ No newline at end of file
+def iter_clean_text(chunks, piece_chars=None):
+    """
+    Streaming clean_text(): consumes text in arbitrary chunks and yields
+    cleaned pieces of about piece_chars, ending on line boundaries.
+    Joining the pieces with newlines gives exactly clean_text() of the
+    concatenated chunks, while only one chunk plus one piece is held.
+
+    Args:
+        chunks: Iterable of text chunks (e.g. iter_text_from_txt())
+        piece_chars: Target piece size (default: TXT_PIECE_CHARS)
+    """
+    piece_chars = piece_chars or TXT_PIECE_CHARS
+    piece, size = [], 0
+    started = False          # a non-empty line has been emitted (leading empties are dropped)
+    pending_empty = 0        # empty lines held back until a non-empty one follows (trailing are dropped)
+    in_blank_run = False     # a run of whitespace-only lines collapses to one empty line
+    carry = ''               # incomplete last line of the previous chunk
+
+    def lines_of(text):
+        return text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+    def feed(lines):
+        nonlocal started, pending_empty, in_blank_run, size
+        for line in lines:
+            if not line.strip():
+                if not in_blank_run and started:
+                    pending_empty += 1
+                in_blank_run = True
+                continue
+            in_blank_run = False
+            line = _clean_line(line)
+            if not line:
+                # Only control characters: an empty line that is not collapsed
+                if started:
+                    pending_empty += 1
+                continue
+            if pending_empty:
+                piece.extend([''] * pending_empty)
+                size += pending_empty
+                pending_empty = 0
+            piece.append(line)
+            size += len(line) + 1
+            started = True
+            if size >= piece_chars:
+                yield '\n'.join(piece)
+                piece.clear()
+                size = 0
+
+    for chunk in chunks:
+        text = carry + chunk
+        # A trailing '\r' may be the first half of a '\r\n' split across chunks
+        held = text.endswith('\r')
+        lines = lines_of(text[:-1] if held else text)
+        carry = lines.pop() + ('\r' if held else '')
+        yield from feed(lines)
+
+    yield from feed(lines_of(carry))
+    if piece:
+        yield '\n'.join(piece)
@@ -0,0 +1,208 @@
+"""
+Output Janitor - background retention for generated audio
+Expires files that haven't been accessed for a TTL and keeps the output
+folder under a disk quota, scanning in small batches on a daemon thread so
+no request ever pays for cleanup.
+"""
+
+import os
+import time
+import threading
+
+
+class OutputJanitor:
+    """
+    Incremental TTL + quota sweeper for OUTPUT_FOLDER.
+
+    - last access is max(file mtime, the latest touch() from serve_audio),
+      so audio that is still being played stays alive
+    - files accessed within min_age_seconds are never removed, not even
+      to meet the quota (in-flight writes and current playback)
+    - each sweep walks the folder with os.scandir in batches of
+      batch_size entries and sleeps briefly between batches
+    - directories (the audio cache, batch state) and protected names are
+      never touched
+    - the quota counts each inode once, and not at all when it is also
+      linked from outside the folder (outputs hard-linked from the audio
+      cache share its blocks, so removing them would free nothing)
+    """
+
+    def __init__(self, folder, ttl_seconds=24 * 3600, max_bytes=2 * 1024 ** 3, interval_seconds=60,
+                 batch_size=500, batch_pause=0.01, min_age_seconds=300, protected=('speaker_reference.wav',)):
+        self.folder = folder
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_bytes = int(max_bytes)
+        self.interval_seconds = float(interval_seconds)
+        self.batch_size = max(1, int(batch_size))
+        self.batch_pause = float(batch_pause)
+        self.min_age_seconds = float(min_age_seconds)
+        self.protected = set(protected)
+
+        self._lock = threading.Lock()
+        self._last_access = {}           # filename -> last touch() time
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._stats = {
+            'sweeps': 0,
+            'files_removed': 0,
+            'bytes_reclaimed': 0,
+            'expired': 0,
+            'evicted_for_quota': 0,
+            'errors': 0,
+            'files': 0,
+            'bytes_in_use': 0,
+            'last_sweep_at': None,
+            'last_sweep_seconds': None,
+        }
+
+    # ========================================
+    # PUBLIC API
+    # ========================================
+
+    def start(self):
+        """Start the sweeper thread (idempotent)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='output-janitor', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def touch(self, filename):
+        """Record an access so the file's TTL restarts"""
+        with self._lock:
+            self._last_access[filename] = time.time()
+
+    def trigger(self):
+        """Ask for a sweep now without waiting for it"""
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'ttl_seconds': self.ttl_seconds, 'max_bytes': self.max_bytes,
+                    'running': self._thread is not None and self._thread.is_alive()}
+
+    def sweep(self):
+        """One full pass: expire by TTL, then evict least recently used files over quota"""
+        start = time.time()
+        removed = {'files': 0, 'bytes': 0, 'expired': 0, 'quota': 0, 'errors': 0}
+        survivors = []                   # names still present
+        inodes = {}                      # inode -> [last_access, size, links, [names]]
+
+        for batch in self._scan_batches():
+            now = time.time()
+            with self._lock:
+                touched = {name: self._last_access.get(name) for _, name, _, _, _, _ in batch}
+            for path, name, size, mtime, inode, links in batch:
+                last_access = max(mtime, touched[name] or 0)
+                if now - last_access > self.ttl_seconds:
+                    # Only the last link actually frees the blocks
+                    self._remove(path, name, size if links <= 1 else 0, removed, 'expired')
+                    continue
+                survivors.append(name)
+                entry = inodes.setdefault(inode, [last_access, size, links, []])
+                entry[0] = max(entry[0], last_access)
+                entry[3].append(name)
+            self._pause()
+
+        # Quota: unshared inodes only, least recently used first, in batches
+        owned = sorted((last_access, size, names) for last_access, size, links, names in inodes.values()
+                       if links <= len(names))
+        in_use = sum(size for _, size, _ in owned)
+        if in_use > self.max_bytes:
+            cutoff = time.time() - self.min_age_seconds
+            for index, (last_access, size, names) in enumerate(owned):
+                if in_use <= self.max_bytes or last_access > cutoff:
+                    break
+                # Every name of the inode goes; its blocks are freed with the last one
+                gone = [self._remove(os.path.join(self.folder, name), name, size if i == len(names) - 1 else 0,
+                                     removed, 'quota')
+                        for i, name in enumerate(names)]
+                if all(gone):
+                    in_use -= size
+                if (index + 1) % self.batch_size == 0:
+                    self._pause()
+
+        elapsed = time.time() - start
+        with self._lock:
+            # Forget touches for files that no longer exist
+            present = set(survivors)
+            self._last_access = {name: ts for name, ts in self._last_access.items() if name in present}
+            self._stats['sweeps'] += 1
+            self._stats['files_removed'] += removed['files']
+            self._stats['bytes_reclaimed'] += removed['bytes']
+            self._stats['expired'] += removed['expired']
+            self._stats['evicted_for_quota'] += removed['quota']
+            self._stats['errors'] += removed['errors']
+            self._stats['files'] = len(survivors) - removed['quota']
+            self._stats['bytes_in_use'] = in_use
+            self._stats['last_sweep_at'] = start
+            self._stats['last_sweep_seconds'] = round(elapsed, 3)
+
+        if removed['files']:
+            print(f"🧹 Janitor removed {removed['files']} files "
+                  f"({removed['bytes'] / 1024 / 1024:.1f} MB) in {elapsed:.2f}s")
+        return removed
+
+    # ========================================
+    # INTERNALS
+    # ========================================
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠ Janitor sweep failed: {e}")
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+
+    def _scan_batches(self):
+        """
+        Yield lists of (path, name, size, mtime, inode, links) for regular
+        files, batch_size at a time. inode is the file's path where the
+        platform reports no inode numbers.
+        """
+        batch = []
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.name in self.protected:
+                        continue
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    inode = (stat.st_dev, stat.st_ino) if stat.st_ino else entry.path
+                    batch.append((entry.path, entry.name, stat.st_size, stat.st_mtime, inode,
+                                  stat.st_nlink or 1))
+                    if len(batch) >= self.batch_size:
+                        yield batch
+                        batch = []
+        except FileNotFoundError:
+            return
+        if batch:
+            yield batch
+
+    def _remove(self, path, name, size, removed, reason):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            removed['errors'] += 1
+            return False
+        removed['files'] += 1
+        removed['bytes'] += size
+        removed['expired' if reason == 'expired' else 'quota'] += 1
+        return True
+
+    def _pause(self):
+        if self.batch_pause > 0:
+            time.sleep(self.batch_pause)
@@ -0,0 +1,167 @@
+"""
+Background Job Manager for long documents
+Runs the document-to-speech pipeline on a bounded executor so web threads
+return immediately; clients poll (or long-poll) for progress.
+"""
+
+import os
+import time
+import uuid
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from services.pipeline import run_pipeline
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting"""
+
+
+class JobManager:
+    """
+    Tracks job state in memory and runs jobs on a thread pool.
+    Finished jobs are forgotten after retention_seconds. With an admission
+    controller, queued jobs count towards the same synthesis backlog as
+    /process and /stream.
+    """
+
+    def __init__(self, output_folder, max_workers=2, max_pending=100, retention_seconds=3600, admission=None):
+        self.output_folder = output_folder
+        self.admission = admission
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='tts-job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._events = {}
+
+    def submit(self, text_input='', file_path=None, language='auto', tts_engine='gtts', voice_quality='high',
+               output_format=None, file_data=None, filename=None, estimated_chars=None):
+        """
+        Queue a pipeline run; returns the job id.
+        file_path (if any) is owned by the job and removed when it finishes.
+        Small uploads may instead be passed in memory as file_data + filename.
+        output_format is recorded for the client-facing URL (see /jobs/<id>).
+        estimated_chars is the text length used for admission (default: text_input).
+        Raises JobQueueFull, or AdmissionRejected when the backlog is over budget.
+        """
+        self._prune()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running'))
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending")
+
+        ticket = None
+        if self.admission is not None:
+            chars = len(text_input) if estimated_chars is None else estimated_chars
+            ticket = self.admission.admit(tts_engine, chars)
+
+        with self._lock:
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': 'queued',
+                'stage': 'queued',
+                'percent': 0,
+                'chunks_done': 0,
+                'chunks_total': None,
+                'language': language,
+                'tts_engine': tts_engine,
+                'voice_quality': voice_quality,
+                'output_format': output_format,
+                'output_filename': None,
+                'error': None,
+                'created_at': now,
+                'updated_at': now,
+                'finished_at': None,
+            }
+            self._events[job_id] = threading.Event()
+
+        try:
+            self._executor.submit(self._run, job_id, text_input, file_path, language, tts_engine, voice_quality,
+                                  file_data, filename, ticket)
+        except Exception:
+            if ticket is not None:
+                ticket.release(succeeded=False)
+            raise
+        return job_id
+
+    def get(self, job_id):
+        """Copy of a job's state, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id, timeout):
+        """Block until the job finishes or timeout elapses; returns its state"""
+        with self._lock:
+            event = self._events.get(job_id)
+        if event is not None and timeout > 0:
+            event.wait(timeout)
+        return self.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        return counts
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(changes)
+                job['updated_at'] = time.time()
+
+    def _run(self, job_id, text_input, file_path, language, tts_engine, voice_quality, file_data=None,
+             filename=None, ticket=None):
+        start = time.time()
+        self._update(job_id, status='running', stage='starting')
+
+        def progress(stage, percent, chunks_done=None, chunks_total=None):
+            changes = {'stage': stage, 'percent': round(percent, 1)}
+            if chunks_total is not None:
+                changes.update(chunks_done=chunks_done, chunks_total=chunks_total)
+            self._update(job_id, **changes)
+
+        try:
+            # The ticket waits for a synthesis slot shared with the web routes
+            with ticket if ticket is not None else nullcontext():
+                result = run_pipeline(self.output_folder, text_input, file_path, language,
+                                      tts_engine, voice_quality, progress=progress,
+                                      file_data=file_data, filename=filename)
+                if ticket is not None:
+                    ticket.refine(len(result['preprocessed_text']))
+            self._update(job_id, status='done', stage='done', percent=100,
+                         output_filename=result['output_filename'], language=result['language'],
+                         char_count=len(result['preprocessed_text']),
+                         word_count=len(result['preprocessed_text'].split()),
+                         finished_at=time.time(), elapsed_seconds=round(time.time() - start, 2))
+            print(f"✓ Job {job_id[:8]} done in {time.time() - start:.2f}s")
+        except Exception as e:
+            self._update(job_id, status='failed', error=str(e), finished_at=time.time(),
+                         elapsed_seconds=round(time.time() - start, 2))
+            print(f"✗ Job {job_id[:8]} failed: {e}")
+        finally:
+            if file_path:
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
+            with self._lock:
+                event = self._events.get(job_id)
+            if event is not None:
+                event.set()
+
+    def _prune(self):
+        """Drop finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] and job['finished_at'] < cutoff]
+            for job_id in expired:
+                self._jobs.pop(job_id, None)
+                self._events.pop(job_id, None)
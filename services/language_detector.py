@@ -5,6 +5,7 @@ Detects language and preprocesses text for TTS
 
 from langdetect import detect, LangDetectException
 import re
+from services.text_normalizer import get_normalizer
 
 
 def detect_language(text):
@@ -43,6 +44,7 @@ def detect_language(text):
 def preprocess_text(text, language='en'):
     """
     Preprocess text for TTS generation
+    - Normalize for speech (see normalize_text_for_tts)
     - Remove unwanted characters based on language
     - Normalize spacing
     - Split long paragraphs if needed
@@ -59,6 +61,10 @@ def preprocess_text(text, language='en'):
     # Keep original text structure for better TTS
     # Don't convert to lowercase - TTS works better with proper casing
 
+    # Spell out amounts, percentages, dates and abbreviations while the
+    # symbols they depend on ($, %, €, ...) are still there
+    text = normalize_text_for_tts(text, language)
+
     if language == 'ur':
         # For Urdu: Keep Urdu characters, punctuation, and numbers
         # Remove Latin characters if mixed content
@@ -115,35 +121,58 @@ def split_text_into_chunks(text, max_chunk_size=500):
     return chunks
 
 
-def normalize_text_for_tts(text, language='en'):
+def split_text_into_sentences(text, max_sentence_length=300):
     """
-    Additional normalization specifically for TTS quality
+    Split text at sentence boundaries for per-sentence synthesis
+    Sentences longer than max_sentence_length are packed word by word
+    into several units so the model never sees an over-long input
+
     Args:
         text: Input text
-        language: Language code
+        max_sentence_length: Maximum characters per sentence unit
     Returns:
-        TTS-optimized text
+        List of sentence strings (in document order)
     """
-    # Expand common abbreviations for better pronunciation
-    abbreviations = {
-        'Mr.': 'Mister',
-        'Mrs.': 'Misses',
-        'Dr.': 'Doctor',
-        'etc.': 'etcetera',
-        'e.g.': 'for example',
-        'i.e.': 'that is',
-    }
+    if not text or not text.strip():
+        return []
+
+    units = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_sentence_length:
+            units.append(sentence)
+            continue
+
+        # Over-long sentence: pack words up to the limit
+        current = ""
+        for piece in sentence.split():
+            if current and len(current) + 1 + len(piece) > max_sentence_length:
+                units.append(current)
+                current = piece
+            else:
+                current = current + " " + piece if current else piece
+        if current:
+            units.append(current)
+
+    return units
 
-    for abbr, full in abbreviations.items():
-        text = text.replace(abbr, full)
 
-    # Remove URLs (they don't speak well)
-    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-
-    # Remove email addresses
-    text = re.sub(r'\S+@\S+', '', text)
+def normalize_text_for_tts(text, language='en'):
+    """
+    Additional normalization specifically for TTS quality
+    - Expand abbreviations, drop URLs and email addresses
+    - Spell out numbers, dates, currency amounts and percentages
 
-    # Normalize numbers (optional - comment out if you want numbers as-is)
-    # text = re.sub(r'\b\d+\b', lambda m: num2words(int(m.group())), text)
+    Rules come from services.text_normalizer.NORMALIZATION_RULES and are
+    compiled once per language; languages without rules only lose URLs and
+    email addresses (their numbers are left as digits).
 
-    return text.strip()
\ No newline at end of file
+    Args:
+        text: Input text
+        language: Language code
+    Returns:
+        TTS-optimized text
+    """
+    return get_normalizer(language).normalize(text)
@@ -0,0 +1,276 @@
+"""
+Model Worker Pool - persistent pre-loaded Tacotron2 worker processes
+Each worker loads the model once and serves synthesis jobs from a shared
+queue, so concurrent requests use separate cores instead of contending on
+the GIL and a single model object. Crashed workers are respawned.
+"""
+
+import os
+import time
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future
+
+
+class WorkerCrashedError(Exception):
+    """Raised for a job whose worker process died while running it"""
+
+
+def _worker_main(slot, model_name, threads_per_worker, jobs, results, current_jobs, warmup_text=None):
+    """
+    Worker process entry point
+    Loads the model once (and runs warmup_text through it before reporting
+    ready), then runs (job_id, text) jobs until it gets None.
+    text may also be a list of sentences, answered with a list of arrays.
+    Each job id is written to current_jobs[slot] (shared memory) as soon as
+    the job is taken off the queue, so the parent knows which job to fail
+    if this process dies before its result arrives.
+    """
+    import sys
+    import warnings
+    import numpy as np
+    import torch
+    from services.batcher import synthesize_coqui_batch
+
+    warnings.filterwarnings('ignore')
+    torch.set_num_threads(threads_per_worker)
+
+    start = time.time()
+    try:
+        from TTS.api import TTS
+
+        # Coqui prints a lot while loading and synthesizing
+        sys.stdout = open(os.devnull, 'w')
+        tts = TTS(model_name=model_name, progress_bar=False)
+        if torch.cuda.is_available():
+            tts.to("cuda")
+        load_seconds = time.time() - start
+
+        # First inference in this process pays one-off allocation costs
+        start = time.time()
+        if warmup_text:
+            tts.tts(warmup_text)
+        warmup_seconds = time.time() - start
+    except Exception as e:
+        results.put(('failed', slot, os.getpid(), str(e)))
+        return
+
+    results.put(('ready', slot, os.getpid(), (load_seconds, warmup_seconds)))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+
+        job_id, text = job
+        current_jobs[slot] = job_id
+        try:
+            if isinstance(text, list):
+                wav = synthesize_coqui_batch(tts, text)
+            else:
+                wav = np.asarray(tts.tts(text), dtype=np.float32)
+            results.put(('done', slot, job_id, wav))
+        except Exception as e:
+            results.put(('error', slot, job_id, str(e)))
+
+
+class ModelWorkerPool:
+    """
+    Pool of N long-lived model worker processes fed through a job queue.
+    submit() returns a concurrent.futures.Future resolved with float32 samples.
+    """
+
+    def __init__(self, num_workers, model_name, monitor_interval=1.0, warmup_text=None):
+        self.num_workers = max(1, int(num_workers))
+        self.model_name = model_name
+        self.warmup_text = warmup_text
+        self.monitor_interval = monitor_interval
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // self.num_workers)
+
+        # spawn: never fork a web process that may already hold torch threads
+        self._ctx = multiprocessing.get_context('spawn')
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._futures = {}      # job_id -> Future
+        # Last job each worker slot took off the queue (0: none yet)
+        self._current_jobs = self._ctx.Array('q', self.num_workers, lock=False)
+        self._workers = [None] * self.num_workers
+        self._ready = [False] * self.num_workers
+        self._ready_changed = threading.Condition()
+        self._startup_seconds = [None] * self.num_workers   # (load, warm-up) per slot
+        self._load_errors = [None] * self.num_workers
+        self._spawned_at = [0.0] * self.num_workers
+        self._crash_streak = [0] * self.num_workers
+        self._restarts = 0
+        self._closed = False
+
+        for slot in range(self.num_workers):
+            self._spawn(slot)
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._monitor_workers, daemon=True)
+        self._monitor.start()
+
+        print(f"✓ Model worker pool started ({self.num_workers} processes, "
+              f"{self.threads_per_worker} threads each)")
+
+    def _spawn(self, slot):
+        self._current_jobs[slot] = 0
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(slot, self.model_name, self.threads_per_worker, self._jobs, self._results,
+                  self._current_jobs, self.warmup_text),
+            name=f"tts-worker-{slot}",
+            daemon=True
+        )
+        process.start()
+        self._workers[slot] = process
+        self._ready[slot] = False
+        self._spawned_at[slot] = time.time()
+
+    # ========================================
+    # PUBLIC API
+    # ========================================
+
+    def submit(self, text):
+        """Queue one synthesis job; returns a Future"""
+        if self._closed:
+            raise RuntimeError("Model worker pool is shut down")
+
+        future = Future()
+        with self._lock:
+            job_id = next(self._job_ids)
+            self._futures[job_id] = future
+        self._jobs.put((job_id, text))
+        return future
+
+    def submit_batch(self, texts):
+        """Queue several sentences as one job; the Future yields a list of arrays"""
+        return self.submit(list(texts))
+
+    def synthesize(self, text, timeout=None):
+        """Synthesize text in a worker process and return float32 samples"""
+        return self.submit(text).result(timeout=timeout)
+
+    def wait_ready(self, timeout=None):
+        """
+        Block until every worker has loaded and warmed up its own model.
+        Returns the (load_seconds, warmup_seconds) of each worker.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._ready_changed:
+            while not all(self._ready):
+                errors = [error for error in self._load_errors if error]
+                if errors:
+                    raise RuntimeError(f"Worker failed to load model: {errors[0]}")
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"{self.num_workers - sum(self._ready)} workers not ready "
+                                       f"after {timeout}s")
+                self._ready_changed.wait(remaining)
+            return list(self._startup_seconds)
+
+    def stats(self):
+        """Snapshot of worker state for health reporting"""
+        with self._lock:
+            running = sum(1 for job_id in self._current_jobs if job_id in self._futures)
+            return {
+                'workers': self.num_workers,
+                'alive': sum(1 for p in self._workers if p is not None and p.is_alive()),
+                'ready': sum(self._ready),
+                'restarts': self._restarts,
+                'queued_jobs': len(self._futures) - running,
+                'running_jobs': running,
+            }
+
+    def shutdown(self, timeout=5.0):
+        """Stop all workers; pending jobs fail"""
+        self._closed = True
+        for _ in self._workers:
+            self._jobs.put(None)
+        for process in self._workers:
+            if process is not None:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(RuntimeError("Model worker pool is shut down"))
+
+    # ========================================
+    # BACKGROUND THREADS
+    # ========================================
+
+    def _collect_results(self):
+        """Route worker messages to the matching Future"""
+        while not self._closed:
+            try:
+                kind, slot, key, payload = self._results.get(timeout=0.5)
+            except Exception:
+                continue
+
+            if kind == 'ready':
+                with self._ready_changed:
+                    self._ready[slot] = True
+                    self._startup_seconds[slot] = payload
+                    self._load_errors[slot] = None
+                    self._ready_changed.notify_all()
+                self._crash_streak[slot] = 0
+                print(f"✓ Worker {slot} ready (pid {key}, model loaded in {payload[0]:.1f}s, "
+                      f"warmed up in {payload[1]:.1f}s)")
+                continue
+            if kind == 'failed':
+                with self._ready_changed:
+                    self._load_errors[slot] = payload
+                    self._ready_changed.notify_all()
+                print(f"⚠ Worker {slot} failed to load model: {payload}")
+                continue
+
+            with self._lock:
+                future = self._futures.pop(key, None)
+
+            if future is None or future.done():
+                continue
+            if kind == 'done':
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"Worker synthesis error: {payload}"))
+
+    def _monitor_workers(self):
+        """Respawn dead workers and fail the jobs they were running"""
+        while not self._closed:
+            time.sleep(self.monitor_interval)
+            for slot, process in enumerate(self._workers):
+                if self._closed or process is None or process.is_alive():
+                    continue
+
+                # Back off if the worker keeps dying before it gets ready
+                # (e.g. the model cannot load) instead of spinning
+                if not self._ready[slot]:
+                    delay = min(60, 2 ** self._crash_streak[slot])
+                    if time.time() - self._spawned_at[slot] < delay:
+                        continue
+                    self._crash_streak[slot] += 1
+
+                # The job it took last is lost if no result came back for it,
+                # including one it died on before any message got out
+                with self._lock:
+                    job_id = self._current_jobs[slot]
+                    future = self._futures.pop(job_id, None) if job_id else None
+                    self._restarts += 1
+
+                if future is not None and not future.done():
+                    future.set_exception(WorkerCrashedError(
+                        f"Worker {slot} exited with code {process.exitcode}"))
+
+                print(f"⚠ Worker {slot} died (exit code {process.exitcode}), respawning...")
+                self._spawn(slot)
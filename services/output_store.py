@@ -0,0 +1,70 @@
+"""
+Content-addressed Output Store
+Generated audio is published as audio_<hash>.<ext>, named by a hash of
+its bytes: identical audio is stored once, and a name always refers to
+the same content, so it can be cached by browsers and CDNs forever.
+"""
+
+import os
+import re
+import hashlib
+from services.audio_formats import sniff_extension
+
+HASH_CHARS = 32
+READ_CHUNK = 1024 * 1024
+
+# audio_<hash>.<ext> or a transcoded variant audio_<hash>.<bitrate>k.<ext>
+_ADDRESSED_RE = re.compile(r'^audio_[0-9a-f]{%d}(?:\.\d+k)?\.(?:wav|mp3|ogg)$' % HASH_CHARS)
+
+
+def bytes_hash(data):
+    """Hex digest of in-memory audio, equal to content_hash() of a file holding it"""
+    return hashlib.blake2b(data, digest_size=HASH_CHARS // 2).hexdigest()
+
+
+def content_hash(path):
+    """Hex digest of a file's bytes (read in chunks)"""
+    digest = hashlib.blake2b(digest_size=HASH_CHARS // 2)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_CHUNK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def publish_output(temp_path, default_ext='mp3', digest=None):
+    """
+    Move a freshly synthesized file to its content-addressed name in the
+    same folder and return that file name. If the same audio was already
+    published, the new copy is dropped and the existing file reused.
+    digest is the file's content hash when already known (e.g. stored with
+    the cache entry it came from), so the file is not read again.
+    """
+    folder = os.path.dirname(temp_path)
+    ext = sniff_extension(temp_path) or default_ext
+    filename = f"audio_{digest or content_hash(temp_path)}.{ext}"
+    final_path = os.path.join(folder, filename)
+
+    # Retention goes by mtime: freshen an existing file, and a hard-linked
+    # cache hit, which shares the (old) mtime of its cache entry. A fresh
+    # file is safe from the janitor (TTL and min_age_seconds), so freshening
+    # first also tells us whether it is still there to reuse.
+    try:
+        os.utime(final_path)
+    except FileNotFoundError:
+        # New audio, or the janitor expired the earlier copy meanwhile
+        os.utime(temp_path)
+        os.replace(temp_path, final_path)
+    else:
+        os.remove(temp_path)
+        print(f"⚡ Duplicate audio, reusing {filename}")
+    return filename
+
+
+def immutable_etag(filename):
+    """
+    Strong ETag for a content-addressed file name, or None for other files.
+    Variants get their own tag, since their bytes differ from the original.
+    """
+    if not _ADDRESSED_RE.match(filename):
+        return None
+    return filename[len('audio_'):]
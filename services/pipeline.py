@@ -0,0 +1,195 @@
+"""
+Document-to-Speech Pipeline
+extract -> clean -> detect language -> preprocess -> synthesize,
+runnable outside a request (background jobs, batch tools), plus an
+incremental variant that feeds synthesis page by page
+"""
+
+import os
+import uuid
+import itertools
+from services.extractor import extract_text_from_file, iter_text_from_file, clean_text
+from services.language_detector import detect_language, preprocess_text
+from services.tts_service import TTSService
+from services.output_store import publish_output
+from services.prefetch import Prefetcher
+
+
+# Pages extracted ahead of cleaning / synthesis in the incremental pipeline
+PAGE_QUEUE_SIZE = int(os.getenv('PIPELINE_PAGE_QUEUE', 4))
+
+# Share of the progress bar given to each stage (synthesis gets the rest)
+STAGE_PERCENT = {
+    'extracting': 5,
+    'cleaning': 15,
+    'detecting_language': 20,
+    'preprocessing': 22,
+    'synthesizing': 25,
+    'done': 100,
+}
+
+
+def run_pipeline(output_folder, text_input='', file_path=None, language='auto',
+                 tts_engine='gtts', voice_quality='high', progress=None, file_data=None, filename=None):
+    """
+    Run the full pipeline and write one audio file to output_folder.
+    The whole text is extracted before synthesis: the file is stitched,
+    normalized and cached as a whole, so (unlike open_incremental_document)
+    memory grows with the document.
+
+    Args:
+        output_folder: Directory for the generated audio
+        text_input: Typed text (prepended to extracted text)
+        file_path: Optional uploaded document to extract (on disk)
+        language: Language code or 'auto'
+        tts_engine: coqui / gtts / elevenlabs / pyttsx3
+        voice_quality: Engine quality setting
+        progress: Optional callback(stage, percent, chunks_done, chunks_total)
+        file_data: Optional uploaded document held in memory (bytes)
+        filename: Original name of file_data, used to detect its type
+    Returns:
+        Dict with output_filename (content-addressed audio_<hash>.<ext>),
+        language, cleaned_text, preprocessed_text
+    """
+    def report(stage, percent=None, chunks_done=None, chunks_total=None):
+        if progress:
+            progress(stage, STAGE_PERCENT[stage] if percent is None else percent, chunks_done, chunks_total)
+
+    extracted_text = ''
+    if file_path or file_data is not None:
+        report('extracting')
+        source = file_data if file_data is not None else file_path
+        name = filename or file_path
+        extracted_text = extract_text_from_file(source, name)
+        print(f"✓ Extracted {len(extracted_text)} characters from {os.path.basename(name)}")
+
+    text_input = (text_input or '').strip()
+    if text_input:
+        final_text = text_input + ('\n\n' + extracted_text if extracted_text else '')
+    else:
+        final_text = extracted_text
+
+    if not final_text.strip():
+        raise ValueError("No text provided. Please enter text or upload a document.")
+
+    report('cleaning')
+    cleaned_text = clean_text(final_text)
+
+    if language == 'auto':
+        report('detecting_language')
+        language = detect_language(cleaned_text) or 'en'
+
+    report('preprocessing')
+    preprocessed_text = preprocess_text(cleaned_text, language)
+
+    synth_start = STAGE_PERCENT['synthesizing']
+    synth_span = STAGE_PERCENT['done'] - synth_start - 1
+
+    def on_chunk(done, total):
+        report('synthesizing', synth_start + synth_span * done / max(1, total), done, total)
+
+    report('synthesizing')
+    output_path = os.path.join(output_folder, f"speech_{uuid.uuid4().hex}.tmp")
+    tts_service = TTSService(output_folder=output_folder)
+    tts_service.save_speech(preprocessed_text, output_path, tts_engine, language, voice_quality,
+                            progress=on_chunk)
+    output_filename = publish_output(output_path, digest=tts_service.output_digest(output_path))
+
+    report('done')
+    return {
+        'output_filename': output_filename,
+        'language': language,
+        'cleaned_text': cleaned_text,
+        'preprocessed_text': preprocessed_text,
+    }
+
+
+def open_incremental_document(text_input='', file_path=None, language='auto', file_data=None, filename=None,
+                              queue_size=PAGE_QUEUE_SIZE):
+    """
+    Start the incremental pipeline: pages are extracted on a background
+    thread (at most queue_size ahead) and cleaned / preprocessed as they
+    are consumed. Blocks only until the first page with text is ready, so
+    the language can be detected from it.
+
+    Returns:
+        (language, iterator of preprocessed text pieces; close() it when abandoning)
+    Raises:
+        ValueError if the input has no text at all
+    """
+    pieces = []
+    text_input = (text_input or '').strip()
+    if text_input:
+        pieces.append(text_input)
+
+    pages = None
+    if file_path or file_data is not None:
+        source = file_data if file_data is not None else file_path
+        pages = Prefetcher(iter_text_from_file(source, filename or file_path), maxsize=queue_size,
+                           name='pipeline-pages')
+
+    def cleaned_pieces():
+        for piece in itertools.chain(pieces, pages if pages is not None else ()):
+            cleaned = clean_text(piece)
+            if cleaned:
+                yield cleaned
+
+    cleaned = cleaned_pieces()
+    first = next(cleaned, None)
+    if not first:
+        if pages is not None:
+            pages.close()
+        raise ValueError("No text provided. Please enter text or upload a document.")
+
+    if language == 'auto':
+        language = detect_language(first) or 'en'
+
+    def preprocessed_pieces():
+        for piece in itertools.chain([first], cleaned):
+            text = preprocess_text(piece, language)
+            if text:
+                yield text
+
+    preprocessed = preprocessed_pieces()
+
+    def stop():
+        if pages is not None:
+            pages.stop()
+
+    def close():
+        # Join the extraction thread first; the generators can only be
+        # closed once no thread is executing them
+        if pages is not None:
+            pages.close()
+        preprocessed.close()
+        cleaned.close()
+
+    return language, _ClosingIterator(preprocessed, stop, close)
+
+
+class _ClosingIterator:
+    """
+    Iterator that also owns the extraction thread, even if iteration never started.
+    stop() only signals that thread and is safe while another thread (e.g. a
+    sentence Prefetcher) is iterating: a consumer waiting for a page gets the
+    end of the document. close() stops and joins it and closes the generators;
+    call it once nothing is iterating any more.
+    """
+
+    def __init__(self, iterator, on_stop, on_close):
+        self._iterator = iterator
+        self._on_stop = on_stop
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def stop(self):
+        self._on_stop()
+
+    def close(self):
+        self._on_stop()
+        self._on_close()
@@ -0,0 +1,99 @@
+"""
+Bounded Prefetch
+Runs an iterator on a background thread and keeps at most maxsize items
+ready, so one pipeline stage can work ahead of the next without the
+whole document ever being held in memory.
+"""
+
+import time
+import queue
+import threading
+
+
+class Prefetcher:
+    """
+    Background-thread iterator with a bounded queue.
+
+    - iterating blocks for the next item; get(block=False) returns
+      Prefetcher.EMPTY when nothing is ready yet
+    - an exception raised by the source is re-raised to the consumer
+    - stop() asks the producer to stop early, from any thread; a consumer
+      waiting in get() wakes up with Prefetcher.DONE
+    - close() stops the producer and waits for its thread to exit, so the
+      source is no longer running when it returns
+    """
+
+    DONE = object()
+    EMPTY = object()
+
+    def __init__(self, iterable, maxsize=4, name='prefetch'):
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._stop = threading.Event()
+        self._error = None
+        self._finished = False
+        self._thread = threading.Thread(target=self._run, args=(iterable,), name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self, iterable):
+        source = iter(iterable)
+        try:
+            for item in source:
+                if not self._put(item):
+                    return
+        except Exception as e:
+            self._error = e
+        finally:
+            close = getattr(source, 'close', None)
+            if close:
+                close()
+            self._put(self.DONE)
+
+    def _put(self, item):
+        # Wake up periodically so close() can stop a producer stuck on a full queue
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, block=True, timeout=None):
+        """Next item, Prefetcher.DONE at the end (or once stopped), or Prefetcher.EMPTY if not ready"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._finished or self._stop.is_set():
+                self._finished = True
+                return self.DONE
+            # Wake up periodically so stop() releases a blocked consumer
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            try:
+                item = self._queue.get(block and wait > 0, max(0, wait))
+                break
+            except queue.Empty:
+                if not block or (deadline is not None and time.monotonic() >= deadline):
+                    return self.EMPTY
+        if item is self.DONE:
+            self._finished = True
+            if self._error is not None:
+                raise self._error
+        return item
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self.get()
+        if item is self.DONE:
+            raise StopIteration
+        return item
+
+    def stop(self):
+        """Ask the producer to stop, without waiting for it"""
+        self._stop.set()
+
+    def close(self, timeout=None):
+        """Stop the producer and join its thread (the source is no longer executing afterwards)"""
+        self._stop.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
@@ -0,0 +1,439 @@
+"""
+TTS Text Normalizer
+Rewrites text into speakable words in one regex pass: abbreviations are
+expanded, URLs and email addresses dropped, and numbers, dates, currency
+amounts and percentages spelled out. Everything is compiled once per
+language from NORMALIZATION_RULES; abbreviations are merged into a
+prefix trie, so adding thousands of them does not slow the scan down.
+"""
+
+import re
+
+try:
+    from num2words import num2words
+except ImportError:
+    num2words = None
+
+# language -> rules. English numbers are spelled by the built-in speller;
+# other languages need num2words (numbers are left as digits without it).
+# A number form without its rule (percent, minus, time, ...) is left as written.
+NORMALIZATION_RULES = {
+    'en': {
+        'abbreviations': {
+            'Mr.': 'Mister',
+            'Mrs.': 'Misses',
+            'Ms.': 'Miz',
+            'Dr.': 'Doctor',
+            'Prof.': 'Professor',
+            'St.': 'Saint',
+            'Jr.': 'Junior',
+            'Sr.': 'Senior',
+            'vs.': 'versus',
+            'approx.': 'approximately',
+            'etc.': 'etcetera',
+            'e.g.': 'for example',
+            'i.e.': 'that is',
+        },
+        # symbol -> (unit, units, subunit, subunits)
+        'currencies': {
+            '$': ('dollar', 'dollars', 'cent', 'cents'),
+            '£': ('pound', 'pounds', 'penny', 'pence'),
+            '€': ('euro', 'euros', 'cent', 'cents'),
+            '₹': ('rupee', 'rupees', 'paisa', 'paise'),
+        },
+        'and': 'and',
+        'percent': 'percent',
+        'minus': 'minus',
+        # on the hour, minutes below ten, other minutes
+        'time': ("{hour} o'clock", '{hour} oh {minute}', '{hour} {minute}'),
+        'months': ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+                   'August', 'September', 'October', 'November', 'December'),
+        'date': '{month} {day_ordinal}, {year}',
+        'ordinal_suffixes': ('st', 'nd', 'rd', 'th'),
+    },
+    'es': {
+        'abbreviations': {
+            'Sr.': 'Señor',
+            'Sra.': 'Señora',
+            'Srta.': 'Señorita',
+            'Dr.': 'Doctor',
+            'Dra.': 'Doctora',
+            'Ud.': 'usted',
+            'Uds.': 'ustedes',
+            'etc.': 'etcétera',
+            'p. ej.': 'por ejemplo',
+        },
+        'currencies': {
+            '$': ('dólar', 'dólares', 'centavo', 'centavos'),
+            '€': ('euro', 'euros', 'céntimo', 'céntimos'),
+        },
+        'and': 'con',
+        'percent': 'por ciento',
+        'minus': 'menos',
+        'months': ('enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio',
+                   'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'),
+        'date': '{day} de {month} de {year}',
+    },
+    'fr': {
+        'abbreviations': {
+            'M.': 'Monsieur',
+            'MM.': 'Messieurs',
+            'Mme': 'Madame',
+            'Mlle': 'Mademoiselle',
+            'Dr': 'Docteur',
+            'etc.': 'et cetera',
+            'p. ex.': 'par exemple',
+        },
+        'currencies': {
+            '€': ('euro', 'euros', 'centime', 'centimes'),
+            '$': ('dollar', 'dollars', 'cent', 'cents'),
+        },
+        'and': 'et',
+        'percent': 'pour cent',
+        'minus': 'moins',
+        'months': ('janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet',
+                   'août', 'septembre', 'octobre', 'novembre', 'décembre'),
+        'date': '{day} {month} {year}',
+    },
+    'ur': {
+        'abbreviations': {},
+        'percent': 'فیصد',
+        'minus': 'منفی',
+    },
+}
+
+# Digit strings longer than this (phone numbers, IDs) are read digit by digit
+MAX_SPELLED_DIGITS = 15
+
+# Every branch of the combined pattern starts with a literal or character
+# class, which lets the regex engine reject it from the first character
+# alone. Lookbehinds therefore come after that character: (?<!X.) means
+# "the character before the match is not X".
+_URL_PATTERN = r'[hw](?:(?<=h)ttps?://|(?<=w)ww\.)\S+'
+# Starts only at the beginning of a token, so long tokens are never rescanned
+_EMAIL_PATTERN = r'[^\s@](?<!\S.)[^\s@]*@\S+'
+# 1234 or 1,234,567 after its first digit. Digits are ASCII only: numbers
+# written in other scripts (Devanagari, Arabic-Indic) are left to the engine.
+_AMOUNT_TAIL = r'(?:[0-9]{0,2}(?:,[0-9]{3})+|[0-9]*)'
+# Numbers that are not part of a word, version string, clock time or longer
+# number. Hyphenated digit groups (phone numbers, ranges) are left to the engine.
+_DIGIT_START = r'[0-9](?<![\w.,].)(?<![0-9][-:].)'
+_NUMBER_HEAD = _DIGIT_START + _AMOUNT_TAIL + r'(?:\.[0-9]+)?'
+_NUMBER_END = r'(?![\w.,]?[0-9]|\w|[-:][0-9])'
+_NUMBER_PATTERN = _NUMBER_HEAD + _NUMBER_END
+_PERCENT_PATTERN = _NUMBER_HEAD + r'(?![\w.,]?[0-9]|[-:][0-9]) ?%'
+# A minus sign at the start of a token, followed by a number or percentage
+_MINUS_SIGN = r'-(?<!\S.)(?=[0-9])'
+_DATE_PATTERN = r'[0-9](?<![\w.,-].)[0-9]{3}-[0-9]{2}-[0-9]{2}(?![\w-])'
+# 9:05 or 10:30, but not 10:30:15 or 1:2
+_TIME_PATTERN = r'[0-9](?<![\w.,:].)[0-9]?:[0-5][0-9](?![\w:]|[.,][0-9])'
+_SCALE_WORDS = ('thousand', 'million', 'billion', 'trillion')
+
+
+# ========================================
+# ENGLISH NUMBER SPELLING
+# ========================================
+
+_ONES = ('zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+         'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen', 'seventeen', 'eighteen', 'nineteen')
+_TENS = ('', '', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety')
+_SCALES = ('', 'thousand', 'million', 'billion', 'trillion')
+_IRREGULAR_ORDINALS = {'one': 'first', 'two': 'second', 'three': 'third', 'five': 'fifth',
+                       'eight': 'eighth', 'nine': 'ninth', 'twelve': 'twelfth'}
+
+
+def _below_thousand(n):
+    words = []
+    hundreds, rest = divmod(n, 100)
+    if hundreds:
+        words.append(_ONES[hundreds] + ' hundred')
+    if rest >= 20:
+        tens, ones = divmod(rest, 10)
+        words.append(_TENS[tens] + ('-' + _ONES[ones] if ones else ''))
+    elif rest or not hundreds:
+        words.append(_ONES[rest])
+    return ' '.join(words)
+
+
+def spell_number(n):
+    """English cardinal: 1234 -> 'one thousand two hundred thirty-four'"""
+    if n < 0:
+        return 'minus ' + spell_number(-n)
+    if n >= 1000 ** len(_SCALES):
+        return spell_digits(str(n))
+    if n < 1000:
+        return _below_thousand(n)
+
+    words = []
+    for scale in reversed(range(len(_SCALES))):
+        group, n = divmod(n, 1000 ** scale)
+        if group:
+            words.append(_below_thousand(group) + (' ' + _SCALES[scale] if scale else ''))
+    return ' '.join(words)
+
+
+def spell_ordinal(n):
+    """English ordinal: 21 -> 'twenty-first'"""
+    words = spell_number(n)
+    # Only the last word changes: 'twenty-one' -> 'twenty-first'
+    head, sep, last = words.rpartition(' ')
+    if '-' in last:
+        tens, _, last = last.partition('-')
+        head, sep = head + sep + tens, '-'
+    if last in _IRREGULAR_ORDINALS:
+        last = _IRREGULAR_ORDINALS[last]
+    elif last.endswith('y'):
+        last = last[:-1] + 'ieth'
+    else:
+        last += 'th'
+    return head + sep + last
+
+
+def spell_year(n):
+    """English year reading: 1999 -> 'nineteen ninety-nine', 2024 -> 'twenty twenty-four'"""
+    if not (1100 <= n <= 1999 or 2010 <= n <= 2099):
+        return spell_number(n)
+    high, low = divmod(n, 100)
+    if low == 0:
+        return _below_thousand(high) + ' hundred'
+    return _below_thousand(high) + (' oh ' if low < 10 else ' ') + _below_thousand(low)
+
+
+def spell_digits(digits):
+    return ' '.join(_ONES[int(d)] for d in digits)
+
+
+class _EnglishSpeller:
+    cardinal = staticmethod(spell_number)
+    ordinal = staticmethod(spell_ordinal)
+    year = staticmethod(spell_year)
+    digits = staticmethod(spell_digits)
+    point = 'point'
+
+
+class _Num2WordsSpeller:
+    """num2words-backed speller for languages without a built-in one"""
+
+    def __init__(self, language):
+        self.language = language
+        self.point = num2words(1.5, lang=language).split()[-2]
+
+    def cardinal(self, n):
+        return num2words(n, lang=self.language)
+
+    def ordinal(self, n):
+        return num2words(n, lang=self.language, to='ordinal')
+
+    def year(self, n):
+        try:
+            return num2words(n, lang=self.language, to='year')
+        except (NotImplementedError, KeyError):
+            return self.cardinal(n)
+
+    def digits(self, digits):
+        return ' '.join(self.cardinal(int(d)) for d in digits)
+
+
+def _speller_for(language):
+    if language is None:
+        return None
+    if language == 'en':
+        return _EnglishSpeller()
+    if num2words is None:
+        return None
+    try:
+        return _Num2WordsSpeller(language)
+    except (NotImplementedError, KeyError, IndexError):
+        return None
+
+
+# ========================================
+# COMPILED NORMALIZER
+# ========================================
+
+def _first_char_branches(alternatives, after_first=''):
+    """
+    (first character, rest of pattern) pairs as one pattern that starts
+    with a character class: [ab]after_first(?:(?<=a)rest_a|(?<=b)rest_b)
+    """
+    chars = ''.join(re.escape(char) for char, _ in alternatives)
+    if len(alternatives) == 1:
+        return f'[{chars}]' + after_first + alternatives[0][1]
+    rests = '|'.join(f'(?<={re.escape(char)}){rest}' for char, rest in alternatives)
+    return f'[{chars}]{after_first}(?:{rests})'
+
+
+def trie_pattern(words):
+    """
+    Regex matching any of words at the start of a word, built as a prefix
+    trie so each position is checked character by character instead of
+    word by word. Longer words win, and words ending in a letter/digit
+    must end at a word boundary (so 'Mme' does not match inside 'Mmes').
+    """
+    trie = {}
+    for word in filter(None, words):
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node, last_char):
+        branches = [re.escape(char) + build(child, char)
+                    for char, child in sorted(node.items()) if char]
+        if '' in node:
+            # End of a word: tried last, so the longest match wins
+            branches.append(r'(?!\w)' if last_char.isalnum() else '')
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    if not trie:
+        return None
+    # Class for the first character, which must not follow a word character
+    return _first_char_branches([(char, build(child, char)) for char, child in sorted(trie.items())],
+                                after_first=r'(?<!\w.)')
+
+
+class TextNormalizer:
+    """
+    Compiled normalizer for one language: a single alternation regex
+    whose match handler is picked by group name
+    """
+
+    def __init__(self, language, rules):
+        self.language = language
+        self.rules = rules
+        self.abbreviations = dict(rules.get('abbreviations', {}))
+        self.currencies = rules.get('currencies', {})
+        self.speller = _speller_for(language)
+
+        parts = [('url', _URL_PATTERN), ('email', _EMAIL_PATTERN)]
+        abbreviations = trie_pattern(self.abbreviations)
+        if abbreviations:
+            parts.append(('abbreviation', abbreviations))
+
+        if self.speller is not None:
+            if self.currencies:
+                symbols = _first_char_branches(
+                    [(symbol[0], re.escape(symbol[1:])) for symbol in sorted(self.currencies, key=len, reverse=True)])
+                parts.append(('currency', r'%s ?[0-9]%s(?:\.[0-9]{1,2})?(?: (?:%s)\b)?(?![\w.,]?[0-9])'
+                              % (symbols, _AMOUNT_TAIL, '|'.join(_SCALE_WORDS))))
+            if rules.get('months'):
+                parts.append(('date', _DATE_PATTERN))
+            if rules.get('time'):
+                parts.append(('time', _TIME_PATTERN))
+            numbers = [_NUMBER_PATTERN]
+            if rules.get('percent'):
+                parts.append(('percent', _PERCENT_PATTERN))
+                numbers.insert(0, _PERCENT_PATTERN)
+            if rules.get('minus'):
+                parts.append(('negative', _MINUS_SIGN + '(?:%s)' % '|'.join(numbers)))
+            if rules.get('ordinal_suffixes'):
+                parts.append(('ordinal', _DIGIT_START + r'[0-9]*(?:%s)\b' % '|'.join(rules['ordinal_suffixes'])))
+            parts.append(('number', _NUMBER_PATTERN))
+
+        # An empty named group closes each branch, so match.lastgroup names the
+        # branch that matched without wrapping it in a group (which would hide
+        # its first character from the engine)
+        self._pattern = re.compile('|'.join(f'{pattern}(?P<{name}>)' for name, pattern in parts))
+        self._handlers = {name: getattr(self, '_' + name) for name, _ in parts}
+
+    def normalize(self, text):
+        if not text:
+            return ''
+        return self._pattern.sub(self._replace, text).strip()
+
+    def _replace(self, match):
+        return self._handlers[match.lastgroup](match.group())
+
+    # ---- handlers ------------------------------------------------------
+
+    def _url(self, token):
+        return ''
+
+    _email = _url
+
+    def _abbreviation(self, token):
+        return self.abbreviations[token]
+
+    def _number(self, token):
+        integer, _, fraction = token.replace(',', '').partition('.')
+        if len(integer) > MAX_SPELLED_DIGITS or (len(integer) > 1 and integer[0] == '0' and ',' not in token):
+            words = self.speller.digits(integer)
+        elif len(integer) == 4 and not fraction and ',' not in token:
+            words = self.speller.year(int(integer))
+        else:
+            words = self.speller.cardinal(int(integer))
+        if fraction:
+            words += f" {self.speller.point} {self.speller.digits(fraction)}"
+        return words
+
+    def _percent(self, token):
+        return self._number(token.rstrip('% ')) + ' ' + self.rules['percent']
+
+    def _negative(self, token):
+        token = token[1:]
+        words = self._percent(token) if token.endswith('%') else self._number(token)
+        return self.rules['minus'] + ' ' + words
+
+    def _time(self, token):
+        hour, minute = (int(part) for part in token.split(':'))
+        if hour > 24:
+            return token
+        on_the_hour, below_ten, other = self.rules['time']
+        template = on_the_hour if minute == 0 else below_ten if minute < 10 else other
+        return template.format(hour=self.speller.cardinal(hour), minute=self.speller.cardinal(minute))
+
+    def _ordinal(self, token):
+        return self.speller.ordinal(int(token.rstrip('abcdefghijklmnopqrstuvwxyz')))
+
+    def _date(self, token):
+        year, month, day = (int(part) for part in token.split('-'))
+        if not (1 <= month <= 12 and 1 <= day <= 31):
+            return token
+        template = self.rules['date']
+        day_ordinal = self.speller.ordinal(day) if '{day_ordinal}' in template else ''
+        return template.format(month=self.rules['months'][month - 1], day=self.speller.cardinal(day),
+                               day_ordinal=day_ordinal, year=self.speller.year(year))
+
+    def _currency(self, token):
+        symbol = next(s for s in sorted(self.currencies, key=len, reverse=True) if token.startswith(s))
+        unit, units, subunit, subunits = self.currencies[symbol]
+        amount, _, scale = token[len(symbol):].strip().partition(' ')
+        whole, _, cents = amount.replace(',', '').partition('.')
+        whole = int(whole)
+
+        if scale:
+            # "$5 million": the scale word belongs to the amount
+            return f"{self._number(amount)} {scale} {units}"
+        cents = int(cents.ljust(2, '0')) if cents else 0
+        words = []
+        if whole or not cents:
+            words.append(f"{self.speller.cardinal(whole)} {unit if whole == 1 else units}")
+        if cents:
+            words.append(f"{self.speller.cardinal(cents)} {subunit if cents == 1 else subunits}")
+        return f" {self.rules['and']} ".join(words)
+
+
+def _build(language):
+    return TextNormalizer(language, NORMALIZATION_RULES[language])
+
+
+# Built once at import
+_NORMALIZERS = {language: _build(language) for language in NORMALIZATION_RULES}
+
+# Languages without rules (e.g. 'hi', 'ar') only lose URLs and email
+# addresses; spelling their numbers with English words would be worse
+# than leaving the digits to the engine
+_URLS_ONLY = TextNormalizer(None, {})
+
+
+def get_normalizer(language):
+    return _NORMALIZERS.get(language, _URLS_ONLY)
+
+
+def add_abbreviations(language, abbreviations):
+    """Merge abbreviation -> expansion pairs into a language's rules and recompile it"""
+    rules = NORMALIZATION_RULES.setdefault(language, {})
+    rules['abbreviations'] = {**rules.get('abbreviations', {}), **abbreviations}
+    _NORMALIZERS[language] = _build(language)
@@ -1106,17 +1106,60 @@ No other changes needed!
 """
 
 import os
+import sys
+import importlib.util
+import copy
 import time
+import queue
+import threading
 import torch
 import warnings
+import struct
 import numpy as np
 from gtts import gTTS
 import pyttsx3
 from pathlib import Path
 import hashlib
-import pickle
 from io import BytesIO
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
 import soundfile as sf
+from services.language_detector import split_text_into_sentences
+from services.model_pool import ModelWorkerPool
+from services.batcher import MicroBatcher, synthesize_coqui_batch
+from services.audio_cache import AudioCacheStore, TieredAudioCache
+from services.audio_postprocess import AudioPostProcessor
+from services.prefetch import Prefetcher
+from services.output_store import bytes_hash
+
+
+# sys.stdout is process-global: one redirect is shared by every thread
+# inside _suppress_stdout() and undone when the last of them leaves
+_stdout_lock = threading.Lock()
+_stdout_redirect = {'depth': 0, 'saved': None, 'devnull': None}
+
+
+@contextmanager
+def _suppress_stdout():
+    """Silence Coqui's verbose prints for the duration of the block (thread-safe, reentrant)"""
+    with _stdout_lock:
+        if _stdout_redirect['depth'] == 0:
+            _stdout_redirect['saved'] = sys.stdout
+            _stdout_redirect['devnull'] = open(os.devnull, 'w')
+            sys.stdout = _stdout_redirect['devnull']
+        _stdout_redirect['depth'] += 1
+    try:
+        yield
+    finally:
+        with _stdout_lock:
+            _stdout_redirect['depth'] -= 1
+            if _stdout_redirect['depth'] == 0:
+                devnull = _stdout_redirect['devnull']
+                # Leave stdout alone if someone else replaced it meanwhile
+                if sys.stdout is devnull:
+                    sys.stdout = _stdout_redirect['saved']
+                devnull.close()
+                _stdout_redirect['saved'] = _stdout_redirect['devnull'] = None
 
 
 class TTSService:
@@ -1128,17 +1171,176 @@ class TTSService:
     _coqui_model_cache = None
     _coqui_loaded = False
     _cache_dir = None
-    _audio_cache = {}
+    _cache_store = None
+    CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', 1024 ** 3))
+    MEMORY_CACHE_BYTES = int(os.getenv('TTS_MEMORY_CACHE_BYTES', 64 * 1024 ** 2))
+
+    # Trim / stitch / loudness stage applied to all Coqui output
+    _postprocessor = AudioPostProcessor(sample_rate=22050)
+
+    # Chunked synthesis: texts longer than this are split at sentence
+    # boundaries and synthesized on a bounded pool of model replicas
+    CHUNK_MIN_CHARS = int(os.getenv('TTS_CHUNK_MIN_CHARS', 500))
+    MAX_SENTENCE_CHARS = int(os.getenv('TTS_MAX_SENTENCE_CHARS', 300))
+    MAX_SYNTHESIS_WORKERS = int(os.getenv('TTS_MAX_WORKERS', os.cpu_count() or 1))
+
+    # Intra-op threads per inference, set once when the model loads: the
+    # cores are split between replicas instead of every replica spinning
+    # up a full-width thread pool
+    INTRA_OP_THREADS = int(os.getenv('TTS_INTRA_OP_THREADS',
+                                     max(1, (os.cpu_count() or 1) // max(1, MAX_SYNTHESIS_WORKERS))))
+
+    # Tacotron2's decoder keeps attention state on the module, so one
+    # instance must never run two inferences at once. Idle replicas wait here.
+    _coqui_replicas = queue.Queue()
+    _coqui_replica_count = 0
+    _coqui_replica_lock = threading.Lock()
+
+    # Optional pool of model worker processes (see configure_worker_pool)
+    COQUI_MODEL_NAME = "tts_models/en/ljspeech/tacotron2-DDC"
+    WORKER_TIMEOUT = int(os.getenv('TTS_WORKER_TIMEOUT', 300))
+    _worker_pool = None
+    _worker_pool_size = 0
+    _worker_pool_lock = threading.Lock()
+
+    # Optional cross-request micro-batching (see configure_batching)
+    _batcher = None
+    _batch_window_ms = 0
+    _batch_max_size = 8
+
+    # Model load / warm-up state reported by /health
+    WARMUP_TEXT = "Warm up."
+    _model_state = {
+        'status': 'not_loaded',     # not_loaded | loading | loaded | ready | failed
+        'load_seconds': None,
+        'warmup_seconds': None,
+        'error': None,
+        'ready_at': None,
+    }
+    _model_state_lock = threading.Lock()
+
+    # Google rate-limits aggressively; cap parallel sentence requests
+    GTTS_LANGUAGES = {'en': 'en', 'ur': 'ur', 'hi': 'hi', 'es': 'es', 'fr': 'fr', 'ar': 'ar'}
+    GTTS_MAX_PARALLEL = int(os.getenv('GTTS_MAX_PARALLEL', 4))
+
+    # Streaming: the first unit is kept short so audio starts quickly
+    STREAM_FIRST_CHUNK_CHARS = int(os.getenv('TTS_STREAM_FIRST_CHUNK_CHARS', 80))
+    STREAMABLE_ENGINES = {'coqui': 'audio/wav', 'gtts': 'audio/mpeg'}
+
+    @classmethod
+    def configure_worker_pool(cls, num_workers):
+        """
+        Route Coqui synthesis through num_workers model worker processes.
+        The pool starts on first use, so a process that never synthesizes
+        (e.g. the debug reloader parent) never spawns workers. 0 disables it.
+        """
+        cls._worker_pool_size = max(0, int(num_workers))
+
+    @classmethod
+    def configure_batching(cls, window_ms, max_batch_size=8):
+        """
+        Collect sentences from concurrent requests for up to window_ms
+        (or max_batch_size sentences) and synthesize them as one batch.
+        window_ms=0 disables batching.
+        """
+        cls._batch_window_ms = max(0, float(window_ms))
+        cls._batch_max_size = max(1, int(max_batch_size))
+
+    @classmethod
+    def get_worker_pool(cls):
+        """Return the model worker pool, starting it if configured"""
+        if cls._worker_pool is None and cls._worker_pool_size > 0:
+            with cls._worker_pool_lock:
+                if cls._worker_pool is None:
+                    cls._worker_pool = ModelWorkerPool(cls._worker_pool_size, cls.COQUI_MODEL_NAME,
+                                                       warmup_text=cls.WARMUP_TEXT)
+        return cls._worker_pool
+
+    # ========================================
+    # WARM-UP & HEALTH
+    # ========================================
+
+    @classmethod
+    def _set_model_state(cls, **changes):
+        with cls._model_state_lock:
+            cls._model_state.update(changes)
+
+    @classmethod
+    def model_state(cls):
+        """Copy of the model load / warm-up state"""
+        with cls._model_state_lock:
+            return dict(cls._model_state)
+
+    @classmethod
+    def engine_status(cls):
+        """Which engines can be used in this process"""
+        def installed(module):
+            return importlib.util.find_spec(module) is not None
+
+        status = {
+            'coqui': {'installed': installed('TTS'), 'model': cls.model_state()['status']},
+            'gtts': {'installed': installed('gtts'), 'requires_network': True},
+            'pyttsx3': {'installed': installed('pyttsx3')},
+            'elevenlabs': {'installed': installed('elevenlabs'),
+                           'api_key_set': bool(os.getenv('ELEVENLABS_API_KEY'))},
+        }
+        pool = cls._worker_pool
+        if pool is not None:
+            status['coqui']['worker_pool'] = pool.stats()
+        if cls._batcher is not None:
+            status['coqui']['batching'] = cls._batcher.stats()
+        return status
+
+    def warm_up(self):
+        """
+        Load the Coqui model and run a dummy inference so the first real
+        request does not pay load + first-inference cost. Safe to call from
+        a background thread; progress is visible through model_state().
+        """
+        TTSService._set_model_state(status='loading', error=None)
+        try:
+            pool = TTSService.get_worker_pool()
+            if pool is not None:
+                # Every worker loads and warms up its own model before it
+                # reports ready, so no worker is left cold
+                startup = pool.wait_ready(timeout=TTSService.WORKER_TIMEOUT)
+                load_seconds = max(load for load, _ in startup)
+                warmup_seconds = max(warm for _, warm in startup)
+            else:
+                start = time.time()
+                if self._load_coqui_fast_model() is None:
+                    raise RuntimeError("Coqui model could not be loaded")
+                load_seconds = time.time() - start
+
+                start = time.time()
+                with _suppress_stdout():
+                    self._synthesize_coqui_array(TTSService.WARMUP_TEXT)
+                warmup_seconds = time.time() - start
+
+            TTSService._set_model_state(status='ready', load_seconds=round(load_seconds, 3),
+                                        warmup_seconds=round(warmup_seconds, 3), ready_at=time.time())
+            print(f"✓ Coqui warm-up complete (load {load_seconds:.2f}s, first inference {warmup_seconds:.2f}s)")
+            return True
+
+        except Exception as e:
+            TTSService._set_model_state(status='failed', error=str(e))
+            print(f"⚠ Coqui warm-up failed: {e}")
+            return False
 
     def __init__(self, output_folder):
         self.output_folder = output_folder
         os.makedirs(output_folder, exist_ok=True)
 
+        # output path -> content digest of audio this instance wrote there
+        self._output_digests = {}
+
         # Setup cache directory
         if TTSService._cache_dir is None:
             TTSService._cache_dir = Path(output_folder) / '.tts_cache'
-            TTSService._cache_dir.mkdir(exist_ok=True)
-            self._load_cache_index()
+            TTSService._cache_store = TieredAudioCache(
+                AudioCacheStore(TTSService._cache_dir, TTSService.CACHE_MAX_BYTES),
+                memory_bytes=TTSService.MEMORY_CACHE_BYTES
+            )
 
     # ========================================
     # FAST COQUI (Tacotron2 + HiFiGAN)
@@ -1156,6 +1358,7 @@ class TTSService:
             return TTSService._coqui_model_cache
 
         try:
+            load_start = time.time()
             print("📥 Loading Coqui Tacotron2 + HiFiGAN (FAST model)...")
             print("⚡ This is 15-60x FASTER than XTTS-v2!")
 
@@ -1166,16 +1369,12 @@ class TTSService:
             from TTS.api import TTS
 
             # CRITICAL: Use FAST model, NOT XTTS-v2!
-            model_name = "tts_models/en/ljspeech/tacotron2-DDC"
+            model_name = TTSService.COQUI_MODEL_NAME
 
             # Suppress stdout during loading
-            import sys
-            old_stdout = sys.stdout
-            sys.stdout = open(os.devnull, 'w')
-
-            try:
+            with _suppress_stdout():
                 # Load Tacotron2 (fast, no transformers!)
-                tts = TTS(model_name=model_name)
+                tts = TTS(model_name=model_name, progress_bar=False)
 
                 # Move to GPU if available
                 if torch.cuda.is_available():
@@ -1184,51 +1383,157 @@ class TTSService:
                 else:
                     print_msg = "✓ Tacotron2 loaded (CPU mode - still fast!)"
 
-                # Restore stdout
-                sys.stdout = old_stdout
-                print(print_msg)
-
-            except Exception as e:
-                sys.stdout = old_stdout
-                raise e
+            print(print_msg)
+            torch.set_num_threads(TTSService.INTRA_OP_THREADS)
 
             TTSService._coqui_model_cache = tts
             TTSService._coqui_loaded = True
+            if TTSService.model_state()['status'] != 'ready':
+                TTSService._set_model_state(status='loaded', load_seconds=round(time.time() - load_start, 3))
 
             return tts
 
         except Exception as e:
-            if 'sys' in locals() and 'old_stdout' in locals():
-                sys.stdout = old_stdout
             print(f"⚠ Coqui load failed: {e}")
             print("💡 Falling back to Google TTS (also fast!)")
             return None
 
-    def save_with_coqui_xtts(self, text, output_path, lang='en', quality='high'):
+    def save_with_coqui_xtts(self, text, output_path, lang='en', quality='high', progress=None):
         """
         RENAMED: This now uses FAST Tacotron2, not slow XTTS-v2!
         Keeping same method name for compatibility with your routes.py
         """
-        return self.save_with_coqui_fast(text, output_path, lang, quality)
+        return self.save_with_coqui_fast(text, output_path, lang, quality, progress=progress)
 
-    def save_with_coqui_fast(self, text, output_path, lang='en', quality='high'):
+    @contextmanager
+    def _checkout_coqui_model(self):
+        """
+        Borrow a Tacotron2 replica for exclusive use by one inference.
+        Replicas are deep copies of the loaded model, created lazily up to
+        MAX_SYNTHESIS_WORKERS; beyond that, callers wait for a free one.
+        """
+        try:
+            model = TTSService._coqui_replicas.get_nowait()
+        except queue.Empty:
+            model = None
+            with TTSService._coqui_replica_lock:
+                if TTSService._coqui_replica_count < TTSService.MAX_SYNTHESIS_WORKERS:
+                    base = self._load_coqui_fast_model()
+                    if base is None:
+                        raise RuntimeError("Coqui model not available")
+                    # First checkout uses the cached model itself
+                    model = base if TTSService._coqui_replica_count == 0 else copy.deepcopy(base)
+                    TTSService._coqui_replica_count += 1
+            if model is None:
+                model = TTSService._coqui_replicas.get()
+
+        try:
+            yield model
+        finally:
+            TTSService._coqui_replicas.put(model)
+
+    def _coqui_available(self):
+        """True if Coqui synthesis can run (worker pool or in-process model)"""
+        if TTSService.get_worker_pool() is not None:
+            return True
+        return self._load_coqui_fast_model() is not None
+
+    def _get_batcher(self):
+        """Return the micro-batcher, starting it if configured"""
+        if TTSService._batcher is None and TTSService._batch_window_ms > 0:
+            with TTSService._worker_pool_lock:
+                if TTSService._batcher is None:
+                    # One batch in flight per worker process / model replica
+                    concurrency = TTSService._worker_pool_size or TTSService.MAX_SYNTHESIS_WORKERS
+                    TTSService._batcher = MicroBatcher(self._run_coqui_batch, TTSService._batch_max_size,
+                                                       TTSService._batch_window_ms, concurrency,
+                                                       name='coqui-batch')
+        return TTSService._batcher
+
+    def _run_coqui_batch(self, texts):
+        """Batch runner behind the micro-batcher"""
+        pool = TTSService.get_worker_pool()
+        if pool is not None:
+            return pool.submit_batch(texts).result(timeout=TTSService.WORKER_TIMEOUT)
+
+        with _suppress_stdout(), self._checkout_coqui_model() as tts:
+            return synthesize_coqui_batch(tts, texts)
+
+    def _synthesize_coqui_array(self, text):
+        """Run one Tacotron2 + HiFiGAN inference and return float32 samples"""
+        batcher = self._get_batcher()
+        if batcher is not None:
+            return batcher.submit(text).result(timeout=TTSService.WORKER_TIMEOUT)
+
+        pool = TTSService.get_worker_pool()
+        if pool is not None:
+            return pool.synthesize(text, timeout=TTSService.WORKER_TIMEOUT)
+
+        with self._checkout_coqui_model() as tts:
+            wav = tts.tts(text)
+        return np.asarray(wav, dtype=np.float32)
+
+    def _synthesize_coqui_many(self, sentences, max_workers=None, progress=None):
+        """
+        Synthesize sentences in parallel, returning arrays in input order
+        progress: optional callback(chunks_done, chunks_total)
+        """
+        def collect(futures):
+            results = []
+            for future in futures:
+                results.append(future.result(timeout=TTSService.WORKER_TIMEOUT))
+                if progress:
+                    progress(len(results), len(futures))
+            return results
+
+        batcher = self._get_batcher()
+        pool = TTSService.get_worker_pool()
+        if batcher is not None or pool is not None:
+            # The batcher / worker processes already hold the parallelism; just fan out
+            submit = batcher.submit if batcher is not None else pool.submit
+            return collect([submit(sentence) for sentence in sentences])
+
+        workers = max(1, min(len(sentences), max_workers or TTSService.MAX_SYNTHESIS_WORKERS))
+
+        # Results are collected in submission order, so the stitched
+        # audio follows the document regardless of completion order
+        with _suppress_stdout(), ThreadPoolExecutor(max_workers=workers) as executor:
+            return collect([executor.submit(self._synthesize_coqui_array, s) for s in sentences])
+
+    def _finalize_wav(self, chunks, output_path, cache_key):
+        """Trim, stitch and loudness-normalize chunks, encode as 16-bit WAV, write output and cache it"""
+        wav_int16 = TTSService._postprocessor.process_pcm16(chunks)
+        audio_bytes = self._array_to_bytes(wav_int16, 22050)
+
+        with open(output_path, 'wb') as f:
+            f.write(audio_bytes)
+
+        # Cache for future instant playback
+        self._save_to_cache(cache_key, audio_bytes, output_path=output_path)
+
+    def save_with_coqui_fast(self, text, output_path, lang='en', quality='high', chunked=None, progress=None):
         """
         Generate speech with FAST Coqui (Tacotron2)
         Speed: 0.5-2 seconds (vs 30+ seconds for XTTS-v2!)
+
+        chunked: True/False forces sentence-chunked mode on/off;
+                 None picks it automatically for texts over CHUNK_MIN_CHARS
+        progress: optional callback(chunks_done, chunks_total)
         """
+        if chunked is None:
+            chunked = len(text) > TTSService.CHUNK_MIN_CHARS
+        if chunked:
+            return self.save_with_coqui_chunked(text, output_path, lang, quality, progress=progress)
+
         try:
             # Check cache first (instant if cached!)
-            cache_key = self._get_cache_key(text)
-            cached_audio = self._get_from_cache(cache_key)
-            if cached_audio:
+            cache_key = self.cache_key_for(text, 'coqui', lang, quality)
+            if self._link_from_cache(cache_key, output_path):
                 print(f"⚡ Cache hit (0ms): {text[:50]}")
-                with open(output_path, 'wb') as f:
-                    f.write(cached_audio)
                 return output_path
 
-            # Load fast model
-            tts = self._load_coqui_fast_model()
-            if not tts:
+            # Load fast model (or use the worker pool)
+            if not self._coqui_available():
                 # Fallback to gTTS if Coqui fails
                 print("⚠ Using Google TTS fallback")
                 return self.save_with_gtts(text, output_path, lang)
@@ -1236,135 +1541,348 @@ class TTSService:
             start_time = time.time()
             print(f"🎤 Generating with Tacotron2: {text[:50]}...")
 
-            # Suppress TTS verbose output
-            import sys
-            old_stdout = sys.stdout
-            sys.stdout = open(os.devnull, 'w')
+            # Single call for short texts - no chunking overhead
+            with _suppress_stdout():
+                wav_array = self._synthesize_coqui_array(text)
 
-            try:
-                # CRITICAL: Single call, NO chunking, NO transformers!
-                # This is why it's 15-60x faster!
-                wav = tts.tts(text)
+            self._finalize_wav([wav_array], output_path, cache_key)
 
-                sys.stdout = old_stdout
+            elapsed = time.time() - start_time
+            print(f"✓ Tacotron2 completed in {elapsed:.2f}s (vs 30s+ for XTTS-v2!)")
 
-            except Exception as e:
-                sys.stdout = old_stdout
-                raise e
+            return output_path
 
-            # Convert to numpy array
-            wav_array = np.array(wav, dtype=np.float32)
+        except Exception as e:
+            # Fallback to gTTS on any error
+            print(f"⚠ Tacotron2 error: {e}")
+            print("💡 Using Google TTS fallback")
+            return self.save_with_gtts(text, output_path, lang)
 
-            # Normalize audio
-            max_val = np.max(np.abs(wav_array))
-            if max_val > 0:
-                wav_array = wav_array / max_val
+    def save_with_coqui_chunked(self, text, output_path, lang='en', quality='high', max_workers=None,
+                                progress=None):
+        """
+        Sentence-chunked parallel Tacotron2 synthesis for long documents
+        Splits at sentence boundaries, synthesizes on a bounded worker pool
+        and stitches the chunks back in order into a single WAV file
+        """
+        try:
+            cache_key = self.cache_key_for(text, 'coqui', lang, quality)
+            if self._link_from_cache(cache_key, output_path):
+                print(f"⚡ Cache hit (0ms): {text[:50]}")
+                return output_path
 
-            # Convert to int16 for WAV format
-            wav_int16 = (wav_array * 32767).astype(np.int16)
+            if not self._coqui_available():
+                print("⚠ Using Google TTS fallback")
+                return self.save_with_gtts(text, output_path, lang)
 
-            # Convert to bytes
-            audio_bytes = self._array_to_bytes(wav_int16, 22050)
+            sentences = split_text_into_sentences(text, TTSService.MAX_SENTENCE_CHARS)
+            if not sentences:
+                raise ValueError("No text to synthesize")
 
-            # Save to file
-            with open(output_path, 'wb') as f:
-                f.write(audio_bytes)
+            start_time = time.time()
+            print(f"🎤 Generating with Tacotron2: {len(sentences)} chunks...")
+
+            chunks = self._synthesize_coqui_cached(sentences, lang, quality, max_workers, progress)
 
-            # Cache for future instant playback
-            self._save_to_cache(cache_key, audio_bytes)
+            self._finalize_wav(chunks, output_path, cache_key)
 
             elapsed = time.time() - start_time
-            print(f"✓ Tacotron2 completed in {elapsed:.2f}s (vs 30s+ for XTTS-v2!)")
+            print(f"✓ Tacotron2 chunked synthesis completed in {elapsed:.2f}s")
 
             return output_path
 
         except Exception as e:
-            if 'sys' in locals() and 'old_stdout' in locals():
-                sys.stdout = old_stdout
-            # Fallback to gTTS on any error
-            print(f"⚠ Tacotron2 error: {e}")
+            print(f"⚠ Tacotron2 chunked error: {e}")
             print("💡 Using Google TTS fallback")
             return self.save_with_gtts(text, output_path, lang)
 
+    # ========================================
+    # STREAMING (audio starts with the first sentence)
+    # ========================================
+
+    def _iter_stream_units(self, texts):
+        """
+        Sentence units for streaming from an iterable of text pieces (e.g.
+        pages as they are extracted), with a short first unit
+        """
+        first = True
+        for text in texts:
+            sentences = split_text_into_sentences(text, TTSService.MAX_SENTENCE_CHARS)
+            if first and sentences:
+                first = False
+                if len(sentences[0]) > TTSService.STREAM_FIRST_CHUNK_CHARS:
+                    head = split_text_into_sentences(sentences[0], TTSService.STREAM_FIRST_CHUNK_CHARS)
+                    sentences[:1] = [head[0], ' '.join(head[1:])] if len(head) > 1 else head
+            yield from sentences
+
+    @staticmethod
+    def _wav_stream_header(sample_rate=22050, channels=1, bits=16):
+        """
+        RIFF header for a WAV stream of unknown length.
+        Size fields are set to the maximum, which browsers and players
+        treat as "read until the connection closes".
+        """
+        byte_rate = sample_rate * channels * bits // 8
+        block_align = channels * bits // 8
+        return (b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE' +
+                b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate,
+                                      byte_rate, block_align, bits) +
+                b'data' + struct.pack('<I', 0xFFFFFFFF))
+
+    def _coqui_pcm_chunk(self, sentence, lang='en', quality='high', first=False):
+        """Synthesize one sentence and return post-processed int16 PCM bytes"""
+        with _suppress_stdout():
+            wav_array = self._synthesize_coqui_cached([sentence], lang, quality)[0]
+        return TTSService._postprocessor.stream_chunk_pcm16(wav_array, first=first)
+
+    def stream_with_coqui(self, text, lang='en', quality='high', max_workers=None):
+        """
+        Generator yielding a WAV stream sentence by sentence.
+        The first yielded item is the header plus the first sentence's PCM;
+        later sentences are synthesized ahead on a bounded pool while
+        earlier ones are being sent.
+        """
+        return self.stream_pieces_with_coqui([text], lang, quality, max_workers)
+
+    def stream_pieces_with_coqui(self, texts, lang='en', quality='high', max_workers=None):
+        """
+        stream_with_coqui over an iterable of text pieces that may still be
+        arriving (e.g. pages). Sentences are pulled lazily, at most a
+        bounded lookahead ahead of what has been sent.
+        """
+        workers = max(1, max_workers or TTSService.MAX_SYNTHESIS_WORKERS)
+        lookahead = workers * 2
+        # Sentences are produced on their own thread, so a slow page never
+        # holds back audio that is already synthesized
+        sentences = Prefetcher(self._iter_stream_units(texts), maxsize=lookahead, name='stream-sentences')
+        pool = None
+        pending = []
+        try:
+            first_sentence = sentences.get()
+            if first_sentence is Prefetcher.DONE:
+                return
+            if not self._coqui_available():
+                raise RuntimeError("Coqui model not available")
+
+            pool = ThreadPoolExecutor(max_workers=workers)
+            pending.append(pool.submit(self._coqui_pcm_chunk, first_sentence, lang, quality, True))
+            exhausted = False
+            header = self._wav_stream_header(22050)
+            while pending:
+                # Keep the pool busy without synthesizing the whole document up front
+                while not exhausted and len(pending) < lookahead:
+                    sentence = sentences.get(block=False)
+                    if sentence is Prefetcher.EMPTY:
+                        break
+                    if sentence is Prefetcher.DONE:
+                        exhausted = True
+                    else:
+                        pending.append(pool.submit(self._coqui_pcm_chunk, sentence, lang, quality))
+
+                if not (exhausted or pending[0].done() or len(pending) >= lookahead):
+                    # Next sentence not ready yet: wait briefly on either side
+                    futures_wait(pending[:1], timeout=0.05)
+                    continue
+
+                pcm = pending.pop(0).result()
+                if header:
+                    pcm, header = header + pcm, None
+                yield pcm
+
+                if not pending and not exhausted:
+                    # Everything sent; block for the next sentence
+                    sentence = sentences.get()
+                    if sentence is Prefetcher.DONE:
+                        exhausted = True
+                    else:
+                        pending.append(pool.submit(self._coqui_pcm_chunk, sentence, lang, quality))
+        finally:
+            # Client went away or we finished: drop work nobody will read
+            sentences.close()
+            for future in pending:
+                future.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def stream_with_gtts(self, text, lang='en'):
+        """Generator yielding MP3 frames from Google TTS as each part arrives"""
+        return self.stream_pieces_with_gtts([text], lang)
+
+    def stream_pieces_with_gtts(self, texts, lang='en'):
+        """stream_with_gtts over an iterable of text pieces that may still be arriving"""
+        for text in texts:
+            tts = gTTS(text=text, lang=TTSService.GTTS_LANGUAGES.get(lang, 'en'), slow=False)
+            # MP3 frames are self-delimiting, so parts can be concatenated as sent
+            for part in tts.stream():
+                yield part
+
+    def stream_speech(self, text, engine='coqui', lang='en', quality='high'):
+        """
+        Universal streaming method
+        Returns (mimetype, generator of audio bytes)
+        """
+        if engine == 'coqui':
+            return self.STREAMABLE_ENGINES['coqui'], self.stream_with_coqui(text, lang, quality)
+        if engine == 'gtts':
+            return self.STREAMABLE_ENGINES['gtts'], self.stream_with_gtts(text, lang)
+        raise ValueError(f"Engine '{engine}' does not support streaming")
+
+    def stream_speech_pieces(self, texts, engine='coqui', lang='en', quality='high'):
+        """
+        stream_speech for text that arrives in pieces (incremental pipeline)
+        Returns (mimetype, generator of audio bytes)
+        """
+        if engine == 'coqui':
+            return self.STREAMABLE_ENGINES['coqui'], self.stream_pieces_with_coqui(texts, lang, quality)
+        if engine == 'gtts':
+            return self.STREAMABLE_ENGINES['gtts'], self.stream_pieces_with_gtts(texts, lang)
+        raise ValueError(f"Engine '{engine}' does not support streaming")
+
     # ========================================
     # CACHING SYSTEM (Makes repeated phrases instant!)
     # ========================================
 
-    def _get_cache_key(self, text: str) -> str:
-        """Generate cache key from text"""
+    def _get_cache_key(self, text: str, *context) -> str:
+        """
+        Generate cache key from text plus what shapes the audio
+        (engine, model, language, quality), so engines never share entries
+        """
         normalized = text.lower().strip()
         normalized = ' '.join(normalized.split())
-        return hashlib.md5(normalized.encode()).hexdigest()
-
-    def _load_cache_index(self):
-        """Load cache index from disk"""
-        index_file = TTSService._cache_dir / "cache_index.pkl"
-        if index_file.exists():
-            try:
-                with open(index_file, 'rb') as f:
-                    TTSService._audio_cache = pickle.load(f)
-                if len(TTSService._audio_cache) > 0:
-                    print(f"✓ Loaded {len(TTSService._audio_cache)} cached items")
-            except:
-                pass
-
-    def _save_cache_index(self):
-        """Save cache index to disk"""
-        index_file = TTSService._cache_dir / "cache_index.pkl"
-        try:
-            with open(index_file, 'wb') as f:
-                pickle.dump(TTSService._audio_cache, f)
-        except:
-            pass
+        return hashlib.md5('|'.join([*map(str, context), normalized]).encode()).hexdigest()
+
+    def cache_key_for(self, text, engine, lang='en', quality='high'):
+        """Whole-text cache key used by the coqui / gtts save methods"""
+        if engine == 'coqui':
+            return self._get_cache_key(text, 'coqui', TTSService.COQUI_MODEL_NAME,
+                                       TTSService._postprocessor.signature(), lang, quality)
+        if engine == 'gtts':
+            return self._get_cache_key(text, 'gtts', TTSService.GTTS_LANGUAGES.get(lang, 'en'))
+        raise ValueError(f"Engine '{engine}' output is not cached")
+
+    def is_cached(self, text, engine, lang='en', quality='high'):
+        """True if audio for this exact text/engine/language/quality is cached"""
+        return self.cache_key_for(text, engine, lang, quality) in TTSService._cache_store
+
+    def _get_sentence_cache_key(self, sentence, engine, lang, quality):
+        """Cache key for one sentence of audio"""
+        model = TTSService.COQUI_MODEL_NAME if engine == 'coqui' else engine
+        return self._get_cache_key(sentence, 'sentence', engine, model, lang, quality)
+
+    def _synthesize_coqui_cached(self, sentences, lang='en', quality='high', max_workers=None, progress=None):
+        """
+        Sentence-granular cached synthesis: reuse every sentence already in
+        the cache and only synthesize the rest (each distinct one once).
+        Returns float32 arrays in input order.
+        """
+        keys = [self._get_sentence_cache_key(s, 'coqui', lang, quality) for s in sentences]
+        arrays = {}
+        for key in set(keys):
+            cached = self._get_from_cache(key)
+            if cached:
+                arrays[key] = sf.read(BytesIO(cached), dtype='float32')[0]
+
+        missing = {}
+        for key, sentence in zip(keys, sentences):
+            if key not in arrays:
+                missing.setdefault(key, sentence)
+
+        if len(sentences) > 1:
+            print(f"⚡ Sentence cache: {len(sentences) - len(missing)}/{len(sentences)} reused, "
+                  f"{len(missing)} to synthesize")
+
+        def on_chunk(done, total):
+            if progress:
+                progress(len(sentences) - len(missing) + done, len(sentences))
+
+        if missing:
+            generated = self._synthesize_coqui_many(list(missing.values()), max_workers, on_chunk)
+            for key, wav_array in zip(missing, generated):
+                arrays[key] = wav_array
+                # Lossless float WAV so stitched output matches a fresh run
+                buffer = BytesIO()
+                sf.write(buffer, wav_array, 22050, format='WAV', subtype='FLOAT')
+                self._save_to_cache(key, buffer.getvalue())
+        elif progress:
+            progress(len(sentences), len(sentences))
+
+        return [arrays[key] for key in keys]
+
+    def _fetch_gtts_cached(self, sentences, lang):
+        """Sentence-granular cached Google TTS; returns MP3 bytes per sentence"""
+        keys = [self._get_sentence_cache_key(s, 'gtts', lang, 'standard') for s in sentences]
+        audio = {key: self._get_from_cache(key) for key in set(keys)}
+        missing = {}
+        for key, sentence in zip(keys, sentences):
+            if not audio[key]:
+                missing.setdefault(key, sentence)
+
+        print(f"⚡ Sentence cache: {len(sentences) - len(missing)}/{len(sentences)} reused, "
+              f"{len(missing)} to fetch")
+
+        def fetch(sentence):
+            buffer = BytesIO()
+            gTTS(text=sentence, lang=lang, slow=False).write_to_fp(buffer)
+            return buffer.getvalue()
+
+        if missing:
+            workers = max(1, min(len(missing), TTSService.GTTS_MAX_PARALLEL))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for key, audio_bytes in zip(missing, executor.map(fetch, missing.values())):
+                    audio[key] = audio_bytes
+                    self._save_to_cache(key, audio_bytes, 'mp3')
+
+        return [audio[key] for key in keys]
 
     def _get_from_cache(self, cache_key: str) -> bytes:
         """Get audio from cache (instant!)"""
-        if cache_key in TTSService._audio_cache:
-            cache_file = TTSService._cache_dir / f"{cache_key}.wav"
-            if cache_file.exists():
-                try:
-                    with open(cache_file, 'rb') as f:
-                        return f.read()
-                except:
-                    pass
-        return None
-
-    def _save_to_cache(self, cache_key: str, audio_bytes: bytes):
-        """Save audio to cache for future instant playback"""
         try:
-            cache_file = TTSService._cache_dir / f"{cache_key}.wav"
-            with open(cache_file, 'wb') as f:
-                f.write(audio_bytes)
-            TTSService._audio_cache[cache_key] = True
+            return TTSService._cache_store.get(cache_key)
+        except Exception as e:
+            print(f"⚠ Cache read warning: {e}")
+            return None
 
-            # Save index periodically
-            if len(TTSService._audio_cache) % 10 == 0:
-                self._save_cache_index()
+    def _link_from_cache(self, cache_key: str, output_path: str) -> bool:
+        """
+        Materialize a cache hit at output_path: hot entries are written from
+        the memory tier, others hard-linked (or kernel-copied) from disk.
+        Returns False on a miss.
+        """
+        try:
+            if not TTSService._cache_store.export(cache_key, output_path):
+                return False
+            # A hard link keeps the cache entry's old mtime; the output
+            # janitor would expire it on its next sweep
+            os.utime(output_path)
+            self._output_digests[output_path] = TTSService._cache_store.digest(cache_key)
+            return True
+        except Exception as e:
+            print(f"⚠ Cache link warning: {e}")
+            return False
 
-            # Limit cache size to prevent disk bloat
-            if len(TTSService._audio_cache) > 200:
-                self._cleanup_cache()
+    def _save_to_cache(self, cache_key: str, audio_bytes: bytes, ext: str = 'wav', output_path: str = None):
+        """
+        Save audio to cache for future instant playback. For a whole output
+        (output_path given), its content digest is stored with the entry so
+        later hits can be published without hashing the file.
+        """
+        digest = None
+        if output_path:
+            digest = bytes_hash(audio_bytes)
+            self._output_digests[output_path] = digest
+        try:
+            TTSService._cache_store.put(cache_key, audio_bytes, ext, digest)
         except Exception as e:
             print(f"⚠ Cache save warning: {e}")
 
-    def _cleanup_cache(self):
-        """Remove old cache files"""
-        try:
-            cache_files = list(TTSService._cache_dir.glob("*.wav"))
-            if len(cache_files) > 200:
-                # Sort by modification time (oldest first)
-                cache_files.sort(key=lambda x: x.stat().st_mtime)
-                # Remove oldest 50 files
-                for cache_file in cache_files[:50]:
-                    try:
-                        cache_file.unlink()
-                        TTSService._audio_cache.pop(cache_file.stem, None)
-                    except:
-                        pass
-                self._save_cache_index()
-                print("✓ Cleaned up old cache files")
-        except:
-            pass
+    def output_digest(self, output_path):
+        """Content digest of the audio last written to output_path, if known (see publish_output)"""
+        return self._output_digests.pop(output_path, None)
+
+    @classmethod
+    def cache_stats(cls):
+        """Hit ratio, size and eviction counters of the audio cache"""
+        return cls._cache_store.stats() if cls._cache_store is not None else None
 
     # ========================================
     # GOOGLE TTS (Fast and reliable fallback)
@@ -1373,34 +1891,36 @@ class TTSService:
     def save_with_gtts(self, text, output_path, lang='en'):
         """Google TTS - Fast and reliable (0.3-1 seconds)"""
         try:
+            target_lang = TTSService.GTTS_LANGUAGES.get(lang, 'en')
+
             # Check cache
-            cache_key = self._get_cache_key(text)
-            cached_audio = self._get_from_cache(cache_key)
-            if cached_audio:
+            cache_key = self.cache_key_for(text, 'gtts', lang)
+            if self._link_from_cache(cache_key, output_path):
                 print(f"⚡ Cache hit (0ms): {text[:50]}")
-                with open(output_path, 'wb') as f:
-                    f.write(cached_audio)
                 return output_path
 
-            lang_map = {'en': 'en', 'ur': 'ur', 'hi': 'hi', 'es': 'es', 'fr': 'fr', 'ar': 'ar'}
-            target_lang = lang_map.get(lang, 'en')
-
             start_time = time.time()
             print(f"🎤 Generating with Google TTS: {text[:50]}...")
 
-            tts = gTTS(text=text, lang=target_lang, slow=False)
+            if len(text) > TTSService.CHUNK_MIN_CHARS:
+                # Long text: per-sentence entries, so an edited document only
+                # refetches changed sentences. MP3 frames concatenate cleanly.
+                sentences = split_text_into_sentences(text, TTSService.MAX_SENTENCE_CHARS)
+                audio_bytes = b''.join(self._fetch_gtts_cached(sentences, target_lang))
+            else:
+                tts = gTTS(text=text, lang=target_lang, slow=False)
 
-            # Save to BytesIO for caching
-            audio_buffer = BytesIO()
-            tts.write_to_fp(audio_buffer)
-            audio_bytes = audio_buffer.getvalue()
+                # Save to BytesIO for caching
+                audio_buffer = BytesIO()
+                tts.write_to_fp(audio_buffer)
+                audio_bytes = audio_buffer.getvalue()
 
             # Save to file
             with open(output_path, 'wb') as f:
                 f.write(audio_bytes)
 
             # Cache it
-            self._save_to_cache(cache_key, audio_bytes)
+            self._save_to_cache(cache_key, audio_bytes, 'mp3', output_path=output_path)
 
             elapsed = time.time() - start_time
             print(f"✓ Google TTS completed in {elapsed:.2f}s")
@@ -1495,18 +2015,27 @@ class TTSService:
         audio_buffer.seek(0)
         return audio_buffer.read()
 
-    def generate_speech(self, text, engine='coqui', lang='en', quality='high'):
-        """Universal speech generation method"""
-        import uuid
-        filename = f"speech_{uuid.uuid4().hex}.wav"
-        output_path = os.path.join(self.output_folder, filename)
-
+    def save_speech(self, text, output_path, engine='coqui', lang='en', quality='high', progress=None):
+        """
+        Synthesize text to output_path with the given engine (gTTS if unknown)
+        progress: optional callback(chunks_done, chunks_total)
+        """
         handlers = {
-            'coqui': lambda: self.save_with_coqui_fast(text, output_path, lang, quality),
+            'coqui': lambda: self.save_with_coqui_fast(text, output_path, lang, quality, progress=progress),
             'gtts': lambda: self.save_with_gtts(text, output_path, lang),
             'elevenlabs': lambda: self.save_with_elevenlabs(text, output_path, lang, quality),
             'pyttsx3': lambda: self.save_with_pyttsx3_unlimited(text, output_path, lang, quality)
         }
 
         handler = handlers.get(engine, handlers['gtts'])
-        return handler()
\ No newline at end of file
+        result = handler()
+        if progress and engine != 'coqui':
+            progress(1, 1)
+        return result
+
+    def generate_speech(self, text, engine='coqui', lang='en', quality='high'):
+        """Universal speech generation method"""
+        import uuid
+        filename = f"speech_{uuid.uuid4().hex}.wav"
+        output_path = os.path.join(self.output_folder, filename)
+        return self.save_speech(text, output_path, engine, lang, quality)
\ No newline at end of file
@@ -5,6 +5,10 @@ Tests all 5 modules independently and integration
 
 import os
 import sys
+import time
+import random
+import tempfile
+import threading
 
 
 def test_module_1_imports():
@@ -57,6 +61,74 @@ def test_module_2_text_extraction():
         return False
 
 
+def test_clean_text_equivalence():
+    """Test Module 2: compiled clean_text matches the original regex chain exactly"""
+    print("\n" + "=" * 60)
+    print("MODULE 2: Testing clean_text Equivalence (randomized)")
+    print("=" * 60)
+
+    try:
+        from services.extractor import clean_text, iter_clean_text
+    except ImportError as e:
+        print(f"⚠ Skipped, dependency not installed: {e}")
+        return
+    from benchmarks import clean_text_regex_chain
+
+    # Characters that exercise every rule: line endings, spaces/tabs, other
+    # Unicode whitespace, deleted controls, lone surrogates, plain text
+    alphabet = ['a', 'Z', 'é', '😀', '?', ' ', '  ', '\t', '\n', '\n\n', '\r', '\r\n', '\x00', '\x08',
+                '\x0b', '\x0c', '\x1c', '\x1f', '\x7f', '\x85', '\x9f', '\xa0', '\u2028', '\u3000',
+                '\ud800', '\udfff', '\ufeff']
+    rng = random.Random(2024)
+
+    for case in range(20000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        expected = clean_text_regex_chain(text)
+        assert clean_text(text) == expected, f"clean_text differs for {text!r}"
+
+        # The streaming cleaner must agree whatever the chunk boundaries
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 5))))
+        chunks = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+        streamed = '\n'.join(iter_clean_text(chunks, piece_chars=rng.randint(1, 20)))
+        assert streamed == expected, f"iter_clean_text differs for {chunks!r}"
+
+    print("✓ clean_text and iter_clean_text match the reference on 20000 random inputs")
+
+
+def test_docx_text_boxes():
+    """Test Module 2: streamed DOCX reads a text box once, not its mc:Fallback copy too"""
+    print("\n" + "=" * 60)
+    print("MODULE 2: Testing DOCX Text Boxes")
+    print("=" * 60)
+
+    try:
+        from services.extractor import iter_text_from_docx
+    except ImportError as e:
+        print(f"⚠ Skipped, dependency not installed: {e}")
+        return
+    import io
+    import zipfile
+
+    text_box = '<w:txbxContent><w:p><w:r><w:t>Boxed</w:t></w:r></w:p></w:txbxContent>'
+    body = ('<w:p><w:r><w:t>Intro</w:t></w:r><w:r><mc:AlternateContent>'
+            f'<mc:Choice Requires="wps"><w:drawing><wps:txbx>{text_box}</wps:txbx></w:drawing></mc:Choice>'
+            f'<mc:Fallback><w:pict><v:textbox>{text_box}</v:textbox></w:pict></mc:Fallback>'
+            '</mc:AlternateContent></w:r></w:p>'
+            '<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+            '<w:p><w:r><w:t>Outro</w:t></w:r></w:p>')
+    document = ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+                ' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+                ' xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape"'
+                f' xmlns:v="urn:schemas-microsoft-com:vml"><w:body>{body}</w:body></w:document>')
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        archive.writestr('word/document.xml', document)
+
+    assert list(iter_text_from_docx(data.getvalue())) == ['Boxed', 'Intro', 'Cell', 'Outro']
+    print("✓ Text box read once, surrounding paragraphs and cells unchanged")
+
+
 def test_module_3_language_detection():
     """Test Module 3: Language Detection & Preprocessing"""
     print("\n" + "=" * 60)
@@ -87,6 +159,354 @@ def test_module_3_language_detection():
         return False
 
 
+def test_tts_normalizer():
+    """Test Module 3: compiled TTS normalizer (abbreviations, URLs, numbers)"""
+    print("\n" + "=" * 60)
+    print("MODULE 3: Testing TTS Text Normalizer")
+    print("=" * 60)
+
+    from services.text_normalizer import NORMALIZATION_RULES, TextNormalizer, get_normalizer
+
+    cases = {
+        "Dr. Smith paid $5.20, i.e. 50% of $1,000.":
+            "Doctor Smith paid five dollars and twenty cents, that is fifty percent of one thousand dollars.",
+        "Read https://example.com/docs or mail help@example.com now.": "Read  or mail  now.",
+        "The 21st meeting on 2024-03-05 had 1,234 people.":
+            "The twenty-first meeting on March fifth, twenty twenty-four had one thousand two hundred thirty-four people.",
+        "Version 1.2.3, call 555-1234, HMr. stays": "Version 1.2.3, call 555-1234, HMr. stays",
+    }
+    normalizer = get_normalizer('en')
+    for text, expected in cases.items():
+        assert normalizer.normalize(text) == expected, text
+    print(f"✓ {len(cases)} normalization cases match")
+
+    # Thousands of extra abbreviations: still expanded only at word starts, longest first
+    rng = random.Random(11)
+    extra = {''.join(rng.choice('bcdfghjklmnpqrstvwxz') for _ in range(rng.randint(3, 6))).capitalize() + '.': 'X'
+             for _ in range(3000)}
+    extra.update({'Corp.': 'Corporation', 'Corp. Ltd.': 'Corporation Limited'})
+    rules = {**NORMALIZATION_RULES['en'], 'abbreviations': {**NORMALIZATION_RULES['en']['abbreviations'], **extra}}
+    domain = TextNormalizer('en', rules)
+    assert domain.normalize("Acme Corp. Ltd. and MegaCorp. met Mr. Lee.") == \
+        "Acme Corporation Limited and MegaCorp. met Mister Lee."
+    print(f"✓ {len(extra)} domain abbreviations compiled and applied")
+
+    # Signs and clock times are read as such, not glued to the number words
+    assert normalizer.normalize("It was -5 at 9:05, -2.5% by 10:30; ratio 3:1 at 10:30:15.") == \
+        "It was minus five at nine oh five, minus two point five percent by ten thirty; ratio 3:1 at 10:30:15."
+    # Only ASCII digits are spelled; other scripts' numerals are left to the engine
+    assert normalizer.normalize("Year २०२४ and 2024") == "Year २०२४ and twenty twenty-four"
+    print("✓ Signs, clock times and non-ASCII digits handled")
+
+    # Languages without rules keep their numbers and lose only URLs and emails
+    for language in ('hi', 'ar'):
+        assert get_normalizer(language).normalize("मेरे पास 25 रुपये, ₹500 और 50% https://example.com") == \
+            "मेरे पास 25 रुपये, ₹500 और 50%"
+    assert get_normalizer('ar').normalize("لدي 25 كتابا help@example.com") == "لدي 25 كتابا"
+    # A rule set without a percent word leaves the % sign instead of failing
+    no_percent = {key: value for key, value in NORMALIZATION_RULES['en'].items() if key != 'percent'}
+    assert TextNormalizer('en', no_percent).normalize("50% off") == "fifty% off"
+    print("✓ Unknown languages and missing rules leave numbers untouched")
+
+
+def test_preprocess_normalizes_for_tts():
+    """Test Module 3: preprocess_text spells out symbols before its character filter drops them"""
+    print("\n" + "=" * 60)
+    print("MODULE 3: Testing preprocess_text Normalization")
+    print("=" * 60)
+
+    try:
+        from services.language_detector import preprocess_text
+    except ImportError as e:
+        print(f"⚠ Skipped, dependency not installed: {e}")
+        return
+
+    assert preprocess_text("Dr. Smith paid $5.20, i.e. 50% of $1,000.", 'en') == \
+        "Doctor Smith paid five dollars and twenty cents, that is fifty percent of one thousand dollars."
+    assert preprocess_text("Costs €3 (20%) on 2024-03-05!", 'en') == \
+        "Costs three euros (twenty percent) on March fifth, twenty twenty-four!"
+    assert preprocess_text("See https://example.com/docs now.", 'en') == "See now."
+    print("✓ Currency, percentages, dates and URLs survive preprocessing as words")
+
+
+def test_audio_cache_store():
+    """Test Module 4: disk audio cache - LRU eviction and index recovery after a crash"""
+    print("\n" + "=" * 60)
+    print("MODULE 4: Testing Audio Cache Store")
+    print("=" * 60)
+
+    from services.audio_cache import AudioCacheStore
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = AudioCacheStore(cache_dir, max_bytes=30)
+        for key in ('a', 'b', 'c'):
+            store.put(key, b'x' * 10)
+        assert store.path('a') is not None          # a becomes most recently used
+        store.put('d', b'x' * 10)
+        assert 'b' not in store and not os.path.exists(os.path.join(cache_dir, 'b.wav'))
+        assert all(key in store for key in ('a', 'c', 'd'))
+        assert store.get('a') == b'x' * 10
+        assert store.stats()['evictions'] == 1 and store.stats()['bytes'] == 30
+        print("✓ Least recently used entry evicted at the byte budget")
+
+        # "Crash": access order is flushed, but the store is never closed and
+        # a write is left half done; a new store must rebuild the same LRU
+        store.flush()
+        for name, age in (('.tmp-interrupted.wav', 2 * AudioCacheStore.STALE_TEMP_SECONDS), ('.tmp-writing.wav', 0)):
+            path = os.path.join(cache_dir, name)
+            with open(path, 'wb') as f:
+                f.write(b'partial')
+            os.utime(path, (time.time() - age, time.time() - age))
+        recovered = AudioCacheStore(cache_dir, max_bytes=20)
+        assert 'c' not in recovered                 # oldest access, evicted to meet the smaller budget
+        assert recovered.get('a') == b'x' * 10 and recovered.get('d') == b'x' * 10
+        assert not os.path.exists(os.path.join(cache_dir, '.tmp-interrupted.wav'))
+        assert os.path.exists(os.path.join(cache_dir, '.tmp-writing.wav'))    # may be another process's write
+        print("✓ Index recovered from SQLite in LRU order, interrupted writes discarded")
+
+    # Several processes on one directory share a single budget through the index
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = AudioCacheStore(cache_dir, max_bytes=30)
+        second = AudioCacheStore(cache_dir, max_bytes=30)
+        first.put('a', b'x' * 10)
+        second.put('b', b'x' * 10)
+        assert first.path('a') is not None          # hit in the first process
+        second.put('c', b'x' * 10)
+        first.put('d', b'x' * 10)                   # flushes its hit, then evicts b
+        assert 'b' not in second and second.stats()['bytes'] == 30
+        assert sorted(name for name in os.listdir(cache_dir) if name.endswith('.wav')) == ['a.wav', 'c.wav', 'd.wav']
+        # A file removed behind an index's back reads as a miss and is forgotten
+        os.remove(os.path.join(cache_dir, 'c.wav'))
+        assert first.get('c') is None and 'c' not in second
+    print("✓ Budget and LRU order shared across stores on one directory")
+
+
+def test_admission_controller():
+    """Test Module 5: admission control - budget, Retry-After, release and cost learning"""
+    print("\n" + "=" * 60)
+    print("MODULE 5: Testing Admission Control")
+    print("=" * 60)
+
+    from services.admission import AdmissionController, AdmissionRejected
+
+    controller = AdmissionController(budget_seconds=10, max_concurrent=2, cost_per_char={'gtts': 0.01})
+
+    # An idle system admits even an oversized request
+    big = controller.admit('gtts', 5000)
+    assert big.cost == 50
+
+    try:
+        controller.admit('gtts', 100)
+        raise AssertionError("over-budget request was admitted")
+    except AdmissionRejected as e:
+        # 51s queued against a 10s budget, draining at 2 worker-seconds per second
+        assert e.retry_after == 21 and e.cost_seconds == 1
+    big.release(succeeded=False)
+    assert controller.stats()['backlog_seconds'] == 0 and controller.stats()['in_flight'] == 0
+
+    # refine() swaps the admission estimate for the real length
+    ticket = controller.admit('gtts', 500)
+    ticket.refine(200)
+    assert controller.stats()['backlog_seconds'] == 2
+
+    # A successful run teaches the per-character cost (EWMA)
+    with ticket:
+        ticket._started -= 1.0                      # pretend it took a second
+    assert abs(controller.cost_per_char['gtts'] - (0.01 + 0.2 * (1.0 / 200 - 0.01))) < 1e-6
+    stats = controller.stats()
+    assert stats['admitted'] == 2 and stats['rejected'] == 1 and stats['completed'] == 2
+    assert stats['backlog_seconds'] == 0
+    print("✓ Budget, Retry-After, release and cost learning behave as specified")
+
+
+def test_micro_batcher():
+    """Test Module 4: cross-request micro-batching"""
+    print("\n" + "=" * 60)
+    print("MODULE 4: Testing Micro-Batcher")
+    print("=" * 60)
+
+    try:
+        from services.batcher import MicroBatcher
+    except ImportError as e:
+        print(f"⚠ Skipped, dependency not installed: {e}")
+        return
+
+    batches = []
+    gate = threading.Event()
+
+    def run_batch(items):
+        batches.append(list(items))
+        gate.wait(5)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=20, max_concurrency=1)
+    try:
+        first = batcher.submit(0)
+        deadline = time.time() + 5
+        while not batches and time.time() < deadline:
+            time.sleep(0.005)
+
+        # The only slot is busy: these accumulate and go out in full batches
+        futures = [batcher.submit(item) for item in range(1, 7)]
+        gate.set()
+        assert first.result(5) == 0
+        assert [future.result(5) for future in futures] == [2, 4, 6, 8, 10, 12]
+        assert batches == [[0], [1, 2, 3, 4], [5, 6]]
+        assert batcher.stats()['max_batch'] == 4
+    finally:
+        batcher.shutdown()
+
+    # A failing batch fails every caller in it
+    failing = MicroBatcher(lambda items: [None], max_batch_size=4, max_wait_ms=50, max_concurrency=1)
+    try:
+        futures = [failing.submit(item) for item in range(3)]
+        for future in futures:
+            assert isinstance(future.exception(5), RuntimeError)
+    finally:
+        failing.shutdown()
+    print("✓ Items batched while the slot is busy, results routed back in order")
+
+
+def test_output_janitor():
+    """Test Module 5: output retention - TTL expiry and disk quota"""
+    print("\n" + "=" * 60)
+    print("MODULE 5: Testing Output Janitor")
+    print("=" * 60)
+
+    from services.janitor import OutputJanitor
+
+    with tempfile.TemporaryDirectory() as folder:
+        now = time.time()
+        ages = {'expired.wav': 7200, 'played.wav': 7200, 'keep.wav': 7200,
+                'a.wav': 600, 'b.wav': 300, 'c.wav': 120, 'fresh.wav': 0}
+        for name, age in ages.items():
+            path = os.path.join(folder, name)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 10)
+            os.utime(path, (now - age, now - age))
+        os.mkdir(os.path.join(folder, '.tts_cache'))
+
+        janitor = OutputJanitor(folder, ttl_seconds=3600, max_bytes=5, batch_size=2, batch_pause=0,
+                                min_age_seconds=60, protected=('keep.wav',))
+        janitor.touch('played.wav')                 # still being played: TTL restarts
+        removed = janitor.sweep()
+
+        # TTL drops expired.wav; the quota then drops the least recently used
+        # files, but never ones accessed within min_age_seconds
+        assert sorted(os.listdir(folder)) == ['.tts_cache', 'fresh.wav', 'keep.wav', 'played.wav']
+        assert removed['expired'] == 1 and removed['quota'] == 3 and removed['bytes'] == 40
+        assert janitor.stats()['bytes_in_use'] == 20
+    print("✓ Expired and over-quota files removed; recent, touched and protected files kept")
+
+    # Hard links: an output linked from the cache costs the folder nothing,
+    # and two names of one inode are counted (and evicted) once
+    with tempfile.TemporaryDirectory() as folder:
+        os.mkdir(os.path.join(folder, '.tts_cache'))
+        files = {'own.wav': 600, 'pair_a.wav': 700, 'pair_b.wav': 650}
+        for name in ('own.wav', 'pair_a.wav', os.path.join('.tts_cache', 'entry.wav')):
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(b'x' * 10)
+        os.link(os.path.join(folder, 'pair_a.wav'), os.path.join(folder, 'pair_b.wav'))
+        os.link(os.path.join(folder, '.tts_cache', 'entry.wav'), os.path.join(folder, 'cached.wav'))
+        files['cached.wav'] = 900
+        now = time.time()
+        for name, age in files.items():
+            os.utime(os.path.join(folder, name), (now - age, now - age), follow_symlinks=False)
+
+        janitor = OutputJanitor(folder, ttl_seconds=3600, max_bytes=10, batch_pause=0, min_age_seconds=60)
+        removed = janitor.sweep()
+        assert sorted(os.listdir(folder)) == ['.tts_cache', 'cached.wav', 'own.wav']
+        assert removed['quota'] == 2 and removed['bytes'] == 10
+        assert janitor.stats()['bytes_in_use'] == 10
+    print("✓ Quota counts each inode once and skips files shared with the cache")
+
+
+def test_audio_formats():
+    """Test Module 4: output format requests and variant file names"""
+    print("\n" + "=" * 60)
+    print("MODULE 4: Testing Output Formats")
+    print("=" * 60)
+
+    from services.audio_formats import resolve_format, variant_filename, parse_variant
+
+    assert resolve_format('auto') is None and resolve_format('') is None
+    assert resolve_format('opus') == {'name': 'opus', 'ext': 'ogg', 'mime': 'audio/ogg', 'bitrate': 32}
+    assert resolve_format('MP3-192')['bitrate'] == 192
+    assert resolve_format('ogg-48k')['name'] == 'opus' and resolve_format('ogg-48k')['bitrate'] == 48
+    assert resolve_format('wav')['bitrate'] is None
+    for bad in ('flac', 'mp3-100', 'wav-128', 'mp3-fast'):
+        try:
+            resolve_format(bad)
+            raise AssertionError(f"{bad!r} was accepted")
+        except ValueError:
+            pass
+
+    opus = resolve_format('opus-24')
+    assert variant_filename('audio_ab12.wav', opus) == 'audio_ab12.24k.ogg'
+    assert variant_filename('audio_ab12.mp3', resolve_format('wav')) == 'audio_ab12.wav'
+    assert parse_variant('audio_ab12.24k.ogg') == ('audio_ab12', opus)
+    assert parse_variant('audio_ab12.mp3') == ('audio_ab12', resolve_format('mp3'))
+    for bad in ('audio_ab12.100k.mp3', 'audio_ab12.flac', '../audio_ab12.mp3', 'audio_ab12.24k'):
+        assert parse_variant(bad) is None, bad
+    print("✓ Formats, bitrates and variant names parse and round-trip")
+
+
+def test_publish_output():
+    """Test Module 5: content-addressed publishing of generated audio"""
+    print("\n" + "=" * 60)
+    print("MODULE 5: Testing Content-Addressed Outputs")
+    print("=" * 60)
+
+    from services.output_store import publish_output, immutable_etag, content_hash, bytes_hash
+
+    wav = b'RIFF\x24\x00\x00\x00WAVEfmt ' + b'\x00' * 32
+    with tempfile.TemporaryDirectory() as folder:
+        def write_temp(data, age=0):
+            fd, path = tempfile.mkstemp(dir=folder, prefix='speech_', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.utime(path, (time.time() - age, time.time() - age))
+            return path
+
+        # Named by content and sniffed container; an old mtime (a hard-linked
+        # cache hit) is freshened so retention sees a new file
+        first = write_temp(wav, age=86400)
+        name = publish_output(first)
+        assert name == f"audio_{bytes_hash(wav)}.wav" == f"audio_{content_hash(os.path.join(folder, name))}.wav"
+        assert not os.path.exists(first)
+        assert time.time() - os.path.getmtime(os.path.join(folder, name)) < 60
+
+        # Identical audio reuses the existing file
+        second = write_temp(wav)
+        assert publish_output(second) == name and not os.path.exists(second)
+        assert os.listdir(folder) == [name]
+
+        # A known digest is trusted, so the file is not read again
+        third = write_temp(b'ID3' + b'\x00' * 16)
+        assert publish_output(third, digest='0' * 32) == f"audio_{'0' * 32}.mp3"
+
+        # The janitor expires the published copy just as it is reused: ours takes its place
+        real_utime = os.utime
+
+        def expire_then_utime(path, *args, **kwargs):
+            if path == os.path.join(folder, name) and os.path.exists(path):
+                os.remove(path)
+            return real_utime(path, *args, **kwargs)
+
+        fourth = write_temp(wav)
+        os.utime = expire_then_utime
+        try:
+            assert publish_output(fourth) == name
+        finally:
+            os.utime = real_utime
+        assert os.path.exists(os.path.join(folder, name)) and not os.path.exists(fourth)
+
+    assert immutable_etag(name) == name[len('audio_'):]
+    assert immutable_etag(name.replace('.wav', '.32k.ogg')) is not None
+    assert immutable_etag('speech_123.wav') is None
+    print("✓ Outputs named by content, duplicates reused, mtimes freshened, expired copies republished")
+
+
 def test_module_4_tts_engines():
     """Test Module 4: Speech Generation"""
     print("\n" + "=" * 60)
@@ -243,6 +663,16 @@ def run_integration_test():
         return False
 
 
+def _run(test):
+    """Run an assertion-style test for main(): True if it raised nothing"""
+    try:
+        test()
+        return True
+    except Exception as e:
+        print(f"✗ {test.__name__} failed: {e!r}")
+        return False
+
+
 def main():
     """Run all tests"""
     print("\n" + "=" * 60)
@@ -253,9 +683,19 @@ def main():
         "Directory Structure": test_directory_structure(),
         "Module 1 (Input/File Handling)": test_module_1_imports(),
         "Module 2 (Text Extraction)": test_module_2_text_extraction(),
+        "Module 2 (clean_text Equivalence)": _run(test_clean_text_equivalence),
+        "Module 2 (DOCX Text Boxes)": _run(test_docx_text_boxes),
         "Module 3 (Language Detection)": test_module_3_language_detection(),
+        "Module 3 (TTS Normalizer)": _run(test_tts_normalizer),
+        "Module 3 (preprocess_text Normalization)": _run(test_preprocess_normalizes_for_tts),
         "Module 4 (TTS Engines)": test_module_4_tts_engines(),
+        "Module 4 (Audio Cache Store)": _run(test_audio_cache_store),
+        "Module 4 (Micro-Batcher)": _run(test_micro_batcher),
+        "Module 4 (Output Formats)": _run(test_audio_formats),
         "Module 5 (Flask Routes)": test_module_5_flask_routes(),
+        "Module 5 (Admission Control)": _run(test_admission_controller),
+        "Module 5 (Output Janitor)": _run(test_output_janitor),
+        "Module 5 (Content-Addressed Outputs)": _run(test_publish_output),
         "Integration Test": run_integration_test()
     }
 